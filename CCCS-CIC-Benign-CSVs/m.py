@@ -1,16 +1,21 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.stats import skew, kurtosis, norm
-from sklearn.preprocessing import LabelEncoder
+from concurrent.futures import ThreadPoolExecutor
+import json
 import psutil
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import report
+import stream_stats
+from entropy import row_entropy
 
 # List of new CSV files to load
 file_names = [
     "Ben0.csv", "Ben1.csv", "Ben2.csv", "Ben3.csv", "Ben4.csv"
 ]
+category_file = "category_codes.json"
 
 # Function to check memory usage
 def get_memory_usage():
@@ -18,101 +23,87 @@ def get_memory_usage():
     memory_info = process.memory_info()
     return memory_info.rss / (1024 ** 2)  # Convert bytes to MB
 
+class CategoryDictionary:
+    """Codes for non-numeric values, shared by every chunk and file so a value always gets the same code."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, column, values):
+        mapping = self.codes.setdefault(column, {})
+        uniques, inverse = np.unique(values.astype(str).to_numpy(), return_inverse=True)
+        unique_codes = np.array([mapping.setdefault(value, len(mapping)) for value in uniques.tolist()], dtype=np.int32)
+        return unique_codes[inverse]
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.codes, file)
+
 # Print initial memory usage
 print(f"Initial Memory usage: {get_memory_usage():.2f} MB")
 
-# Load and process each CSV file separately in chunks
-chunk_size = 5000  # Adjust based on memory
-df = pd.DataFrame()
-
-for file_name in file_names:
-    try:
-        # Process CSV file in chunks
-        for chunk in pd.read_csv(file_name, chunksize=chunk_size):
-            # Process the chunk
-            # Automatically detect numeric columns
-            numeric_columns = chunk.select_dtypes(include=[np.number]).columns
-            non_numeric_columns = chunk.select_dtypes(exclude=[np.number]).columns
-
-            # Encode non-numeric columns
-            for col in non_numeric_columns:
-                le = LabelEncoder()
-                chunk[col] = le.fit_transform(chunk[col])
-
-            # Convert numeric columns to smaller data types
-            for col in chunk.select_dtypes(include=[np.number]).columns:
-                if chunk[col].dtype == 'float64':
-                    chunk[col] = chunk[col].astype('float32')
-                elif chunk[col].dtype == 'int64':
-                    chunk[col] = chunk[col].astype('int32')
-
-            # Compute Shannon entropy for each row in the chunk
-            def shannon_entropy(row):
-                prob = row / row.sum()
-                return -np.sum(prob * np.log2(prob + np.finfo(float).eps))  # Adding epsilon to avoid log(0)
-
-            entropy_column = chunk[numeric_columns].apply(shannon_entropy, axis=1)
-            z_score_column = (entropy_column - entropy_column.mean()) / entropy_column.std()
-
-            # Concatenate the new columns to avoid fragmentation
-            chunk = pd.concat([chunk, entropy_column.rename('entropy'), z_score_column.rename('z_score')], axis=1)
-
-            # Optionally, copy the chunk to avoid fragmentation
-            chunk = chunk.copy()
-
-            # Append the chunk to the full dataframe (if needed)
-            df = pd.concat([df, chunk], ignore_index=True)
-
-    except FileNotFoundError:
-        print(f"Error: {file_name} not found. Skipping.")
-    except Exception as e:
-        print(f"Error loading {file_name}: {e}")
+# Load and process each CSV file in chunks; larger chunks suit the whole-matrix operations
+chunk_size = 100_000  # Adjust based on memory
+workers = os.cpu_count() or 1
+categories = CategoryDictionary()
+# Running aggregates of the row entropy, over a fixed range so no chunk decides the histogram bins
+summary = stream_stats.Summary(*stream_stats.ENTROPY_RANGE)
+row_count = 0
+
+def read_chunks():
+    """Yield (float32 matrix over every column of the file, row count) per chunk.
+
+    Each chunk is converted with to_numeric(errors='coerce'), so a value that is not a number
+    (in a text column, or a stray one in a numeric column) counts as 0 and adds nothing to
+    the row's entropy instead of failing the rest of the file. Malformed lines are reported
+    and skipped.
+    """
+    for file_name in file_names:
+        try:
+            for chunk in pd.read_csv(file_name, chunksize=chunk_size, on_bad_lines="warn"):
+                # Record codes for text values against the global dictionary
+                for col in chunk.select_dtypes(exclude=[np.number]).columns:
+                    categories.encode(col, chunk[col])
+
+                numeric = chunk.apply(pd.to_numeric, errors="coerce")
+                yield numeric.to_numpy(dtype=np.float32, na_value=0.0), len(chunk)
+        except FileNotFoundError:
+            print(f"Error: {file_name} not found. Skipping.")
+        except (pd.errors.ParserError, UnicodeDecodeError, OSError) as e:
+            print(f"Error reading {file_name}, skipping the rest of it: {e}")
+
+# NumPy releases the GIL in the row-entropy kernels, so chunks are processed on all cores by threads
+# while the main thread parses the next chunk; at most 2 chunks per worker are in flight
+with ThreadPoolExecutor(workers) as executor:
+    pending = []
+    for matrix, rows in read_chunks():
+        pending.append((executor.submit(row_entropy, matrix), rows))
+        while len(pending) >= 2 * workers:
+            future, rows = pending.pop(0)
+            summary.update(future.result())
+            row_count += rows
+    for future, rows in pending:
+        summary.update(future.result())
+        row_count += rows
+
+categories.save(category_file)
 
 # Final memory usage after loading data
 print(f"Memory usage after loading data: {get_memory_usage():.2f} MB")
 
-# Check the dataframe size
-print(f"Dataframe size: {df.shape[0]} rows and {df.shape[1]} columns")
-
-# Now you can proceed to analyze the 'df' dataframe as before
-# For example, compute statistics for entropy and Gaussian fitting:
-mean_entropy = np.mean(df["entropy"])
-std_dev_entropy = np.std(df["entropy"])
-
-# Fit Gaussian distribution to the entropy values
-mu, std = norm.fit(df["entropy"])
-
-# Plot the Histogram for Entropy
-plt.figure(figsize=(12, 6))
-sns.histplot(df["entropy"], kde=True, bins=15, color="blue", stat="density")
-plt.axvline(mean_entropy, color="red", linestyle="dashed", linewidth=2, label=f"Mean = {mean_entropy:.2f}")
-plt.axvline(mean_entropy + std_dev_entropy, color="green", linestyle="dashed", linewidth=2, label=f"Mean + 1σ = {mean_entropy + std_dev_entropy:.2f}")
-plt.axvline(mean_entropy - std_dev_entropy, color="green", linestyle="dashed", linewidth=2, label=f"Mean - 1σ = {mean_entropy - std_dev_entropy:.2f}")
-
-# Plot Gaussian (Normal) Distribution
-xmin, xmax = plt.xlim()
-x = np.linspace(xmin, xmax, 100)
-p = norm.pdf(x, mu, std)
-plt.plot(x, p, 'k', linewidth=2, label=f'Gaussian Fit: μ = {mu:.2f}, σ = {std:.2f}')
-plt.title("Entropy Distribution with KDE and Gaussian Fit")
-plt.xlabel("Entropy")
-plt.ylabel("Density")
-plt.legend()
-plt.show()
-
-# Save the Histogram as PNG (Optional)
-plt.figure(figsize=(12, 6))
-sns.histplot(df["entropy"], kde=True, bins=15, color="blue", stat="density")
-plt.axvline(mean_entropy, color="red", linestyle="dashed", linewidth=2, label=f"Mean = {mean_entropy:.2f}")
-plt.axvline(mean_entropy + std_dev_entropy, color="green", linestyle="dashed", linewidth=2, label=f"Mean + 1σ = {mean_entropy + std_dev_entropy:.2f}")
-plt.axvline(mean_entropy - std_dev_entropy, color="green", linestyle="dashed", linewidth=2, label=f"Mean - 1σ = {mean_entropy - std_dev_entropy:.2f}")
-plt.plot(x, p, 'k', linewidth=2, label=f'Gaussian Fit: μ = {mu:.2f}, σ = {std:.2f}')
-plt.title("Entropy Distribution with KDE and Gaussian Fit")
-plt.xlabel("Entropy")
-plt.ylabel("Density")
-plt.legend()
-plt.savefig("entropy_distribution_gaussian.png", dpi=300)
-plt.close()
+# Check the number of rows processed
+print(f"Rows processed: {row_count}")
+if not summary.stats.count:
+    raise SystemExit("No entropy values computed.")
+
+# Statistics for entropy come from the running aggregates
+# (norm.fit's maximum-likelihood estimates are the mean and population standard deviation)
+print(f"Mean: {summary.stats.mean:.2f}, Standard Deviation: {summary.stats.std:.2f}")
+print(f"Skewness: {summary.stats.skewness:.2f}, Kurtosis: {summary.stats.kurtosis:.2f}")
+
+# Render the histogram, KDE and Gaussian fit once, headless, straight to PNG
+report.save_figure(report.plot_distribution, "entropy_distribution_gaussian.png", summary,
+                   title="Entropy Distribution with KDE and Gaussian Fit", gaussian=True, dpi=300)
 
 # Print memory usage after processing
 print(f"Memory usage after processing: {get_memory_usage():.2f} MB")
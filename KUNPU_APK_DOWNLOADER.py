@@ -2,9 +2,10 @@ import subprocess
 import time
 import json
 import os
-import re  # To use regular expressions for pattern matching
-from PIL import Image
-import pytesseract
+
+import adb_harvest
+import package_queue
+import screen_state
 
 BACKUP_DIR = "/Volumes/Shared/rabbyx/APKS_PLAY"
 
@@ -26,52 +27,23 @@ def save_package_names(package_names, filename="package_names.json"):
     with open(filename, "w") as file:
         json.dump({"packages": package_names}, file, indent=4)
 
+# Check the Play Store page once for both country restrictions and a price
+def check_store_page(package_name):
+    print(f"Checking if {package_name} is unavailable or paid...")
+    state = screen_state.check_device()
+    if state == screen_state.UNAVAILABLE:
+        print("App is unavailable in this country. Skipping...")
+    elif state == screen_state.PAID:
+        print(f"App {package_name} is paid. Skipping...")
+    return state
+
 # Check if the app is unavailable in the country
 def is_app_unavailable():
-    try:
-        print("Checking if app is unavailable in the country...")
-
-        # Capture a screenshot of the Play Store page
-        subprocess.run(["adb", "shell", "screencap", "-p", "/sdcard/screen.png"], check=True)
-        subprocess.run(["adb", "pull", "/sdcard/screen.png", "screen.png"], check=True)
-
-        # Preprocess the image for better OCR results
-        image = Image.open("screen.png").convert("L")  # Convert to grayscale
-        text_output = pytesseract.image_to_string(image)
-
-        # Look for country restriction messages
-        if re.search(r"not available in your country|isn’t available in your country|in your country|is not compatible|This phone is'n compatible this app|compatible this app|This phone isn|this phone isn", text_output, re.IGNORECASE):
-            print("App is unavailable in this country. Skipping...")
-            return True
-
-        return False
-    finally:
-        os.remove("screen.png") if os.path.exists("screen.png") else None
-        subprocess.run(["adb", "shell", "rm", "/sdcard/screen.png"], check=True)
+    return screen_state.check_device() == screen_state.UNAVAILABLE
 
 # Check if the app is paid
 def is_paid_app(package_name):
-    try:
-        print(f"Checking if {package_name} is a paid app...")
-
-        # Open the Play Store for the app
-        subprocess.run(["adb", "shell", "am", "start", f"com.android.vending://details?id={package_name}"], check=True)
-        time.sleep(5)  # Wait for the Play Store to load
-
-        # Capture a screenshot
-        subprocess.run(["adb", "shell", "screencap", "-p", "/sdcard/screen.png"], check=True)
-        subprocess.run(["adb", "pull", "/sdcard/screen.png", "screen.png"], check=True)
-
-        # Extract text and check for price
-        text_output = pytesseract.image_to_string(Image.open("screen.png"))
-        if re.search(r"BDT\s\d{1,3}(?:,\d{3})?", text_output):
-            print(f"App {package_name} is paid. Skipping...")
-            return True
-
-        return False
-    finally:
-        os.remove("screen.png") if os.path.exists("screen.png") else None
-        subprocess.run(["adb", "shell", "rm", "/sdcard/screen.png"], check=True)
+    return screen_state.check_device() == screen_state.PAID
 
 # Install the app from Play Store with a cancellation option
 def install_from_play_via_url(package_name):
@@ -80,7 +52,7 @@ def install_from_play_via_url(package_name):
         subprocess.run(["adb", "shell", "am", "start", f"market://details?id={package_name}"], check=True)
         time.sleep(10)  # Wait for the Play Store to load
 
-        if is_app_unavailable() or is_paid_app(package_name):
+        if check_store_page(package_name):
             return False
 
         print("Clicking the 'Install' button...")
@@ -95,14 +67,10 @@ def install_from_play_via_url(package_name):
 
         while True:
             if time.time() - start_time > timeout:
-                print(f"Timeout exceeded for {package_name}. Cancelling installation and removing from list.")
-                # Uninstall the app if it is being installed and remove from the list
+                print(f"Timeout exceeded for {package_name}. Cancelling installation.")
+                # Uninstall the app if it is being installed; the caller retries it later
                 uninstall_apk(package_name)
-                package_names = load_package_names()
-                package_names.remove(package_name)
-                save_package_names(package_names)
-                print(f"{package_name} removed from the list.")
-                return False
+                raise adb_harvest.AdbError(adb_harvest.INSTALL_TIMED_OUT)
 
             installed_packages = subprocess.check_output(["adb", "shell", "pm", "list", "packages"]).decode()
             if f"package:{package_name}" in installed_packages:
@@ -113,8 +81,7 @@ def install_from_play_via_url(package_name):
             time.sleep(2)
 
     except subprocess.CalledProcessError as e:
-        print(f"Error installing {package_name}: {e}")
-        return False
+        raise adb_harvest.AdbError(f"Error installing {package_name}: {e}") from e
 
 # Backup APK
 def pull_apk(package_name):
@@ -134,7 +101,7 @@ def pull_apk(package_name):
             print(f"Backup saved at {destination}")
 
     except subprocess.CalledProcessError as e:
-        print(f"Failed to pull APK: {e}")
+        raise adb_harvest.AdbError(f"Failed to pull APK: {e}") from e
 
 # Uninstall the app
 def uninstall_apk(package_name):
@@ -164,28 +131,50 @@ def check_package_status(package_name):
             return False
 
         return True
-    except subprocess.CalledProcessError:
-        print(f"{package_name} is not available on this device.")
-        return False
+    except subprocess.CalledProcessError as e:
+        raise adb_harvest.AdbError(f"Could not query {package_name} on the device: {e}") from e
 
-# Main execution loop
-def main():
-    package_names = load_package_names()
-    if not package_names:
-        print("No packages found in package_names.json")
-        return
-
-    for package_name in package_names[:]:  # Iterate over a copy of the list
-        if check_package_status(package_name) and install_from_play_via_url(package_name):
-            pull_apk(package_name)
-            uninstall_apk(package_name)
-            package_names.remove(package_name)
-            save_package_names(package_names)
-            print(f"{package_name} processed and removed from list.")
-        else:
-            print(f"Skipping {package_name} due to installation failure, country restriction, or being a paid app.")
+# Sequential loop for a single device
+def main_sequential():
+    with package_queue.open_queue() as queue:
+        while True:
+            package_name = queue.claim("sequential")
+            if package_name is None:
+                break
+            try:
+                if check_package_status(package_name) and install_from_play_via_url(package_name):
+                    pull_apk(package_name)
+                    uninstall_apk(package_name)
+                    queue.complete(package_name)
+                    print(f"{package_name} processed and marked done.")
+                else:
+                    queue.skip(package_name, "system app, country restriction or paid app")
+                    print(f"Skipping {package_name}: system app, country restriction, or a paid app.")
+            except adb_harvest.AdbError as e:
+                # adb failures and timeouts are transient; the package stays queued for a later attempt
+                queue.release(package_name, str(e))
+                print(f"Will retry {package_name} later: {e}")
 
     print("All packages processed.")
 
+# Harvest a package queue on every attached device, recording each outcome in the queue
+def harvest_queue(queue, backup_dir=BACKUP_DIR, **kwargs):
+    def on_done(package_name, paths):
+        queue.complete(package_name)
+        print(f"{package_name} processed and marked done.")
+
+    adb_harvest.harvest(queue, backup_dir, on_done=on_done, on_skip=queue.skip, on_retry=queue.release, **kwargs)
+
+# Main execution: harvest on every attached device in parallel
+def main():
+    with package_queue.open_queue() as queue:
+        # Claims left behind by a crashed run go back to the queue
+        queue.requeue_stale(max_age=adb_harvest.INSTALL_TIMEOUT * 2)
+        if not queue.counts().get(package_queue.PENDING):
+            print("No packages left in the queue")
+            return
+        harvest_queue(queue)
+        print(f"All packages processed: {queue.counts()}")
+
 if __name__ == "__main__":
     main()
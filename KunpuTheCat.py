@@ -1,49 +1,47 @@
-import json
-import webbrowser
-from requests_html import HTMLSession
-import time
-
-def duckduckgo_search(query):
-    session = HTMLSession()
-    url = f"https://html.duckduckgo.com/html/?q={query}"
-    response = session.get(url)
-
-    if response.status_code == 200:
-        links = response.html.xpath('//a[contains(@class, "result__a")]/@href')
-        if links:
-            first_link = links[0]
-            if first_link.startswith("/l/"):
-                first_link = "https://duckduckgo.com" + first_link
-            return first_link
-    return None
-
-# Read package names from JSON file
-with open("package_names.json", "r", encoding="utf-8") as file:
-    data = json.load(file)
-
-def save_package_names(package_names, filename="package_names.json"):
-    with open(filename, "w") as file:
-        json.dump({"packages": package_names}, file, indent=4)
-
-# Ensure the JSON contains the correct structure with the "packages" key
-if "packages" not in data:
-    print("Error: JSON should contain the 'packages' key.")
-    exit(1)
-
-# Iterate over each package name in the list
-for package_name in data["packages"]:
-    query = f"apkpure.com {package_name}"
-    first_result = duckduckgo_search(query)
-
-    if first_result:
-        download_url = first_result + "/downloading"
-        print(f"Opening download link for {package_name}: {download_url}")
-        webbrowser.open(download_url) 
-        time.sleep(1) 
-
-        # Remove the package name from the list after it's processed
-        data["packages"].remove(package_name)
-        save_package_names(data["packages"])
-
-    else:
-        print(f"No result found for {package_name}.")
+import link_resolver
+import package_queue
+
+LINKS_FILE = "download_links.txt"
+NO_SEARCH_RESULT = "no search result"
+
+def duckduckgo_search(query, resolver=None):
+    """First DuckDuckGo result for a query, using the resolver's pooled session and rate limit."""
+    owns_resolver = resolver is None
+    resolver = resolver or link_resolver.Resolver()
+    try:
+        return resolver.search(query)
+    finally:
+        if owns_resolver:
+            resolver.close()
+
+def resolve_queue(queue, resolver, links_path=LINKS_FILE):
+    """Resolve claimed packages to download links; unresolved ones go back to the shared queue."""
+    claims = iter(lambda: queue.claim("apkpure"), None)
+
+    def retried(package_name):
+        # Handed out again after a "no result" release: search again rather than answer from the cache
+        return queue.reason(package_name) == NO_SEARCH_RESULT
+
+    with open(links_path, "a", encoding="utf-8") as links:
+        for package_name, download_url, error in resolver.resolve_all(claims, refresh=retried):
+            if download_url:
+                # Download links are collected in a file instead of opening a browser tab each
+                links.write(f"{package_name}\t{download_url}\n")
+                links.flush()
+                queue.complete(package_name)
+                print(f"Resolved download link for {package_name}: {download_url}")
+            elif error:
+                print(f"Search failed for {package_name}: {error}")
+                queue.release(package_name, "search failed")
+            else:
+                # Released rather than skipped: the Play Store harvester shares the queue and may still get it
+                print(f"No result found for {package_name}.")
+                queue.release(package_name, NO_SEARCH_RESULT)
+
+def main():
+    # Packages come from the shared queue store, seeded from package_names.json on first use
+    with package_queue.open_queue() as queue, link_resolver.Resolver() as resolver:
+        resolve_queue(queue, resolver)
+
+if __name__ == "__main__":
+    main()
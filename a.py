@@ -5,15 +5,28 @@ import subprocess
 import xml.etree.ElementTree as ET
 from zipfile import ZipFile
 import math
-import chardet
-
-
-def detect_encoding(file_data):
-    """Detect the encoding of the given file data."""
-    result = chardet.detect(file_data)
-    encoding = result['encoding']
-    confidence = result['confidence']
-    print(f"Detected encoding: {encoding} with confidence: {confidence}")
+import apksig
+import axml
+import baseline
+import containers
+import elf_entropy
+import encoding_detect
+import filetype
+import overlay
+import pattern_scan
+import rules
+import stego_image
+import zip_layout
+
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
+
+
+def detect_encoding(file_data, file_name=None):
+    """Detect the encoding of the given file data from a bounded prefix."""
+    encoding = encoding_detect.detect_encoding(file_data)
+    if encoding is not None:
+        print(f"Detected encoding of {file_name}: {encoding}")
     return encoding
 
 # 1. Calculate Entropy
@@ -36,26 +49,25 @@ def calculate_entropy(data):
 
 # 2. Certificate Obfuscation Detection and Steganography
 def get_certificate_fingerprint(apk_path):
-    with ZipFile(apk_path) as zip_file:
-        for file_name in zip_file.namelist():
-            if file_name.lower().endswith('cert') or file_name.lower().endswith('sf'):
-                cert_data = zip_file.read(file_name)
-                cert_hash = hashlib.sha256(cert_data).hexdigest()
-                print(f"Certificate fingerprint: {cert_hash}")
-                # Calculate entropy of certificate data
-                cert_entropy = calculate_entropy(cert_data)
-                print(f"Certificate entropy: {cert_entropy}")
-                if cert_entropy > 7.5:
-                    print(f"Possible steganography detected in certificate due to high entropy!")
-                return cert_hash
-    return None
+    try:
+        signers = apksig.get_signer_certificates(apk_path)
+    except (apksig.ApkSignatureError, zip_layout.ZipLayoutError) as e:
+        print(f"Error parsing APK signatures: {e}")
+        return None
+    for scheme, certificates in signers.items():
+        for cert in certificates:
+            print(f"{scheme} signer: {cert['subject']}, SHA-256: {cert['sha256']}")
+    if apksig.schemes_disagree(signers):
+        print("Signature schemes disagree on the signer!")
+    signer = apksig.primary_signer(signers)
+    return signer['sha256'] if signer else None
 
 
 def detect_obfuscated_certificate_fingerprint(cert_data):
     """Detect obfuscation in certificate data by checking patterns and entropy."""
     cert_entropy = calculate_entropy(cert_data)
     print(f"Certificate data entropy for obfuscation detection: {cert_entropy}")
-    if cert_entropy > 7.5:
+    if profile.is_anomalous("CERT.RSA", cert_entropy):
         print(f"Obfuscation detected in certificate due to high entropy!")
     return cert_entropy
 
@@ -76,11 +88,10 @@ def extract_manifest(apk_path):
             if file_name.lower() == 'androidmanifest.xml':
                 manifest_data = zip_file.read(file_name)
                 try:
-                    # Ensure the manifest is in a valid XML format
-                    manifest_data = manifest_data.decode('utf-8')  # Decode the byte data to string
-                    return manifest_data
-                except UnicodeDecodeError:
-                    print(f"Error decoding {file_name}. It may not be a valid UTF-8 file.")
+                    # APK manifests are binary AXML; decode them to XML text
+                    return axml.decode_xml(manifest_data)
+                except (axml.AXMLError, UnicodeDecodeError) as e:
+                    print(f"Error decoding {file_name}: {e}")
                     return None
     return None
 
@@ -93,7 +104,7 @@ def detect_obfuscated_manifest(manifest_data):
     manifest_entropy = calculate_entropy(manifest_data.encode('utf-8'))  # Encode back to bytes for entropy calculation
     print(f"Manifest entropy: {manifest_entropy}")
     
-    if manifest_entropy > 7.5:
+    if profile.is_anomalous("AndroidManifest.xml", manifest_entropy):
         print(f"Possible steganography detected in manifest due to high entropy!")
 
     try:
@@ -101,24 +112,15 @@ def detect_obfuscated_manifest(manifest_data):
         root = tree.getroot()
         obfuscated = False
 
-        # Check for suspicious patterns in standard Android components
-        suspicious_patterns = ['a', 'b', 'c', 'x', 'y', 'z', '1234', 'random']
+        # Score component, application and permission names against the configured rules
+        manifest_rules = rules.load_rules()
         for elem in root.iter():
-            if elem.tag in ['activity', 'service', 'receiver', 'provider']:
-                component_name = elem.attrib.get('name')
-                if component_name and any(pattern in component_name for pattern in suspicious_patterns):
-                    obfuscated = True
-                    print(f"Suspicious {elem.tag} detected: {component_name}")
-            if elem.tag == 'application':
-                app_name = elem.attrib.get('name')
-                if app_name and any(pattern in app_name for pattern in suspicious_patterns):
-                    obfuscated = True
-                    print(f"Suspicious application name: {app_name}")
-            if elem.tag == 'uses-permission':
-                permission_name = elem.attrib.get('android:name')
-                if permission_name and any(pattern in permission_name for pattern in suspicious_patterns):
-                    obfuscated = True
-                    print(f"Suspicious permission detected: {permission_name}")
+            name = elem.attrib.get(axml.ANDROID_NAME)
+            if not name or elem.tag not in axml.COMPONENT_TAGS + ('application', 'uses-permission'):
+                continue
+            if manifest_rules.is_obfuscated_name(name):
+                obfuscated = True
+                print(f"Suspicious {elem.tag} name detected: {name} (score {manifest_rules.name_score(name):.2f})")
 
         print(f"Obfuscated Manifest Detected: {obfuscated}")
         return obfuscated
@@ -146,10 +148,10 @@ def detect_obfuscated_code(java_code_folder):
                     content = f.read()
                     file_entropy = calculate_entropy(content)
                     print(f"Entropy of {file}: {file_entropy}")
-                    if file_entropy > 7.5:  # High entropy could indicate obfuscation
+                    if profile.is_anomalous(file, file_entropy):  # High entropy could indicate obfuscation
                         obfuscated = True
                         print(f"Obfuscation detected in file: {file}")
-                    if file_entropy > 7.5:
+                    if profile.is_anomalous(file, file_entropy):
                         print(f"Possible steganography detected in Java code due to high entropy!")
     return obfuscated
 
@@ -170,18 +172,18 @@ def decompile_dex_to_java(apk_path):
 # 5. Media File Obfuscation with Steganography Detection
 def detect_media_obfuscation(apk_path):
     with ZipFile(apk_path) as zip_file:
-        for file_name in zip_file.namelist():
-            if file_name.lower().endswith(('.mp3', '.mp4', '.ogg')):
-                media_data = zip_file.read(file_name)
-                media_entropy = calculate_entropy(media_data)
-                print(f"Entropy of media file {file_name}: {media_entropy}")
-                if media_entropy > 7.5:
-                    print(f"Possible steganography detected in media due to high entropy!")
-                try:
-                    base64.b64decode(media_data)
-                    print(f"Base64 obfuscation detected in media file: {file_name}")
-                except:
-                    pass
+        for info, _ in filetype.iter_classified_entries(zip_file, filetype.MEDIA_TYPES):
+            file_name = info.filename
+            media_data = zip_file.read(info)
+            media_entropy = calculate_entropy(media_data)
+            print(f"Entropy of media file {file_name}: {media_entropy}")
+            if profile.is_anomalous(file_name, media_entropy):
+                print(f"Possible steganography detected in media due to high entropy!")
+            try:
+                base64.b64decode(media_data)
+                print(f"Base64 obfuscation detected in media file: {file_name}")
+            except:
+                pass
     return False
 
 
@@ -193,10 +195,7 @@ def detect_steganography_media(apk_path):
 
 # 6. Permission Analysis and Steganography Detection
 def analyze_permissions(apk_path):
-    suspicious_permissions = [
-        'ACCESS_FINE_LOCATION', 'READ_SMS', 'WRITE_SMS', 'INTERNET', 
-        'ACCESS_COARSE_LOCATION', 'READ_CONTACTS', 'SEND_SMS', 'WRITE_EXTERNAL_STORAGE'
-    ]
+    permission_rules = rules.load_rules()
     manifest_data = extract_manifest(apk_path)
     if manifest_data is None:
         return False
@@ -204,7 +203,7 @@ def analyze_permissions(apk_path):
     manifest_entropy = calculate_entropy(manifest_data)
     print(f"Manifest entropy: {manifest_entropy}")
 
-    if manifest_entropy > 7.5:
+    if profile.is_anomalous("AndroidManifest.xml", manifest_entropy):
         print(f"Possible steganography detected in permissions due to high entropy!")
 
     tree = ET.ElementTree(ET.fromstring(manifest_data))
@@ -212,9 +211,9 @@ def analyze_permissions(apk_path):
 
     obfuscated = False
     for elem in root.iter('uses-permission'):
-        permission_name = elem.attrib.get('android:name')
+        permission_name = elem.attrib.get(axml.ANDROID_NAME)
         if permission_name:
-            if any(perm in permission_name for perm in suspicious_permissions):
+            if permission_rules.suspicious_permission(permission_name):
                 print(f"Suspicious permission found: {permission_name}")
                 obfuscated = True
     return obfuscated
@@ -233,7 +232,7 @@ def extract_file_hashes(apk_path):
             file_data = zip_file.read(file_name)
             file_entropy = calculate_entropy(file_data)
             print(f"Entropy of file {file_name}: {file_entropy}")
-            if file_entropy > 7.5:
+            if profile.is_anomalous(file_name, file_entropy):
                 print(f"Possible steganography detected in file {file_name} due to high entropy!")
             file_hash = hashlib.sha256(file_data).hexdigest()
             print(f"File: {file_name}, Hash: {file_hash}")
@@ -247,16 +246,18 @@ def detect_steganography_file_hashes(apk_path):
 
 
 # 8. APK File Analysis for Obfuscation using Entropy and Steganography
-def analyze_apk_files(apk_path):
+def analyze_apk_files(apk_path, encoding_detector=None):
+    """Entropy scan of every entry. Pass e.g. detect_encoding as encoding_detector to opt in."""
     with ZipFile(apk_path) as zip_file:
         for file_name in zip_file.namelist():
             file_data = zip_file.read(file_name)
             file_entropy = calculate_entropy(file_data)
             print(f"Entropy of {file_name}: {file_entropy}")
-            if file_entropy > 7.5:
+            if profile.is_anomalous(file_name, file_entropy):
                 print(f"Possible steganography detected in APK file {file_name} due to high entropy!")
             analyze_file_for_obfuscation(file_data, file_name)
-            detect_encoding(file_data)
+            if encoding_detector is not None:
+                encoding_detector(file_data, file_name)
 
 
 
@@ -276,41 +277,104 @@ def detect_smali_obfuscation(apk_path):
                     content = f.read()
                     file_entropy = calculate_entropy(content)
                     print(f"Entropy of smali file {file}: {file_entropy}")
-                    if file_entropy > 7.5:  # High entropy could indicate obfuscation
+                    if profile.is_anomalous(file, file_entropy):  # High entropy could indicate obfuscation
                         obfuscated = True
                         print(f"Obfuscation detected in smali file: {file}")
-                    if file_entropy > 7.5:
+                    if profile.is_anomalous(file, file_entropy):
                         print(f"Possible steganography detected in smali file due to high entropy!")
     return obfuscated
 
 def analyze_file_for_obfuscation(file_data, file_name):
     """Analyze a file for obfuscation patterns."""
-    obfuscation_patterns = ['a', 'b', 'c', 'x', 'y', 'z']  # List of common patterns to check
     file_entropy = calculate_entropy(file_data)
     print(f"Entropy of {file_name}: {file_entropy}")
     
     # Check if file entropy is high (which could indicate obfuscation)
-    if file_entropy > 7.5:
+    if profile.is_anomalous(file_name, file_entropy):
         print(f"Possible obfuscation detected in {file_name} due to high entropy!")
     
-    # Check for suspicious patterns in the file content
-    if any(pattern in str(file_data) for pattern in obfuscation_patterns):
-        print(f"Suspicious pattern found in {file_name}!")
+    # Check for suspicious byte patterns directly in the buffer, without a string copy
+    for pattern, match in pattern_scan.load_scanner().scan(file_data).items():
+        if match['count']:
+            print(f"Suspicious pattern {pattern.decode()} found {match['count']} times in {file_name} "
+                  f"(first at offset {match['offsets'][0]})")
+
+
+ASSET_TYPES = filetype.IMAGE_TYPES | {'xml', 'axml', 'json'}
 
 
 def analyze_assets(apk_path):
     with ZipFile(apk_path) as zip_file:
-        for file_name in zip_file.namelist():
+        for info, file_type in filetype.iter_classified_entries(zip_file):
+            file_name = info.filename
+            # Payloads renamed to look like assets (e.g. a DEX saved as .png)
+            disguised = filetype.is_disguised(file_name, file_type)
+            if disguised:
+                print(f"Asset {file_name} is actually {file_type} content!")
             # Check if the file is an asset (like images, XML files, etc.)
-            if file_name.lower().endswith(('.png', '.jpg', '.xml', '.json')):
-                file_data = zip_file.read(file_name)
+            if disguised or file_type in ASSET_TYPES:
+                file_data = zip_file.read(info)
                 file_entropy = calculate_entropy(file_data)
                 print(f"Entropy of asset {file_name}: {file_entropy}")
-                if file_entropy > 7.5:
+                if profile.is_anomalous(file_name, file_entropy):
                     print(f"Possible steganography detected in asset {file_name} due to high entropy!")
 
 
 
+def detect_steganography_images(apk_path):
+    """Detect LSB payloads and appended data in PNG/JPEG entries."""
+    print("Detecting steganography in images...")
+    for result in stego_image.analyze_images(apk_path):
+        if result.get('error'):
+            print(f"Could not analyze image {result['file']}: {result['error']}")
+        if result['flag']:
+            print(f"Possible steganography detected in image {result['file']}: "
+                  f"trailing bytes={result['trailing_bytes']}, "
+                  f"chi-square p={result['chi_square_p']}, RS rate={result['rs_rate']}")
+
+
+def detect_overlays(apk_path):
+    """Detect data hidden outside the zip entries (prepended, in gaps, after EOCD, in the signing block)."""
+    print("Detecting overlay data...")
+    try:
+        regions = overlay.scan_apk_overlays(apk_path)
+    except overlay.zip_layout.ZipLayoutError as e:
+        print(f"Error parsing zip structure: {e}")
+        return False
+    suspicious = False
+    for region in regions:
+        if overlay.is_suspicious(region):
+            suspicious = True
+            print(f"Possible hidden data ({region['kind']}) at offset {region['offset']}, "
+                  f"{region['size']} bytes, entropy: {region['entropy']}")
+    return suspicious
+
+
+def detect_native_library_obfuscation(apk_path):
+    """Detect packed or unusual sections in the APK's native libraries."""
+    print("Analyzing native libraries...")
+    obfuscated = False
+    for file_name, report in elf_entropy.analyze_apk_libraries(apk_path).items():
+        for section in report.get('sections', []):
+            print(f"Entropy of {file_name} section {section['name']}: {section['entropy']}")
+        if report['flags']:
+            obfuscated = True
+            print(f"Suspicious native library {file_name}: {', '.join(report['flags'])}")
+    return obfuscated
+
+
+def detect_nested_apks(apk_path):
+    """Detect APKs hidden inside the APK (droppers ship their payload in assets)."""
+    print("Detecting nested APKs...")
+    errors = []
+    nested = [member.path for member in containers.iter_apks(apk_path, errors) if member.in_apk]
+    for path in nested:
+        print(f"Nested APK found: {path}")
+    for chain, reason in errors:
+        print(f"Skipped nested archive {'!/'.join(chain)}: {reason}")
+    return bool(nested or errors)
+
+
 def detect_steganography_smali(apk_path):
     """Detect steganography in APK's smali code."""
     print("Detecting steganography in smali code...")
@@ -332,6 +396,7 @@ if __name__ == '__main__':
 
     # 4. Resources and Assets Analysis
     analyze_assets(apk_path)
+    detect_steganography_images(apk_path)
 
     # 5. Media File Obfuscation
     detect_steganography_media(apk_path)
@@ -339,10 +404,19 @@ if __name__ == '__main__':
     # 6. Permission Analysis
     detect_steganography_permissions(apk_path)
 
-    # 7. Hash Extraction and Obfuscation Detection
+    # 7. Overlay Data Outside the Zip Entries
+    detect_overlays(apk_path)
+
+    # 8. Native Library Section Analysis
+    detect_native_library_obfuscation(apk_path)
+
+    # 9. Nested APKs and Archives
+    detect_nested_apks(apk_path)
+
+    # 10. Hash Extraction and Obfuscation Detection
     detect_steganography_file_hashes(apk_path)
 
-    # 8. APK File Analysis for Obfuscation using Entropy
+    # 11. APK File Analysis for Obfuscation using Entropy
     analyze_apk_files(apk_path)
     
     detect_steganography_smali(apk_path)
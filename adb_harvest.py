@@ -0,0 +1,287 @@
+import asyncio
+import itertools
+import os
+import shlex
+from asyncio.subprocess import PIPE, STDOUT
+
+import screen_state
+
+# Path of the adb executable; point ADB at a stand-in script to run the harvester without devices
+ADB = os.environ.get('ADB', 'adb')
+
+COMMAND_TIMEOUT = 60
+STORE_LOAD_TIMEOUT = 30
+INSTALL_TIMEOUT = 300
+PULL_QUEUE_SIZE = 2
+
+STORE_PACKAGE = 'com.android.vending'
+# Where the Install button sits on the devices we harvest with, tried in order
+INSTALL_TAPS = ((738, 1000), (738, 900), (738, 1072), (1125, 462))
+
+# _install reasons that may clear up on a later attempt; the others (system app, unavailable,
+# paid) are final
+STORE_NOT_OPENED = 'Play Store page did not open'
+INSTALL_TIMED_OUT = 'installation timed out'
+TRANSIENT_REASONS = frozenset((STORE_NOT_OPENED, INSTALL_TIMED_OUT))
+
+_markers = itertools.count()
+
+
+class AdbError(Exception):
+    """Raised when an adb command fails or a device session is lost."""
+
+
+async def run_adb(*args, adb=ADB, timeout=COMMAND_TIMEOUT):
+    """Run a one-off adb command and return its stdout."""
+    process = await asyncio.create_subprocess_exec(adb, *args, stdout=PIPE, stderr=PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise AdbError(f"adb {' '.join(args)} timed out")
+    if process.returncode != 0:
+        raise AdbError(f"adb {' '.join(args)} failed: {stderr.decode(errors='replace').strip()}")
+    return stdout
+
+
+async def list_devices(adb=ADB):
+    """Serials of the attached devices and emulators that are online."""
+    output = (await run_adb('devices', adb=adb)).decode(errors='replace')
+    return [line.split()[0] for line in output.splitlines()[1:] if line.strip().endswith('\tdevice')]
+
+
+class AdbShell:
+    """One long-lived `adb shell` process that runs commands sequentially.
+
+    Each command is followed by an echo of a unique marker and the exit status, so output
+    and status are read back without spawning a new adb process per command.
+    """
+
+    def __init__(self, serial, adb=ADB):
+        self.serial = serial
+        self.adb = adb
+        self.process = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            self.adb, '-s', self.serial, 'shell', stdin=PIPE, stdout=PIPE, stderr=STDOUT
+        )
+
+    async def close(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        self.process = None
+
+    async def run(self, command, timeout=COMMAND_TIMEOUT):
+        """Return (exit status, output) of a shell command."""
+        async with self.lock:
+            if self.process is None or self.process.returncode is not None:
+                await self.start()
+            marker = f'__harvest_done_{next(_markers)}__'
+            self.process.stdin.write(f'{command}; echo "{marker} $?"\n'.encode())
+            try:
+                await self.process.stdin.drain()
+                return await asyncio.wait_for(self._read_until(marker), timeout)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                # The session is out of step with its output now; start a fresh one next time
+                await self.close()
+                raise AdbError(f"{self.serial}: '{command}' did not finish: {e!r}")
+
+    async def _read_until(self, marker):
+        lines = []
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise AdbError(f"{self.serial}: shell session closed")
+            text = line.decode(errors='replace').rstrip('\r\n')
+            if text.startswith(marker):
+                return int(text.split()[1]), '\n'.join(lines)
+            lines.append(text)
+
+    async def check(self, command, timeout=COMMAND_TIMEOUT):
+        """True when the command exits with status 0."""
+        status, _ = await self.run(command, timeout)
+        return status == 0
+
+    async def wait_until(self, condition, timeout):
+        """Wait on the device until condition succeeds; True if it did before the timeout.
+
+        The loop runs inside the shell, so waiting costs one round trip instead of a poll per second.
+        """
+        limit = int(timeout)
+        loop = f'i=0; while ! {{ {condition}; }}; do i=$((i+1)); [ $i -gt {limit} ] && break; sleep 1; done; [ $i -le {limit} ]'
+        return await self.check(loop, timeout + COMMAND_TIMEOUT)
+
+
+class Device:
+    """A device driven by two shell sessions: one for the Play Store UI, one for pulling and uninstalling."""
+
+    def __init__(self, serial, adb=ADB):
+        self.serial = serial
+        self.adb = adb
+        self.ui = AdbShell(serial, adb)
+        self.io = AdbShell(serial, adb)
+
+    async def close(self):
+        await self.ui.close()
+        await self.io.close()
+
+    async def screenshot(self):
+        """PNG bytes of the current screen, streamed over exec-out instead of via /sdcard."""
+        return await run_adb('-s', self.serial, 'exec-out', 'screencap', '-p', adb=self.adb)
+
+    async def is_installed(self, shell, package_name):
+        return await shell.check(f'pm path {shlex.quote(package_name)} >/dev/null 2>&1')
+
+    async def is_system_app(self, package_name):
+        return await self.ui.check(f"dumpsys package {shlex.quote(package_name)} | grep -q 'pkgFlags=\\[ SYSTEM'")
+
+    async def apk_paths(self, package_name):
+        _, output = await self.io.run(f'pm path {shlex.quote(package_name)}')
+        return [line.replace('package:', '').strip() for line in output.splitlines() if line.startswith('package:')]
+
+    async def pull(self, remote_path, destination):
+        await run_adb('-s', self.serial, 'pull', remote_path, destination, adb=self.adb, timeout=INSTALL_TIMEOUT)
+
+    async def uninstall(self, package_name):
+        return await self.io.check(f'pm uninstall {shlex.quote(package_name)}')
+
+
+async def ocr_screen_check(device, package_name):
+    """Reason to skip the app read off the Play Store page ('unavailable' or 'paid'), or None."""
+    return await screen_state.check_device_async(device.serial, device.adb)
+
+
+class Harvester:
+    """Installs packages from the Play Store, pulls their APKs and uninstalls them on every device.
+
+    Each device runs an installer and a puller: while one package's APKs are pulled and the
+    app removed, the next package is already being installed. Devices share one package queue,
+    so throughput grows with the number of attached devices.
+
+    on_skip is called for packages that can never be harvested, on_retry for transient failures
+    (adb errors, failed pulls, timeouts) that are worth another attempt later.
+    """
+
+    def __init__(self, backup_dir, adb=ADB, screen_check=ocr_screen_check, on_done=None, on_skip=None,
+                 on_retry=None, install_timeout=INSTALL_TIMEOUT):
+        self.backup_dir = backup_dir
+        self.adb = adb
+        self.screen_check = screen_check
+        self.on_done = on_done or (lambda package_name, paths: None)
+        self.on_skip = on_skip or (lambda package_name, reason: None)
+        self.on_retry = on_retry or (lambda package_name, reason: None)
+        self.install_timeout = install_timeout
+
+    async def run(self, packages, serials=None):
+        """Harvest a list of package names, or a store with claim(owner) such as package_queue.PackageQueue."""
+        serials = serials or await list_devices(self.adb)
+        if not serials:
+            raise AdbError("No devices attached")
+        if not hasattr(packages, 'claim'):
+            packages = _ListSource(packages)
+        devices = [Device(serial, self.adb) for serial in serials]
+        try:
+            await asyncio.gather(*(self._drive(device, packages) for device in devices))
+        finally:
+            for device in devices:
+                await device.close()
+
+    async def _drive(self, device, packages):
+        pulls = asyncio.Queue(PULL_QUEUE_SIZE)
+        puller = asyncio.create_task(self._puller(device, pulls))
+        try:
+            while True:
+                package_name = packages.claim(device.serial)
+                if package_name is None:
+                    break
+                try:
+                    reason = await self._install(device, package_name)
+                except AdbError as e:
+                    print(f"[{device.serial}] Will retry {package_name}: {e}")
+                    self.on_retry(package_name, str(e))
+                    continue
+                if reason is None:
+                    await pulls.put(package_name)
+                elif reason in TRANSIENT_REASONS:
+                    print(f"[{device.serial}] Will retry {package_name}: {reason}")
+                    self.on_retry(package_name, reason)
+                else:
+                    print(f"[{device.serial}] Skipping {package_name}: {reason}")
+                    self.on_skip(package_name, reason)
+        finally:
+            await pulls.put(None)
+            await puller
+
+    async def _install(self, device, package_name):
+        """Install one package; return None on success or the reason it was skipped."""
+        if await device.is_installed(device.ui, package_name):
+            print(f"[{device.serial}] {package_name} is already installed.")
+            return None
+        if await device.is_system_app(package_name):
+            return 'system app'
+
+        print(f"[{device.serial}] Opening Play Store for {package_name}...")
+        await device.ui.run(f'am start -a android.intent.action.VIEW -d {shlex.quote("market://details?id=" + package_name)}')
+        loaded = await device.ui.wait_until(
+            f"dumpsys window | grep mCurrentFocus | grep -q {STORE_PACKAGE}", STORE_LOAD_TIMEOUT
+        )
+        if not loaded:
+            return STORE_NOT_OPENED
+
+        if self.screen_check is not None:
+            reason = await self.screen_check(device, package_name)
+            if reason:
+                return reason
+
+        for x, y in INSTALL_TAPS:
+            await device.ui.run(f'input tap {x} {y}')
+        installed = await device.ui.wait_until(
+            f'pm path {shlex.quote(package_name)} >/dev/null 2>&1', self.install_timeout
+        )
+        if not installed:
+            await device.uninstall(package_name)
+            return INSTALL_TIMED_OUT
+        print(f"[{device.serial}] App {package_name} installed successfully.")
+        return None
+
+    async def _puller(self, device, pulls):
+        while True:
+            package_name = await pulls.get()
+            if package_name is None:
+                return
+            try:
+                destinations = []
+                for apk_path in await device.apk_paths(package_name):
+                    destination = os.path.join(self.backup_dir, f"{package_name}-{os.path.basename(apk_path)}")
+                    await device.pull(apk_path, destination)
+                    destinations.append(destination)
+                await device.uninstall(package_name)
+            except AdbError as e:
+                print(f"[{device.serial}] Failed to pull {package_name}, will retry: {e}")
+                self.on_retry(package_name, str(e))
+                continue
+            print(f"[{device.serial}] {package_name} saved to {', '.join(destinations)}")
+            self.on_done(package_name, destinations)
+
+
+class _ListSource:
+    """Hands out the names of a plain list, one claim at a time."""
+
+    def __init__(self, package_names):
+        self.package_names = iter(list(package_names))
+
+    def claim(self, owner):
+        return next(self.package_names, None)
+
+
+def harvest(packages, backup_dir, serials=None, **kwargs):
+    """Run a Harvester over packages on the given (default: all attached) devices."""
+    asyncio.run(Harvester(backup_dir, **kwargs).run(packages, serials))
@@ -4,6 +4,8 @@ import numpy as np
 import cv2
 from androguard.core.bytecodes.apk import APK
 
+import dataset_split
+
 def get_package_name(apk_path):
     """
     Extract the package name from the APK.
@@ -30,9 +32,10 @@ def extract_apk(apk_path, output_dir):
     
     return dex_files
 
-def visualize_dex_as_bitmap(dex_path, output_image_path):
+def visualize_dex_as_bitmap(dex_path, output_image_path, package_name=None):
     """
     Visualize the binary content of the DEX file as a bitmap.
+    The package name, when known, is recorded in the PNG for dataset_split.
     """
     with open(dex_path, 'rb') as file:
         dex_data = file.read()
@@ -44,7 +47,10 @@ def visualize_dex_as_bitmap(dex_path, output_image_path):
     byte_data = np.pad(byte_data, (0, side_length**2 - size), 'constant')
     byte_data = np.reshape(byte_data, (side_length, side_length))
 
-    cv2.imwrite(output_image_path, byte_data)
+    if package_name:
+        dataset_split.write_sample_png(byte_data, output_image_path, package_name)
+    else:
+        cv2.imwrite(output_image_path, byte_data)
     print(f"Saved: {output_image_path}")
 
 def process_apks_in_folder(apk_folder, output_folder):
@@ -67,7 +73,7 @@ def process_apks_in_folder(apk_folder, output_folder):
         for i, dex_file in enumerate(dex_files, start=1):
             dex_path = os.path.join(output_dir, dex_file)
             image_output_path = os.path.join(output_dir, f"{package_name}_dex{i}.png")
-            visualize_dex_as_bitmap(dex_path, image_output_path)
+            visualize_dex_as_bitmap(dex_path, image_output_path, package_name)
 
 if __name__ == "__main__":
     apk_folder = 'benign_apks'
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import mmap
+import struct
+
+import filetype
+import zip_layout
+
+SCHEME_BLOCK_IDS = (
+    ('v3.1', zip_layout.V31_BLOCK_ID),
+    ('v3', zip_layout.V3_BLOCK_ID),
+    ('v2', zip_layout.V2_BLOCK_ID),
+)
+
+# v3 signer attribute holding the proof-of-rotation lineage of the signing key
+PROOF_OF_ROTATION_ATTR_ID = 0x3BA06F8C
+SCHEME_ORDER = ('v1', 'v2', 'v3', 'v3.1')
+
+# Attribute OIDs rendered in certificate names
+NAME_OIDS = {
+    b'\x55\x04\x03': 'CN',
+    b'\x55\x04\x06': 'C',
+    b'\x55\x04\x07': 'L',
+    b'\x55\x04\x08': 'ST',
+    b'\x55\x04\x0a': 'O',
+    b'\x55\x04\x0b': 'OU',
+}
+
+# Per-certificate results, keyed by SHA-256 of the DER certificate
+_certificate_cache = {}
+
+
+class ApkSignatureError(Exception):
+    """Raised when a signature block cannot be parsed."""
+
+
+# 1. Minimal DER reader
+def _der_element(buf, offset, end):
+    """Return (tag, content offset, content end) of the DER element at offset."""
+    if offset + 2 > end:
+        raise ApkSignatureError(f"Truncated DER element at {offset}")
+    tag = buf[offset]
+    length = buf[offset + 1]
+    offset += 2
+    if length & 0x80:
+        count = length & 0x7F
+        if count == 0 or count > 4:
+            raise ApkSignatureError("Indefinite or oversized DER length")
+        length = int.from_bytes(buf[offset:offset + count], 'big')
+        offset += count
+    if offset + length > end:
+        raise ApkSignatureError(f"DER element at {offset} runs past its parent")
+    return tag, offset, offset + length
+
+
+def _der_children(buf, start, end):
+    """Yield (tag, element start, content offset, content end) of each child element."""
+    offset = start
+    while offset < end:
+        tag, content, content_end = _der_element(buf, offset, end)
+        yield tag, offset, content, content_end
+        offset = content_end
+
+
+def pkcs7_certificates(der):
+    """Return the DER certificates embedded in a PKCS#7 SignedData blob (META-INF/*.RSA|DSA|EC)."""
+    _, content, end = _der_element(der, 0, len(der))
+    children = list(_der_children(der, content, end))
+    if len(children) < 2 or children[1][0] != 0xA0:
+        raise ApkSignatureError("Not a PKCS#7 ContentInfo")
+    _, signed_data, signed_end = _der_element(der, children[1][2], children[1][3])
+    for tag, _, cert_content, cert_end in _der_children(der, signed_data, signed_end):
+        if tag == 0xA0:  # [0] IMPLICIT certificates
+            return [bytes(der[start:stop]) for _, start, _, stop in _der_children(der, cert_content, cert_end)]
+    return []
+
+
+def _name_string(der, start, end):
+    parts = []
+    for _, _, rdn, rdn_end in _der_children(der, start, end):
+        for _, _, attribute, attribute_end in _der_children(der, rdn, rdn_end):
+            (_, _, oid, oid_end), (_, _, value, value_end) = list(_der_children(der, attribute, attribute_end))[:2]
+            label = NAME_OIDS.get(bytes(der[oid:oid_end]))
+            if label:
+                parts.append(f"{label}={bytes(der[value:value_end]).decode('utf-8', errors='replace')}")
+    return ', '.join(parts)
+
+
+def certificate_info(cert_der):
+    """Digests plus subject/issuer of an X.509 certificate, cached per certificate."""
+    digest = hashlib.sha256(cert_der).hexdigest()
+    info = _certificate_cache.get(digest)
+    if info is not None:
+        return info
+
+    info = {'sha256': digest, 'sha1': hashlib.sha1(cert_der).hexdigest(), 'subject': None, 'issuer': None}
+    try:
+        _, content, end = _der_element(cert_der, 0, len(cert_der))
+        _, _, tbs, tbs_end = next(_der_children(cert_der, content, end))
+        fields = list(_der_children(cert_der, tbs, tbs_end))
+        if fields and fields[0][0] == 0xA0:  # explicit version
+            fields = fields[1:]
+        # serialNumber, signature, issuer, validity, subject
+        info['issuer'] = _name_string(cert_der, fields[2][2], fields[2][3])
+        info['subject'] = _name_string(cert_der, fields[4][2], fields[4][3])
+    except (ApkSignatureError, IndexError, StopIteration, ValueError):
+        pass
+    _certificate_cache[digest] = info
+    return info
+
+
+# 2. APK Signature Scheme v2/v3 blocks
+def _length_prefixed(buf, start, end):
+    """Yield (start, end) of each uint32-length-prefixed item between start and end."""
+    offset = start
+    while offset < end:
+        if offset + 4 > end:
+            raise ApkSignatureError(f"Truncated length prefix at {offset}")
+        (size,) = struct.unpack_from('<I', buf, offset)
+        offset += 4
+        if offset + size > end:
+            raise ApkSignatureError(f"Length-prefixed item at {offset} runs past its parent")
+        yield offset, offset + size
+        offset += size
+
+
+def _first(items):
+    for item in items:
+        return item
+    raise ApkSignatureError("Empty length-prefixed sequence")
+
+
+def _uint32(buf, offset, end):
+    if offset + 4 > end:
+        raise ApkSignatureError(f"Truncated uint32 at {offset}")
+    return struct.unpack_from('<I', buf, offset)[0]
+
+
+def lineage_certificates(buf, start, end):
+    """Return the DER certificates of a proof-of-rotation lineage, oldest first."""
+    _uint32(buf, start, end)  # lineage version
+    certificates = []
+    for node_start, node_end in _length_prefixed(buf, start + 4, end):
+        signed_start, signed_end = _first(_length_prefixed(buf, node_start, node_end))
+        cert_start, cert_end = _first(_length_prefixed(buf, signed_start, signed_end))
+        certificates.append(bytes(buf[cert_start:cert_end]))
+    return certificates
+
+
+def scheme_signers(buf, value_offset, value_size, v3=False):
+    """Return (certificates, lineage) per signer of a v2/v3 signature scheme block value.
+
+    Both are lists of DER certificates; the lineage is only read from v3/v3.1 signers and is
+    empty when the signer carries no proof-of-rotation attribute.
+    """
+    signers = []
+    signers_start, signers_end = _first(_length_prefixed(buf, value_offset, value_offset + value_size))
+    for signer_start, signer_end in _length_prefixed(buf, signers_start, signers_end):
+        signed_start, signed_end = _first(_length_prefixed(buf, signer_start, signer_end))
+        sections = _length_prefixed(buf, signed_start, signed_end)
+        next(sections)  # digests
+        certs_start, certs_end = next(sections)
+        certificates = [bytes(buf[start:stop]) for start, stop in _length_prefixed(buf, certs_start, certs_end)]
+        lineage = []
+        if v3:
+            # certificates are followed by minSdk, maxSdk and the additional attributes
+            attributes_offset = certs_end + 8
+            if attributes_offset < signed_end:
+                attributes_start, attributes_end = _first(_length_prefixed(buf, attributes_offset, signed_end))
+                for attribute_start, attribute_end in _length_prefixed(buf, attributes_start, attributes_end):
+                    if _uint32(buf, attribute_start, attribute_end) == PROOF_OF_ROTATION_ATTR_ID:
+                        lineage = lineage_certificates(buf, attribute_start + 4, attribute_end)
+        signers.append((certificates, lineage))
+    return signers
+
+
+def scheme_certificates(buf, value_offset, value_size):
+    """Return the signer certificates (DER) of a v2/v3 signature scheme block value."""
+    return [cert for certificates, _ in scheme_signers(buf, value_offset, value_size) for cert in certificates]
+
+
+# 3. Whole-APK view
+def _with_lineage(info, lineage):
+    if not lineage:
+        return info
+    # certificate_info results are shared through the cache, so attach the lineage to a copy
+    return dict(info, lineage=[certificate_info(cert)['sha256'] for cert in lineage])
+
+
+def signer_certificates(buf):
+    """Return {scheme: [certificate info]} for the v1 PKCS#7 blocks and the v2/v3 signing block."""
+    cd_offset, cd_size, shift = zip_layout.find_central_directory(buf)
+    signers = {}
+
+    block = zip_layout.find_signing_block(buf, cd_offset)
+    if block is not None:
+        pairs = {pair_id: (offset, size) for pair_id, offset, size in zip_layout.iter_signing_block_pairs(buf, *block)}
+        for scheme, block_id in SCHEME_BLOCK_IDS:
+            if block_id in pairs:
+                signers[scheme] = [
+                    _with_lineage(certificate_info(cert), lineage)
+                    for certificates, lineage in scheme_signers(buf, *pairs[block_id], v3=scheme != 'v2')
+                    for cert in certificates
+                ]
+
+    v1 = []
+    for name, local_offset, compressed_size, method in zip_layout.iter_central_directory(buf, cd_offset, cd_size):
+        if not name.upper().startswith('META-INF/'):
+            continue
+        data = zip_layout.read_entry(buf, local_offset + shift, compressed_size, method)
+        if filetype.classify_bytes(data[:filetype.HEAD_SIZE]) == 'pkcs7':
+            v1.extend(certificate_info(cert) for cert in pkcs7_certificates(data))
+    if v1:
+        signers['v1'] = v1
+    return signers
+
+
+def get_signer_certificates(apk_path):
+    """Map the APK once and return its signer certificates per scheme."""
+    with open(apk_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return signer_certificates(buf)
+
+
+def signer_digests(signers):
+    """Set of certificate SHA-256 digests across all schemes."""
+    return {info['sha256'] for infos in signers.values() for info in infos}
+
+
+def schemes_disagree(signers):
+    """True when signature schemes name different signers and key rotation does not explain it.
+
+    v1 and v2 must name the same signers. A rotated key legitimately signs v1/v2 with the old
+    key and v3/v3.1 with the new one, so a newer v3 scheme may name another signer as long as
+    the older scheme's signers appear in its proof-of-rotation lineage.
+    """
+    present = [scheme for scheme in SCHEME_ORDER if signers.get(scheme)]
+    for older, newer in zip(present, present[1:]):
+        old_digests = {info['sha256'] for info in signers[older]}
+        new_digests = {info['sha256'] for info in signers[newer]}
+        if old_digests == new_digests:
+            continue
+        lineage = {digest for info in signers[newer] for digest in info.get('lineage', ())}
+        if newer == 'v2' or not old_digests <= lineage:
+            return True
+    return False
+
+
+def primary_signer(signers):
+    """Certificate info of the newest scheme's first signer, or None for unsigned APKs."""
+    for scheme in ('v3.1', 'v3', 'v2', 'v1'):
+        if signers.get(scheme):
+            return signers[scheme][0]
+    return None
+
+
+# 4. Signer grouping across the corpus
+class SignerIndex:
+    """Maps signer certificate digests to the apps they signed."""
+
+    def __init__(self):
+        self.apps_by_signer = {}
+
+    def add(self, app, signers):
+        for digest in signer_digests(signers):
+            self.apps_by_signer.setdefault(digest, set()).add(app)
+
+    def apps_signed_by(self, digest):
+        return self.apps_by_signer.get(digest, set())
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({digest: sorted(apps) for digest, apps in self.apps_by_signer.items()}, file)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path, 'r', encoding='utf-8') as file:
+            index.apps_by_signer = {digest: set(apps) for digest, apps in json.load(file).items()}
+        return index
@@ -0,0 +1,146 @@
+import hashlib
+import mmap
+import xml.etree.ElementTree as ET
+import zlib
+from collections import namedtuple
+
+import apksig
+import axml
+import filetype
+import zip_layout
+from entropy import calculate_entropy
+
+MANIFEST_NAME = 'AndroidManifest.xml'
+# Compressed bytes inflated to classify an entry; enough for filetype.HEAD_SIZE bytes of output
+HEAD_PEEK_SIZE = 4096
+
+# local_offset already includes the shift of data prepended to the archive
+Entry = namedtuple('Entry', 'name local_offset compressed_size method')
+
+
+class Archive:
+    """One APK mapped once and shared by every detector of a scan.
+
+    The central directory is parsed on open; entry data, the decoded manifest, the signer
+    certificates and the content digest are computed on first use and kept, so detectors
+    asking for the same thing do not repeat the work. `cache` holds results detectors share
+    with each other (e.g. method entropies used by both the methods and StagNet detectors).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cache = {}
+        self._file = None
+        self.buf = None
+        self.entries = []
+        self._data = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        self._file = open(self.path, 'rb')
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        cd_offset, cd_size, shift = zip_layout.find_central_directory(self.buf)
+        self.entries = [
+            Entry(name, local_offset + shift, compressed_size, method)
+            for name, local_offset, compressed_size, method
+            in zip_layout.iter_central_directory(self.buf, cd_offset, cd_size)
+            if not name.endswith('/')
+        ]
+        self._by_name = {entry.name: entry for entry in self.entries}
+
+    def close(self):
+        self._data.clear()
+        self.cache.clear()
+        if self.buf is not None:
+            self.buf.close()
+        if self._file is not None:
+            self._file.close()
+        self.buf = self._file = None
+
+    def read(self, name):
+        """Uncompressed data of an entry, decompressed once per scan."""
+        if name not in self._data:
+            entry = self._by_name[name]
+            self._data[name] = zip_layout.read_entry(self.buf, entry.local_offset, entry.compressed_size, entry.method)
+        return self._data[name]
+
+    def release(self, name):
+        """Drop an entry's data once every detector has seen it."""
+        self._data.pop(name, None)
+
+    def cached(self, key, compute):
+        """compute() once per scan under key; for results detectors share."""
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    @property
+    def digest(self):
+        return self.cached('digest', lambda: hashlib.sha256(self.buf).hexdigest())
+
+    @property
+    def manifest_xml(self):
+        """Decoded manifest text, or None when it is missing or undecodable."""
+        def decode():
+            if MANIFEST_NAME not in self._by_name:
+                return None
+            try:
+                return axml.decode_xml(self.read(MANIFEST_NAME))
+            except (axml.AXMLError, UnicodeDecodeError, zlib.error, zip_layout.ZipLayoutError):
+                return None
+        return self.cached('manifest_xml', decode)
+
+    @property
+    def manifest(self):
+        """Parsed manifest root element, or None."""
+        def parse():
+            if self.manifest_xml is None:
+                return None
+            try:
+                return ET.fromstring(self.manifest_xml)
+            except ET.ParseError:
+                return None
+        return self.cached('manifest', parse)
+
+    @property
+    def package_name(self):
+        root = self.manifest
+        return (root is not None and axml.manifest_package(root)) or None
+
+    @property
+    def signers(self):
+        """{scheme: [certificate info]}, empty when the signatures cannot be parsed."""
+        def parse():
+            try:
+                return apksig.signer_certificates(self.buf)
+            except (apksig.ApkSignatureError, zip_layout.ZipLayoutError):
+                return {}
+        return self.cached('signers', parse)
+
+    def file_type(self, name):
+        """Content type of an entry from its first bytes, without decompressing the rest."""
+        key = ('file_type', name)
+        if key not in self.cache:
+            if name in self._data:
+                head = self._data[name][:filetype.HEAD_SIZE]
+            else:
+                entry = self._by_name[name]
+                data_offset, _ = zip_layout.local_record_span(self.buf, entry.local_offset, entry.compressed_size)
+                head = self.buf[data_offset:data_offset + min(entry.compressed_size, HEAD_PEEK_SIZE)]
+                if entry.method == 8:
+                    head = zlib.decompressobj(-15).decompress(head, filetype.HEAD_SIZE)
+            self.cache[key] = filetype.classify_bytes(head)
+        return self.cache[key]
+
+    def entropy(self, name):
+        """Entropy of an entry's data, computed once per scan."""
+        return self.cached(('entropy', name), lambda: calculate_entropy(self.read(name)))
+
+    def dex_names(self):
+        return [entry.name for entry in self.entries if entry.name.endswith('.dex') and '/' not in entry.name]
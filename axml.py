@@ -0,0 +1,223 @@
+import re
+import struct
+import xml.etree.ElementTree as ET
+
+ANDROID_NS = 'http://schemas.android.com/apk/res/android'
+ANDROID_NAME = f'{{{ANDROID_NS}}}name'
+
+ET.register_namespace('android', ANDROID_NS)
+
+# Chunk types
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_CDATA_TYPE = 0x0104
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+
+UTF8_FLAG = 0x100
+NO_INDEX = 0xFFFFFFFF
+
+# Typed value kinds
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+TYPE_FIRST_COLOR_INT = 0x1C
+TYPE_LAST_COLOR_INT = 0x1F
+
+# Attribute names for resource IDs, used when obfuscators blank the names in the string pool
+ATTRIBUTE_NAMES = {
+    0x01010000: 'theme',
+    0x01010001: 'label',
+    0x01010002: 'icon',
+    0x01010003: 'name',
+    0x01010006: 'permission',
+    0x01010010: 'exported',
+    0x0101020C: 'minSdkVersion',
+    0x0101021B: 'versionCode',
+    0x0101021C: 'versionName',
+    0x01010270: 'targetSdkVersion',
+}
+
+# Characters that may not appear in an XML name; obfuscators use them to inject fake attributes
+INVALID_NAME_CHARS = re.compile(r'[^\w.\-]')
+
+COMPONENT_TAGS = ('activity', 'activity-alias', 'service', 'receiver', 'provider')
+
+
+class AXMLError(Exception):
+    """Raised when data is not a well-formed binary XML document."""
+
+
+def _read_length8(data, offset):
+    length = data[offset]
+    if length & 0x80:
+        return ((length & 0x7F) << 8) | data[offset + 1], offset + 2
+    return length, offset + 1
+
+
+def _read_length16(data, offset):
+    (length,) = struct.unpack_from('<H', data, offset)
+    if length & 0x8000:
+        (low,) = struct.unpack_from('<H', data, offset + 2)
+        return ((length & 0x7FFF) << 16) | low, offset + 4
+    return length, offset + 2
+
+
+def parse_string_pool(data, offset):
+    """Decode a ResStringPool chunk at offset into a list of strings."""
+    header_size, chunk_size, string_count, _, flags, strings_start = struct.unpack_from('<HIIIII', data, offset + 2)
+    chunk_end = min(offset + chunk_size, len(data))
+    utf8 = flags & UTF8_FLAG
+    offsets = struct.unpack_from(f'<{string_count}I', data, offset + header_size)
+    base = offset + strings_start
+    strings = []
+    for string_offset in offsets:
+        position = base + string_offset
+        if position >= chunk_end:
+            strings.append('')
+            continue
+        if utf8:
+            _, position = _read_length8(data, position)  # UTF-16 length, unused
+            length, position = _read_length8(data, position)
+            strings.append(bytes(data[position:position + length]).decode('utf-8', errors='replace'))
+        else:
+            length, position = _read_length16(data, position)
+            strings.append(bytes(data[position:position + length * 2]).decode('utf-16-le', errors='replace'))
+    return strings
+
+
+def _format_value(strings, raw_index, data_type, value):
+    if raw_index != NO_INDEX and raw_index < len(strings):
+        return strings[raw_index]
+    if data_type == TYPE_STRING:
+        return strings[value] if value < len(strings) else ''
+    if data_type == TYPE_INT_BOOLEAN:
+        return 'true' if value else 'false'
+    if data_type == TYPE_INT_DEC:
+        return str(struct.unpack('<i', struct.pack('<I', value))[0])
+    if data_type == TYPE_INT_HEX:
+        return f'0x{value:08x}'
+    if data_type == TYPE_REFERENCE:
+        return f'@0x{value:08x}'
+    if data_type == TYPE_ATTRIBUTE:
+        return f'?0x{value:08x}'
+    if data_type == TYPE_FLOAT:
+        return repr(struct.unpack('<f', struct.pack('<I', value))[0])
+    if TYPE_FIRST_COLOR_INT <= data_type <= TYPE_LAST_COLOR_INT:
+        return f'#{value:08x}'
+    return f'0x{value:08x}'
+
+
+def parse(data):
+    """Decode binary AXML into an ElementTree root element."""
+    if len(data) < 8 or struct.unpack_from('<H', data, 0)[0] != RES_XML_TYPE:
+        raise AXMLError("Not a binary XML document")
+    try:
+        return _parse(data)
+    except (struct.error, IndexError) as e:
+        raise AXMLError(f"Truncated binary XML: {e}")
+
+
+def _parse(data):
+    strings = []
+    resource_ids = []
+    namespaces = {}
+    root = None
+    stack = []
+
+    def string(index):
+        return strings[index] if index < len(strings) else ''
+
+    def qualified(ns_index, name_index):
+        name = string(name_index)
+        if not name and name_index < len(resource_ids):
+            name = ATTRIBUTE_NAMES.get(resource_ids[name_index], f'attr_{resource_ids[name_index]:08x}')
+        name = INVALID_NAME_CHARS.sub('_', name) or '_'
+        if ns_index != NO_INDEX and string(ns_index):
+            return f'{{{string(ns_index)}}}{name}'
+        return name
+
+    (header_size,) = struct.unpack_from('<H', data, 2)
+    offset = header_size
+    while offset + 8 <= len(data):
+        chunk_type, chunk_header_size, chunk_size = struct.unpack_from('<HHI', data, offset)
+        if chunk_size < 8:
+            raise AXMLError(f"Bad chunk size at {offset}")
+
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = parse_string_pool(data, offset)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (chunk_size - chunk_header_size) // 4
+            resource_ids = list(struct.unpack_from(f'<{count}I', data, offset + chunk_header_size))
+        elif chunk_type == RES_XML_START_NAMESPACE_TYPE:
+            prefix_index, uri_index = struct.unpack_from('<II', data, offset + chunk_header_size)
+            namespaces[string(uri_index)] = string(prefix_index)
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            ext = offset + chunk_header_size
+            ns_index, name_index, attribute_start, attribute_size, attribute_count = struct.unpack_from('<IIHHH', data, ext)
+            element = ET.Element(qualified(ns_index, name_index))
+            for i in range(attribute_count):
+                position = ext + attribute_start + i * attribute_size
+                attr_ns, attr_name, raw_index, _, _, data_type, value = struct.unpack_from('<IIIHBBI', data, position)
+                element.set(qualified(attr_ns, attr_name), _format_value(strings, raw_index, data_type, value))
+            if stack:
+                stack[-1].append(element)
+            elif root is None:
+                root = element
+            stack.append(element)
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            if stack:
+                stack.pop()
+        elif chunk_type == RES_XML_CDATA_TYPE:
+            (text_index,) = struct.unpack_from('<I', data, offset + chunk_header_size)
+            if stack:
+                stack[-1].text = (stack[-1].text or '') + string(text_index)
+
+        offset += chunk_size
+
+    if root is None:
+        raise AXMLError("No root element")
+    for uri, prefix in namespaces.items():
+        if uri and prefix and uri != ANDROID_NS:
+            try:
+                ET.register_namespace(prefix, uri)
+            except ValueError:
+                pass
+    return root
+
+
+def to_string(root):
+    """Serialize a decoded document back to XML text."""
+    return ET.tostring(root, encoding='unicode')
+
+
+def decode_xml(data):
+    """XML text of a binary AXML or plain-text XML document."""
+    if data[:2] == struct.pack('<H', RES_XML_TYPE):
+        return to_string(parse(data))
+    return bytes(data).decode('utf-8')
+
+
+# Manifest helpers
+def manifest_package(root):
+    return root.get('package')
+
+
+def manifest_permissions(root):
+    return [elem.get(ANDROID_NAME) for elem in root.iter('uses-permission') if elem.get(ANDROID_NAME)]
+
+
+def manifest_components(root):
+    """Return (tag, name) for the application and every component declared in the manifest."""
+    return [
+        (elem.tag, elem.get(ANDROID_NAME))
+        for elem in root.iter()
+        if elem.tag in COMPONENT_TAGS + ('application',) and elem.get(ANDROID_NAME)
+    ]
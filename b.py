@@ -4,6 +4,11 @@ from androguard.core.bytecodes.apk import APK
 from androguard.core.bytecodes.dvm import DalvikVMFormat
 from androguard.misc import AnalyzeAPK
 from lxml.etree import tostring
+import baseline
+import rules
+
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
 
 
 # Utility: Calculate Entropy
@@ -34,7 +39,7 @@ def analyze_certificates(apk):
             cert_entropy = calculate_entropy(cert_bytes)
             print(f"Certificate SHA-256: {cert_hash}")
             print(f"Certificate entropy: {cert_entropy}")
-            if cert_entropy > 7.5:
+            if profile.is_anomalous("CERT.RSA", cert_entropy):
                 print("Possible obfuscation or steganography detected in certificate due to high entropy!")
     except Exception as e:
         print(f"Error analyzing certificates: {e}")
@@ -50,7 +55,7 @@ def analyze_manifest(apk):
             manifest_str = tostring(manifest_axml, encoding="utf-8").decode("utf-8")
             manifest_entropy = calculate_entropy(manifest_str)
             print(f"Manifest entropy: {manifest_entropy}")
-            if manifest_entropy > 7.5:
+            if profile.is_anomalous("AndroidManifest.xml", manifest_entropy):
                 print("Possible obfuscation or steganography detected in the manifest due to high entropy!")
         else:
             print("Manifest is not available or could not be decoded.")
@@ -67,7 +72,7 @@ def analyze_dex(apk, dvm):
             for dex in dex_files:
                 dex_entropy = calculate_entropy(dex)
                 print(f"DEX entropy: {dex_entropy}")
-                if dex_entropy > 7.5:
+                if profile.is_anomalous("classes.dex", dex_entropy):
                     print("Possible obfuscation or steganography detected in DEX files!")
             analyze_methods(dvm)
         else:
@@ -86,7 +91,7 @@ def analyze_methods(dvm):
                 bytecode = code.get_bc().get_raw()
                 method_entropy = calculate_entropy(bytecode)
                 print(f"Method {method.get_name()}: Entropy: {method_entropy}")
-                if method_entropy > 7.5:
+                if profile.is_anomalous(None, method_entropy):
                     print(f"Obfuscation detected in method {method.get_name()}!")
     except Exception as e:
         print(f"Error analyzing methods: {e}")
@@ -95,20 +100,11 @@ def analyze_methods(dvm):
 # 5. Permission Analysis
 def analyze_permissions(apk):
     print("Analyzing permissions...")
-    suspicious_permissions = [
-        "ACCESS_FINE_LOCATION",
-        "READ_SMS",
-        "WRITE_SMS",
-        "INTERNET",
-        "ACCESS_COARSE_LOCATION",
-        "READ_CONTACTS",
-        "SEND_SMS",
-        "WRITE_EXTERNAL_STORAGE",
-    ]
+    permission_rules = rules.load_rules()
     try:
         for permission in apk.get_permissions():
             print(f"Permission: {permission}")
-            if any(suspicious in permission for suspicious in suspicious_permissions):
+            if permission_rules.suspicious_permission(permission):
                 print(f"Suspicious permission detected: {permission}")
     except Exception as e:
         print(f"Error analyzing permissions: {e}")
@@ -122,7 +118,7 @@ def analyze_assets(apk):
             file_data = apk.get_file(file_name)
             entropy = calculate_entropy(file_data)
             print(f"File: {file_name}, Entropy: {entropy}")
-            if entropy > 7.5:
+            if profile.is_anomalous(file_name, entropy):
                 print(f"Possible steganography detected in asset {file_name} due to high entropy!")
     except Exception as e:
         print(f"Error analyzing assets: {e}")
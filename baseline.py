@@ -0,0 +1,134 @@
+import argparse
+import json
+import math
+import os
+
+DEFAULT_PROFILE_PATH = "baseline_profile.json"
+# The old global cutoff, still used for entry types the benign corpus says nothing about
+DEFAULT_THRESHOLD = 7.5
+DEFAULT_Z = 3.0
+# Extensions seen fewer times than this in the benign corpus fall back to DEFAULT_THRESHOLD
+MIN_COUNT = 30
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+# Byte entropy is measured in bits, so it never exceeds 8
+MAX_ENTROPY = 8.0
+
+
+def extension_of(file_name):
+    """Profile key of a file name, grouped like pd1.py (the part after the last dot, else 'none').
+
+    None (an entry that is not a file, such as one method's bytecode) has no key.
+    """
+    if file_name is None:
+        return None
+    file_name = os.path.basename(str(file_name))
+    return file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else 'none'
+
+
+def profile_keys(chunk):
+    """extension_of over a result CSV chunk, vectorised: lower-cased and ignoring directories."""
+    import stream_stats
+
+    names = chunk['file_resource'].astype(str).str.rsplit('/', n=1).str[-1]
+    return stream_stats.file_extension(names).str.lower()
+
+
+def _group_profile(summary):
+    stats = summary.stats
+    return {
+        'count': stats.count,
+        'mean': stats.mean,
+        'std': stats.std,
+        'min': stats.min,
+        'max': stats.max,
+        'quantiles': {str(q): float(summary.digest.quantile(q)) for q in QUANTILES},
+    }
+
+
+def build_profile(csv_paths, path=DEFAULT_PROFILE_PATH, value_column='entropy'):
+    """Summarise benign result CSVs per file extension and write the profile as JSON."""
+    import stream_stats  # pandas is only needed to build a profile, not for detectors loading one
+
+    # Keys are lower-cased before grouping, so PNG and png entries land in one group
+    summary = stream_stats.summarize_csvs(csv_paths, value_column=value_column, group_func=profile_keys)
+    profile = {
+        'sources': [os.path.basename(csv_path) for csv_path in csv_paths],
+        'overall': _group_profile(summary.overall),
+        'extensions': {str(ext): _group_profile(group) for ext, group in summary.groups.items()},
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(profile, file, indent=2)
+    return profile
+
+
+class BaselineProfile:
+    """Per-extension entropy thresholds derived from the benign corpus.
+
+    Thresholds are computed once when the profile is loaded, so checking an entry is one dict
+    lookup. An extension is flagged above mean + z·σ of its benign entropies, or above a benign
+    quantile when `quantile` is given. Extensions without enough benign samples keep the
+    global DEFAULT_THRESHOLD.
+    """
+
+    def __init__(self, profile=None, z=DEFAULT_Z, quantile=None, min_count=MIN_COUNT,
+                 default_threshold=DEFAULT_THRESHOLD):
+        self.profile = profile or {'extensions': {}}
+        self.default_threshold = default_threshold
+        self.groups = {
+            ext: group for ext, group in self.profile['extensions'].items() if group['count'] >= min_count
+        }
+        self.thresholds = {}
+        for ext, group in self.groups.items():
+            if quantile is not None:
+                threshold = group['quantiles'][str(quantile)]
+            else:
+                threshold = group['mean'] + z * group['std']
+            # Entropy is at most 8 bits, so a threshold past that could never fire
+            self.thresholds[ext] = min(threshold, MAX_ENTROPY)
+
+    def threshold(self, file_name):
+        return self.thresholds.get(extension_of(file_name), self.default_threshold)
+
+    def is_anomalous(self, file_name, entropy):
+        """True when the entropy is unusually high for an entry of this file type."""
+        return entropy > self.thresholds.get(extension_of(file_name), self.default_threshold)
+
+    def z_score(self, file_name, entropy):
+        """Standard score against the benign distribution of this file type, or NaN if unknown."""
+        group = self.groups.get(extension_of(file_name))
+        if group is None or not group['std']:
+            return math.nan
+        return (entropy - group['mean']) / group['std']
+
+
+_profiles = {}
+
+
+def load_profile(path=DEFAULT_PROFILE_PATH, **options):
+    """Load (once per process) the profile at path; without one, every type uses DEFAULT_THRESHOLD."""
+    key = (path, tuple(sorted(options.items())))
+    if key not in _profiles:
+        profile = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                profile = json.load(file)
+        _profiles[key] = BaselineProfile(profile, **options)
+    return _profiles[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a per-extension entropy baseline from benign result CSVs.")
+    parser.add_argument('csv_files', nargs='+')
+    parser.add_argument('-o', '--output', default=DEFAULT_PROFILE_PATH)
+    args = parser.parse_args()
+    profile = build_profile(args.csv_files, args.output)
+    thresholds = BaselineProfile(profile).thresholds
+    for ext in sorted(thresholds):
+        group = profile['extensions'][ext]
+        print(f"{ext}: n={group['count']} mean={group['mean']:.2f} σ={group['std']:.2f} threshold={thresholds[ext]:.2f}")
+    print(f"Wrote {args.output}")
+
+
+# Files are summarised in worker processes, which re-import this module
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import scan_journal
+
+JOURNAL_NAME = ".bulk_move.journal"
+PARTIAL_SUFFIX = ".partial"
+DEFAULT_WORKERS = 8
+# Journal records are fsynced once per batch rather than once per file
+JOURNAL_BATCH = 1000
+
+MOVE = 'move'
+DUPLICATE = 'duplicate'
+# Journal record states
+PLANNED = 'planned'
+DONE = 'done'
+
+
+def _candidates(src_dir, suffixes):
+    """Matching files under src_dir, sorted by relative path so plans are deterministic."""
+    found = []
+    for root, _, files in os.walk(src_dir):
+        for file_name in files:
+            if suffixes is None or file_name.lower().endswith(suffixes):
+                found.append(os.path.join(root, file_name))
+    found.sort(key=lambda path: os.path.relpath(path, src_dir))
+    return found
+
+
+def check_directories(src_dir, dest_dir):
+    """Raise ValueError when dest_dir is src_dir or lies inside it.
+
+    Files already in dest_dir would then also be sources, found as duplicates of themselves
+    and removed.
+    """
+    src_dir, dest_dir = os.path.realpath(src_dir), os.path.realpath(dest_dir)
+    if os.path.commonpath([src_dir, dest_dir]) == src_dir:
+        raise ValueError(f"Destination {dest_dir} must not be {src_dir} or inside it")
+
+
+def plan_moves(src_dir, dest_dir, suffixes=None, workers=DEFAULT_WORKERS):
+    """List (source, destination, action) for flattening src_dir into dest_dir.
+
+    A file whose content is already in dest_dir, or earlier in the plan, is a DUPLICATE and
+    is only removed. Name collisions between different contents are resolved by suffixing
+    the later file (in relative path order) with its digest, so the plan is the same on
+    every run. Only files that share a size with another file are hashed.
+    """
+    check_directories(src_dir, dest_dir)
+    if suffixes is not None:
+        suffixes = tuple(suffix.lower() for suffix in suffixes)
+    sources = _candidates(src_dir, suffixes)
+    existing = {}
+    for entry in os.scandir(dest_dir):
+        if entry.is_file() and not entry.name.endswith(PARTIAL_SUFFIX) and entry.name != JOURNAL_NAME:
+            existing[entry.name] = entry.path
+
+    sizes = {}
+    for path in list(existing.values()) + sources:
+        size = os.path.getsize(path)
+        sizes.setdefault(size, []).append(path)
+    to_hash = [path for paths in sizes.values() if len(paths) > 1 for path in paths]
+    with ThreadPoolExecutor(workers) as executor:
+        digests = dict(zip(to_hash, executor.map(scan_journal.file_digest, to_hash)))
+
+    def digest(path):
+        if path not in digests:
+            digests[path] = scan_journal.file_digest(path)
+        return digests[path]
+
+    seen = {digests[path]: path for path in existing.values() if path in digests}
+    taken = set(existing)
+    plan = []
+    for source in sources:
+        content = digests.get(source)
+        if content is not None and content in seen:
+            # Never plan removing a file as a duplicate of itself (or of a hard link to it);
+            # a match planned earlier in this run does not exist yet
+            match = seen[content]
+            if not (os.path.exists(match) and os.path.samefile(source, match)):
+                plan.append((source, match, DUPLICATE))
+            continue
+        name = os.path.basename(source)
+        if name in taken:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}_{digest(source)[:8]}{extension}"
+            counter = 1
+            while name in taken:
+                name = f"{stem}_{digest(source)[:8]}_{counter}{extension}"
+                counter += 1
+        taken.add(name)
+        destination = os.path.join(dest_dir, name)
+        if content is not None:
+            seen[content] = destination
+        plan.append((source, destination, MOVE))
+    return plan
+
+
+def _copy_move(source, destination):
+    """Cross-device move: copy to a partial file, publish it atomically, then remove the source."""
+    partial = destination + PARTIAL_SUFFIX
+    with open(source, 'rb') as src, open(partial, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+        dst.flush()
+        os.fsync(dst.fileno())
+    shutil.copystat(source, partial)
+    os.replace(partial, destination)
+    os.remove(source)
+
+
+class _Journal:
+    """Append-only log of a run: its whole plan first, then every finished action.
+
+    The entries planned but not finished are what an interrupted run still has to do.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        self.pending = 0
+
+    def _write(self, source, destination, action, state):
+        self.file.write(json.dumps({'src': source, 'dst': destination, 'action': action, 'state': state}) + '\n')
+
+    def plan(self, plan):
+        for source, destination, action in plan:
+            self._write(source, destination, action, PLANNED)
+        self.sync()
+
+    def record(self, source, destination, action):
+        self._write(source, destination, action, DONE)
+        self.pending += 1
+        if self.pending >= JOURNAL_BATCH:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+
+def read_journal(path):
+    """Planned (source, destination, action) entries of an interrupted run that never finished, in order."""
+    planned, finished = [], set()
+    try:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A record torn by the interruption; nothing after it was written
+                    break
+                entry = (record['src'], record['dst'], record['action'])
+                if record.get('state') == PLANNED:
+                    planned.append(entry)
+                else:
+                    finished.add(entry)
+    except FileNotFoundError:
+        return []
+    return [entry for entry in planned if entry not in finished]
+
+
+def _resume(pending, journal, counts):
+    """The part of an interrupted plan still to run.
+
+    Sources that are gone were handled already. A copy that was published but whose source
+    was not yet removed only needs that removal.
+    """
+    plan = []
+    for source, destination, action in pending:
+        if not os.path.exists(source):
+            continue
+        if action == MOVE and os.path.exists(destination):
+            if os.path.getsize(destination) == os.path.getsize(source):
+                os.remove(source)
+                journal.record(source, destination, action)
+                counts[action] += 1
+            # A different file under the planned name: leave the source for a fresh run
+            continue
+        plan.append((source, destination, action))
+    return plan
+
+
+def move_files(src_dir, dest_dir, suffixes=None, workers=DEFAULT_WORKERS):
+    """Move every matching file under src_dir into dest_dir (flattened); return action counts.
+
+    On one filesystem files are renamed in a single pass; across filesystems they are copied
+    by a thread pool. The plan and every finished action go to dest_dir/.bulk_move.journal,
+    which is removed once the run completes. A rerun after an interruption drops stale
+    partial copies and finishes the journaled plan under its planned names, without walking
+    or hashing again; a later run plans afresh. dest_dir must not be src_dir or inside it.
+    """
+    check_directories(src_dir, dest_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+    for entry in os.scandir(dest_dir):
+        if entry.name.endswith(PARTIAL_SUFFIX):
+            os.remove(entry.path)
+    journal_path = os.path.join(dest_dir, JOURNAL_NAME)
+    pending = read_journal(journal_path)
+    same_device = os.stat(src_dir).st_dev == os.stat(dest_dir).st_dev
+    counts = {MOVE: 0, DUPLICATE: 0}
+    journal = _Journal(journal_path)
+    try:
+        if pending:
+            plan = _resume(pending, journal, counts)
+        else:
+            plan = plan_moves(src_dir, dest_dir, suffixes, workers)
+            journal.plan(plan)
+        copies = []
+        for source, destination, action in plan:
+            if action == DUPLICATE:
+                os.remove(source)
+            elif same_device:
+                os.rename(source, destination)
+            else:
+                copies.append((source, destination))
+                continue
+            journal.record(source, destination, action)
+            counts[action] += 1
+        if copies:
+            with ThreadPoolExecutor(workers) as executor:
+                futures = [(executor.submit(_copy_move, source, destination), source, destination)
+                           for source, destination in copies]
+                for future, source, destination in futures:
+                    future.result()
+                    journal.record(source, destination, MOVE)
+                    counts[MOVE] += 1
+    finally:
+        journal.close()
+    os.remove(journal_path)
+    return counts
@@ -0,0 +1,203 @@
+import contextlib
+import io
+import os
+import zipfile
+
+import axml
+import filetype
+
+# Limits against zip bombs and endlessly nested archives
+MAX_DEPTH = 3
+MAX_ENTRY_SIZE = 512 * 1024 * 1024
+MAX_TOTAL_SIZE = 2 * 1024 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 200
+
+# Names that usually hold an inner APK or bundle; other entries are still checked by content
+CONTAINER_EXTENSIONS = ('.apk', '.xapk', '.apks', '.apkm', '.zip', '.jar')
+OBB_EXTENSION = '.obb'
+
+
+class ContainerLimitError(Exception):
+    """Raised when a nested archive exceeds the depth or size limits."""
+
+
+class ApkMember:
+    """One APK found inside a file or bundle, open as a ZipFile for the duration of the scan."""
+
+    def __init__(self, chain, zip_file, in_apk=False):
+        self.chain = chain
+        self.zip_file = zip_file
+        # True when the APK is embedded in another APK rather than shipped in a bundle
+        self.in_apk = in_apk
+        self.package = None
+        self.split = None
+        try:
+            root = axml.parse(zip_file.read('AndroidManifest.xml'))
+            self.package = axml.manifest_package(root)
+            self.split = root.get('split')
+        except (KeyError, axml.AXMLError, zipfile.BadZipFile):
+            pass
+
+    @property
+    def path(self):
+        """Display path, with '!/' separating the archives of the chain."""
+        return '!/'.join(self.chain)
+
+    @property
+    def is_base(self):
+        return self.split is None
+
+
+class _Budget:
+    """Uncompressed bytes still allowed for one top-level file."""
+
+    def __init__(self, total):
+        self.remaining = total
+
+    def charge(self, info, chain):
+        if info.file_size > MAX_ENTRY_SIZE:
+            raise ContainerLimitError(f"{'!/'.join(chain)}: {info.file_size} bytes exceeds the entry limit")
+        if info.compress_size and info.file_size / info.compress_size > MAX_COMPRESSION_RATIO:
+            raise ContainerLimitError(f"{'!/'.join(chain)}: compression ratio exceeds {MAX_COMPRESSION_RATIO}")
+        if info.file_size > self.remaining:
+            raise ContainerLimitError(f"{'!/'.join(chain)}: total uncompressed size limit reached")
+        self.remaining -= info.file_size
+
+
+class BufferFile(io.RawIOBase):
+    """Read-only, seekable file over a bytes-like object (bytes, mmap) that does not copy it."""
+
+    def __init__(self, buf):
+        self.view = memoryview(buf)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.view[self.position:self.position + len(b)]
+        b[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.position = offset
+        return offset
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.view.release()
+        super().close()
+
+
+def _is_container(zip_file, info):
+    if info.is_dir() or info.filename.lower().endswith(OBB_EXTENSION):
+        return False
+    if info.filename.lower().endswith(CONTAINER_EXTENSIONS):
+        return True
+    # Payloads hidden under other names (assets/data.bin) are recognised by content
+    return filetype.classify_entry(zip_file, info) == 'zip'
+
+
+def _open_inner(zip_file, info):
+    """Open an inner archive without touching the disk."""
+    stream = zip_file.open(info)
+    if info.compress_type == zipfile.ZIP_STORED:
+        # Stored entries seek cheaply, so the inner zip is read straight from the outer one
+        return zipfile.ZipFile(stream)
+    # Seeking in a deflated stream re-inflates from the start, so inflate once into memory
+    with stream:
+        return zipfile.ZipFile(io.BytesIO(stream.read()))
+
+
+def _iter_members(zip_file, chain, depth, budget, errors, in_apk=False):
+    is_apk = 'AndroidManifest.xml' in zip_file.NameToInfo
+    if is_apk:
+        yield ApkMember(chain, zip_file, in_apk)
+    if depth >= MAX_DEPTH:
+        return
+    for info in zip_file.infolist():
+        inner_chain = chain + (info.filename,)
+        try:
+            if not _is_container(zip_file, info):
+                continue
+            budget.charge(info, inner_chain)
+            inner = _open_inner(zip_file, info)
+        except (ContainerLimitError, zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+            errors.append((inner_chain, str(e)))
+            continue
+        with inner:
+            yield from _iter_members(inner, inner_chain, depth + 1, budget, errors, in_apk or is_apk)
+
+
+def iter_apks(path, errors=None, max_total_size=MAX_TOTAL_SIZE, buf=None):
+    """Yield an ApkMember for every APK in path: the file itself, split APKs of a bundle, and nested APKs.
+
+    Members are only valid until the next one is requested. Skipped archives are appended to
+    errors as (chain, reason) when a list is passed. When the file is already mapped or read,
+    pass it as buf to parse it from memory; path then only names it.
+    """
+    errors = [] if errors is None else errors
+    with contextlib.ExitStack() as stack:
+        source = path if buf is None else stack.enter_context(BufferFile(buf))
+        try:
+            zip_file = stack.enter_context(zipfile.ZipFile(source))
+        except (zipfile.BadZipFile, OSError) as e:
+            errors.append(((path,), str(e)))
+            return
+        yield from _iter_members(zip_file, (path,), 0, _Budget(max_total_size), errors)
+
+
+def iter_obbs(path):
+    """Yield (name, size) of the OBB expansion files shipped in an XAPK bundle."""
+    with zipfile.ZipFile(path) as zip_file:
+        for info in zip_file.infolist():
+            if info.filename.lower().endswith(OBB_EXTENSION):
+                yield info.filename, info.file_size
+
+
+def group_by_package(paths, analyze, errors=None):
+    """Run analyze(member) on every APK under paths and group the results per package.
+
+    Returns {package: {'base': result or None, 'splits': {split name: result}, 'nested': [(path, result)]}}.
+    APKs inside another APK's assets are reported under their own package as nested results.
+    """
+    apps = {}
+    for path in paths:
+        for member in iter_apks(path, errors):
+            package = member.package or os.path.splitext(os.path.basename(path))[0]
+            app = apps.setdefault(package, {'base': None, 'splits': {}, 'nested': []})
+            result = analyze(member)
+            if not member.in_apk:
+                if member.is_base:
+                    app['base'] = result
+                else:
+                    app['splits'][member.split] = result
+            else:
+                app['nested'].append((member.path, result))
+    return apps
+
+
+def find_archives(folder):
+    """Files in folder that are zip archives (APK, XAPK, APKS, APKM or extensionless downloads)."""
+    paths = []
+    for file_name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, file_name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            if filetype.classify_bytes(f.read(filetype.HEAD_SIZE)) == 'zip':
+                paths.append(path)
+    return paths
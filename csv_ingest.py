@@ -0,0 +1,160 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Columns written by the obfuscation/steganography analyzers (see csv_columns in n.py and obs_stag.py)
+RESULT_SCHEMA = {
+    'package_name': 'category',
+    'file_resource': 'category',
+    'obfuscation_flag': 'boolean',
+    'entropy': 'float32',
+}
+FLAG_TRUE = ['Yes']
+FLAG_FALSE = ['No']
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def read_result_csv(path, usecols=None, chunksize=None, schema=RESULT_SCHEMA):
+    """Read one result CSV with its dtypes applied while parsing, so no float64/object copy is ever built."""
+    dtype = {column: kind for column, kind in schema.items() if usecols is None or column in usecols}
+    return pd.read_csv(
+        path, usecols=usecols, dtype=dtype, chunksize=chunksize,
+        true_values=FLAG_TRUE, false_values=FLAG_FALSE,
+    )
+
+
+def count_rows(path, block_size=1024 * 1024):
+    """Upper bound on the data rows of a CSV without parsing it: its line breaks, less the header."""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(0, lines - 1)
+
+
+class _Column:
+    """One column of read_results, allocated once for the estimated row count and filled chunk by chunk.
+
+    Columns outside the schema have no fixed dtype; their chunks are kept and concatenated.
+    """
+
+    def __init__(self, name, kind, size):
+        self.name = name
+        self.kind = kind
+        self.parts = {}
+        if kind == 'category':
+            # Codes shared by all files, so categories need no union afterwards
+            self.categories = {}
+            self.lock = threading.Lock()
+            self.values = np.full(size, -1, dtype=np.int32)
+        elif kind == 'boolean':
+            self.values = np.zeros(size, dtype=bool)
+            self.mask = np.ones(size, dtype=bool)
+        elif kind is not None:
+            self.values = np.empty(size, dtype=kind)
+
+    def fill(self, start, series):
+        stop = start + len(series)
+        if self.kind == 'category':
+            with self.lock:
+                codes = [self.categories.setdefault(value, len(self.categories))
+                         for value in series.cat.categories.tolist()]
+            # The extra -1 maps the file's missing-value code (-1) to itself
+            codes = np.array(codes + [-1], dtype=np.int32)
+            self.values[start:stop] = codes[series.cat.codes.to_numpy()]
+        elif self.kind == 'boolean':
+            self.values[start:stop] = series.to_numpy(dtype=bool, na_value=False)
+            self.mask[start:stop] = series.isna().to_numpy()
+        elif self.kind is not None:
+            self.values[start:stop] = series.to_numpy()
+        else:
+            self.parts[start] = series
+
+    def move(self, source, destination, size):
+        """Shift rows left over the gap a file left when it had fewer rows than estimated."""
+        for values in (getattr(self, 'values', None), getattr(self, 'mask', None)):
+            if values is not None:
+                values[destination:destination + size] = values[source:source + size]
+
+    def result(self, rows):
+        if self.kind == 'category':
+            return pd.Categorical.from_codes(self.values[:rows], categories=list(self.categories))
+        if self.kind == 'boolean':
+            return pd.arrays.BooleanArray(self.values[:rows], self.mask[:rows])
+        if self.kind is not None:
+            return self.values[:rows]
+        parts = [self.parts[start] for start in sorted(self.parts)]
+        return pd.concat(parts, ignore_index=True) if parts else pd.Series(dtype=object)
+
+
+def _fill_file(path, start, capacity, columns, usecols, schema, chunksize):
+    """Parse one CSV in chunks into its slice of the columns; return its row count."""
+    rows = 0
+    for chunk in read_result_csv(path, usecols=usecols, chunksize=chunksize, schema=schema):
+        if rows + len(chunk) > capacity:
+            raise ValueError(f"{path} has more rows than line breaks")
+        for column in columns:
+            column.fill(start + rows, chunk[column.name])
+        rows += len(chunk)
+    return rows
+
+
+def read_results(paths, usecols=None, schema=RESULT_SCHEMA, workers=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Read many result CSVs in parallel and return one frame, in path order.
+
+    Every column is allocated once, sized by counting line breaks, and each file is parsed in
+    chunks straight into its own slice on a thread pool (the C parser releases the GIL while
+    tokenizing). No per-file frame is kept, so peak memory stays close to the size of the
+    result. Category columns share one set of categories across files.
+    """
+    present = []
+    for path in paths:
+        if os.path.exists(path):
+            present.append(path)
+        else:
+            print(f"Error: {path} not found. Skipping.")
+    if not present:
+        return pd.DataFrame()
+    capacities = [count_rows(path) for path in present]
+    starts = np.concatenate(([0], np.cumsum(capacities)[:-1])).tolist()
+    names = pd.read_csv(present[0], usecols=usecols, nrows=0).columns
+    columns = [_Column(name, schema.get(name), sum(capacities)) for name in names]
+
+    workers = workers or min(len(present), os.cpu_count() or 1)
+    with ThreadPoolExecutor(workers) as executor:
+        counts = list(executor.map(
+            lambda job: _fill_file(*job, columns, usecols, schema, chunksize),
+            zip(present, starts, capacities),
+        ))
+
+    # Close the gaps left by files whose estimate was high (quoted line breaks)
+    rows = 0
+    for start, count in zip(starts, counts):
+        if start != rows:
+            for column in columns:
+                column.move(start, rows, count)
+        rows += count
+    return pd.DataFrame({column.name: column.result(rows) for column in columns}, copy=False)
+
+
+def iter_results(paths, chunksize, usecols=None, schema=RESULT_SCHEMA):
+    """Yield schema-typed chunks of each CSV in turn, for callers that aggregate instead of concatenating."""
+    for path in paths:
+        try:
+            yield from read_result_csv(path, usecols=usecols, chunksize=chunksize, schema=schema)
+        except FileNotFoundError:
+            print(f"Error: {path} not found. Skipping.")
+
+
+def to_result_csv(frame, path):
+    """Write a result frame back in the analyzers' format (Yes/No flags)."""
+    if 'obfuscation_flag' in frame.columns and frame['obfuscation_flag'].dtype == 'boolean':
+        frame = frame.assign(obfuscation_flag=frame['obfuscation_flag'].map({True: FLAG_TRUE[0], False: FLAG_FALSE[0]}))
+    frame.to_csv(path, index=False)
@@ -0,0 +1,149 @@
+import csv
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import scan_journal
+
+TRAIN = 'train'
+TEST = 'test'
+MANIFEST_NAME = "split_manifest.csv"
+MODES = ('hardlink', 'symlink', 'manifest')
+
+# PNG text chunk in which xapkTopng.py, apkToImageBenign.py and fourier5.py record the
+# manifest package a sample was rendered from; every image of a package must land in one set
+PACKAGE_TEXT_KEY = 'package'
+# Images rendered before the package was recorded are named <package>[_<split>]_dex<i>[_fourier].png.
+# Package names may contain '_', so only these known split suffixes can be told apart from it
+SAMPLE_NAME = re.compile(r'^(?P<package>.+?)(?:_(?:nested_|config\.|split_).*)?_dex\d+(?:_fourier)?$')
+
+
+def write_sample_png(pixels, path, package):
+    """Save a uint8 image array as PNG with the package it was rendered from in a text chunk."""
+    from PIL import Image, PngImagePlugin
+
+    info = PngImagePlugin.PngInfo()
+    info.add_text(PACKAGE_TEXT_KEY, package)
+    Image.fromarray(pixels).save(path, pnginfo=info)
+
+
+def recorded_package(path):
+    """Package recorded in a sample PNG by write_sample_png, or None."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        # Opening reads the chunks before the image data, where the text chunk is written
+        with Image.open(path) as image:
+            return image.info.get(PACKAGE_TEXT_KEY)
+    except (OSError, UnidentifiedImageError):
+        return None
+
+
+def package_key(path):
+    """Split key of a sample file: the package recorded in it, else one parsed from its name, else its stem."""
+    package = recorded_package(path) if path.lower().endswith('.png') else None
+    if package:
+        return package
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = SAMPLE_NAME.match(stem)
+    return match.group('package') if match else stem
+
+
+def digest_key(path):
+    """Split key of a sample file: its content digest, so identical files share a set."""
+    return scan_journal.file_digest(path)
+
+
+KEY_FUNCTIONS = {'package': package_key, 'digest': digest_key}
+
+
+def assign(key, train_ratio, seed=''):
+    """TRAIN or TEST for a key, from a stable hash; the same key and seed always get the same set."""
+    value = int.from_bytes(hashlib.sha256(f"{seed}:{key}".encode('utf-8')).digest()[:8], 'big')
+    return TRAIN if value < train_ratio * 2 ** 64 else TEST
+
+
+def _link(source, destination, mode):
+    try:
+        if os.path.samefile(source, destination):
+            return  # already linked by an earlier run
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    if mode == 'hardlink':
+        os.link(source, destination)
+    else:
+        os.symlink(os.path.abspath(source), destination)
+
+
+def _split_class(label, src_dir, dataset_path, train_ratio, seed, key, mode):
+    rows = []
+    for entry in os.scandir(src_dir):
+        if entry.is_file():
+            split = assign(KEY_FUNCTIONS[key](entry.path), train_ratio, seed)
+            rows.append((split, label, entry.name, entry.path))
+    if mode != 'manifest':
+        for split in (TRAIN, TEST):
+            os.makedirs(os.path.join(dataset_path, split, label), exist_ok=True)
+        for split, _, name, path in rows:
+            _link(path, os.path.join(dataset_path, split, label, name), mode)
+    return rows
+
+
+def _remove_stale(dataset_path, labels, rows, mode):
+    """Remove files under <split>/<class> that this run did not place there.
+
+    These are links of an earlier split and the copies the old copy-based dafne.py left in
+    the same directories. Only symlinks and files named like one of the class's samples are
+    removed; anything else is reported and kept.
+    """
+    placed = set() if mode == 'manifest' else {row[:3] for row in rows}
+    sample_names = {(row[1], row[2]) for row in rows}
+    for split in (TRAIN, TEST):
+        for label in labels:
+            directory = os.path.join(dataset_path, split, label)
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if (split, label, entry.name) in placed:
+                    continue
+                if entry.is_symlink() or (label, entry.name) in sample_names:
+                    os.remove(entry.path)
+                else:
+                    print(f"Keeping {entry.path}: not a sample of {label}")
+
+
+def split_dataset(class_dirs, dataset_path, train_ratio=0.8, seed='', key='package', mode='hardlink', workers=None):
+    """Split sample directories ({class: dir}) into train/test under dataset_path without copying.
+
+    Each sample is assigned by a hash of its key ('package' groups every image of a package,
+    'digest' groups identical files), so re-running gives the same split. Samples are
+    materialised as hard links or symlinks, or only listed in split_manifest.csv; the manifest
+    is always written. Samples of an earlier split or copy that no longer belong in a split
+    directory are removed (see _remove_stale). Class directories are processed in parallel.
+    Returns {(split, class): sample count}.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown split mode {mode}, expected one of {', '.join(MODES)}")
+    os.makedirs(dataset_path, exist_ok=True)
+    manifest_path = os.path.join(dataset_path, MANIFEST_NAME)
+    labels = list(class_dirs)
+    with ThreadPoolExecutor(workers or len(labels) or 1) as executor:
+        results = executor.map(_split_class, labels, [class_dirs[label] for label in labels],
+                               *[[argument] * len(labels) for argument in (dataset_path, train_ratio, seed, key, mode)])
+        rows = [row for class_rows in results for row in class_rows]
+
+    _remove_stale(dataset_path, labels, rows, mode)
+
+    temporary_path = manifest_path + '.tmp'
+    with open(temporary_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['split', 'class', 'name', 'source'])
+        writer.writerows(sorted(rows))
+    os.replace(temporary_path, manifest_path)
+
+    counts = {}
+    for split, label, _, _ in rows:
+        counts[split, label] = counts.get((split, label), 0) + 1
+    return counts
@@ -0,0 +1,440 @@
+import hashlib
+import importlib.util
+import os
+import subprocess
+import tempfile
+import zlib
+
+import apksig
+import archive as archive_module
+import axml
+import baseline
+import containers
+import elf_entropy
+import filetype
+import overlay
+import rules
+import stego_image
+import zip_layout
+from entropy import calculate_entropy
+
+# name -> Detector subclass, in registration order
+DETECTORS = {}
+
+ASSET_TYPES = filetype.IMAGE_TYPES | {'xml', 'axml', 'json'}
+SIGNATURE_EXTENSIONS = ('.RSA', '.DSA', '.EC')
+
+
+def register(cls):
+    """Class decorator adding a detector to the registry under its name."""
+    if cls.name in DETECTORS:
+        raise ValueError(f"Detector {cls.name} is already registered")
+    DETECTORS[cls.name] = cls
+    return cls
+
+
+def default_detectors():
+    return [name for name, cls in DETECTORS.items() if cls.default]
+
+
+def create_detectors(names=None, profile=None):
+    """Instances of the named detectors (the defaults when names is None), in registry order."""
+    names = default_detectors() if names is None else names
+    unknown = [name for name in names if name not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown detector(s) {', '.join(unknown)}; available: {', '.join(DETECTORS)}")
+    for name in names:
+        # find_spec only locates the module, so checking costs no import time
+        missing = [module for module in DETECTORS[name].requires if importlib.util.find_spec(module) is None]
+        if missing:
+            raise ValueError(f"Detector {name} needs {', '.join(missing)}, which is not installed")
+    return [cls(profile) for name, cls in DETECTORS.items() if name in names]
+
+
+class Findings:
+    """Result sink of one APK: one row per resource in the analyzers' CSV format, plus details.
+
+    A resource reported by several detectors keeps one row, flagged if any of them flagged it.
+    Details are free-form, JSON-serialisable data per detector (hashes, image statistics, ...).
+    """
+
+    def __init__(self, package_name):
+        self.package_name = package_name
+        self.resources = {}
+        self.details = {}
+        self.errors = []
+
+    def add(self, resource, flagged, entropy=None):
+        previous = self.resources.get(resource)
+        if previous is not None:
+            flagged = flagged or previous[0]
+            entropy = previous[1] if entropy is None else entropy
+        self.resources[resource] = (bool(flagged), entropy)
+
+    def detail(self, detector, key, value):
+        self.details.setdefault(detector, {})[key] = value
+
+    def error(self, detector, message):
+        self.errors.append(f"{detector}: {message}")
+
+    @property
+    def rows(self):
+        return [
+            [self.package_name, resource, "Yes" if flagged else "No", '' if entropy is None else entropy]
+            for resource, (flagged, entropy) in self.resources.items()
+        ]
+
+
+class Detector:
+    """Base class of detector plugins.
+
+    A detector sees entries during the shared pass over the archive through wants()/entry(),
+    and/or the whole archive afterwards through scan(). Heavy dependencies are imported inside
+    the detectors that use them, so unselected detectors cost nothing.
+    """
+
+    name = None
+    description = ''
+    default = True
+    # Modules imported lazily by the detector, checked when it is selected
+    requires = ()
+
+    def __init__(self, profile=None):
+        self.profile = profile or baseline.load_profile()
+
+    def wants(self, archive, name):
+        """True when entry() should be called with this entry's data."""
+        return False
+
+    def entry(self, archive, name, data, findings):
+        pass
+
+    def scan(self, archive, findings):
+        pass
+
+
+def scan_archive(archive, detectors):
+    """Run the detectors over one opened Archive in a single pass and return its Findings.
+
+    Every entry is decompressed at most once, only if some detector wants it, and dropped
+    once all of them have seen it.
+    """
+    findings = Findings(archive.package_name or os.path.splitext(os.path.basename(archive.path))[0])
+    for entry in archive.entries:
+        try:
+            interested = [detector for detector in detectors if detector.wants(archive, entry.name)]
+            if not interested:
+                continue
+            data = archive.read(entry.name)
+        except (zlib.error, zip_layout.ZipLayoutError) as e:
+            findings.add(entry.name, True)
+            findings.error('archive', f"{entry.name}: {e}")
+            continue
+        for detector in interested:
+            detector.entry(archive, entry.name, data, findings)
+        archive.release(entry.name)
+    for detector in detectors:
+        detector.scan(archive, findings)
+    return findings
+
+
+def is_signature_block(name):
+    """True for v1 (JAR) signature block entries such as META-INF/CERT.RSA."""
+    name = name.upper()
+    return name.startswith('META-INF/') and name.endswith(SIGNATURE_EXTENSIONS)
+
+
+def _entropy_row(detector, archive, name, findings):
+    file_entropy = archive.entropy(name)
+    findings.add(name, detector.profile.is_anomalous(name, file_entropy), file_entropy)
+    return file_entropy
+
+
+@register
+class CertificateDetector(Detector):
+    name = 'certificate'
+    description = "v1/v2/v3 signer certificates and the entropy of v1 signature blocks"
+
+    def wants(self, archive, name):
+        return is_signature_block(name)
+
+    def entry(self, archive, name, data, findings):
+        _entropy_row(self, archive, name, findings)
+
+    def scan(self, archive, findings):
+        signers = archive.signers
+        for scheme, certificates in signers.items():
+            findings.detail(self.name, scheme, [certificate['sha256'] for certificate in certificates])
+        if apksig.schemes_disagree(signers):
+            findings.add('certificate:schemes_disagree', True)
+
+
+@register
+class ManifestDetector(Detector):
+    name = 'manifest'
+    description = "manifest entropy and machine-generated component names"
+
+    def scan(self, archive, findings):
+        manifest_xml = archive.manifest_xml
+        if manifest_xml is None:
+            findings.error(self.name, "missing or undecodable manifest")
+            return
+        manifest_entropy = calculate_entropy(manifest_xml)
+        name = archive_module.MANIFEST_NAME
+        findings.add(name, self.profile.is_anomalous(name, manifest_entropy), manifest_entropy)
+        if archive.manifest is None:
+            return
+        for tag, component, score, obfuscated in rules.load_rules().score_components(
+                axml.manifest_components(archive.manifest)):
+            if obfuscated:
+                findings.add(f"{tag}:{component}", True)
+
+
+@register
+class PermissionsDetector(Detector):
+    name = 'permissions'
+    description = "permissions matching the suspicious list in rules.json"
+
+    def scan(self, archive, findings):
+        if archive.manifest is None:
+            return
+        permission_rules = rules.load_rules()
+        for permission in axml.manifest_permissions(archive.manifest):
+            if permission_rules.suspicious_permission(permission):
+                findings.add(f"permission:{permission}", True)
+
+
+@register
+class MediaDetector(Detector):
+    name = 'media'
+    description = "entropy of audio and video entries"
+
+    def wants(self, archive, name):
+        return archive.file_type(name) in filetype.MEDIA_TYPES
+
+    def entry(self, archive, name, data, findings):
+        _entropy_row(self, archive, name, findings)
+
+
+@register
+class AssetsDetector(Detector):
+    name = 'assets'
+    description = "entropy of image/XML/JSON assets and entries disguised by their extension"
+
+    def wants(self, archive, name):
+        file_type = archive.file_type(name)
+        return file_type in ASSET_TYPES or filetype.is_disguised(name, file_type)
+
+    def entry(self, archive, name, data, findings):
+        file_type = archive.file_type(name)
+        file_entropy = archive.entropy(name)
+        disguised = filetype.is_disguised(name, file_type)
+        if disguised:
+            findings.detail(self.name, name, f"{file_type} content")
+        findings.add(name, disguised or self.profile.is_anomalous(name, file_entropy), file_entropy)
+
+
+@register
+class HashesDetector(Detector):
+    name = 'hashes'
+    description = "entropy and SHA-256 of every entry"
+
+    def wants(self, archive, name):
+        return True
+
+    def entry(self, archive, name, data, findings):
+        _entropy_row(self, archive, name, findings)
+        findings.detail(self.name, name, hashlib.sha256(data).hexdigest())
+
+
+@register
+class ImageDetector(Detector):
+    name = 'image'
+    description = "LSB statistics and trailing data of PNG/JPEG entries"
+
+    def __init__(self, profile=None):
+        super().__init__(profile)
+        # Images are decoded in a helper process, killed and replaced when a decode hangs
+        self.pool = None
+
+    def wants(self, archive, name):
+        return archive.file_type(name) in ('png', 'jpeg')
+
+    def entry(self, archive, name, data, findings):
+        if self.pool is None:
+            self.pool = stego_image.ImagePool(workers=1)
+        result = self.pool.analyze([(name, data, archive.file_type(name))])[0]
+        findings.add(name, result['flag'], archive.entropy(name))
+        if result['flag'] or result.get('error'):
+            findings.detail(self.name, name, result)
+
+
+@register
+class OverlayDetector(Detector):
+    name = 'overlays'
+    description = "data outside the zip entries (prepended, gaps, after the EOCD, signing block)"
+
+    def scan(self, archive, findings):
+        try:
+            regions = overlay.find_overlays(archive.buf)
+        except zip_layout.ZipLayoutError as e:
+            findings.error(self.name, str(e))
+            return
+        for region in regions:
+            if overlay.is_suspicious(region):
+                findings.add(f"overlay:{region['kind']}@{region['offset']}", True, region['entropy'])
+
+
+@register
+class NativeDetector(Detector):
+    name = 'native'
+    description = "packed or unusual sections in ELF libraries"
+
+    def wants(self, archive, name):
+        return archive.file_type(name) == 'elf'
+
+    def entry(self, archive, name, data, findings):
+        report = elf_entropy.analyze_data(data)
+        if report is None:
+            return
+        findings.add(name, bool(report['flags']))
+        if report['flags']:
+            findings.detail(self.name, name, report['flags'])
+
+
+@register
+class NestedDetector(Detector):
+    name = 'nested'
+    description = "APKs and archives hidden inside the APK"
+
+    def scan(self, archive, findings):
+        errors = []
+        # Parsed from the mapping the scan already holds rather than reopening the file
+        for member in containers.iter_apks(archive.path, errors, buf=archive.buf):
+            if member.in_apk:
+                findings.add(f"nested:{member.path}", True)
+        # Archives that could not be opened, or were skipped for exceeding the size limits
+        for chain, reason in errors:
+            path = '!/'.join(chain[1:]) or os.path.basename(chain[0])
+            findings.add(f"nested:{path}", True)
+            findings.detail(self.name, path, reason)
+
+
+class _DecompiledSourceDetector(Detector):
+    """Runs an external decompiler into a temporary directory and reports the entropy of its output."""
+
+    default = False
+    extension = None
+
+    def command(self, apk_path, output_dir):
+        raise NotImplementedError
+
+    def scan(self, archive, findings):
+        with tempfile.TemporaryDirectory() as output_dir:
+            try:
+                subprocess.run(self.command(archive.path, output_dir), capture_output=True, check=False)
+            except FileNotFoundError as e:
+                findings.error(self.name, f"decompiler not found: {e.filename}")
+                return
+            for root, _, files in os.walk(output_dir):
+                for file in files:
+                    if not file.endswith(self.extension):
+                        continue
+                    path = os.path.join(root, file)
+                    with open(path, 'rb') as f:
+                        file_entropy = calculate_entropy(f.read())
+                    resource = f"{self.name}:{os.path.relpath(path, output_dir)}"
+                    findings.add(resource, self.profile.is_anomalous(file, file_entropy), file_entropy)
+
+
+@register
+class JavaDetector(_DecompiledSourceDetector):
+    name = 'java'
+    description = "entropy of jadx-decompiled Java sources (needs jadx)"
+    extension = '.java'
+
+    def command(self, apk_path, output_dir):
+        return ['jadx', apk_path, '-d', output_dir]
+
+
+@register
+class SmaliDetector(_DecompiledSourceDetector):
+    name = 'smali'
+    description = "entropy of apktool-disassembled smali (needs apktool)"
+    extension = '.smali'
+
+    def command(self, apk_path, output_dir):
+        return ['apktool', 'd', '-f', apk_path, '-o', output_dir]
+
+
+def method_entropies(archive):
+    """[(dex name, method, entropy)] for every method with code, shared by the methods and StagNet detectors."""
+    def compute():
+        from androguard.core.bytecodes.dvm import DalvikVMFormat
+
+        entropies = []
+        for dex_name in archive.dex_names():
+            dvm = DalvikVMFormat(archive.read(dex_name))
+            for method in dvm.get_methods():
+                code = method.get_code()
+                if code:
+                    method_name = f"{method.get_class_name()}->{method.get_name()}{method.get_descriptor()}"
+                    entropies.append((dex_name, method_name, calculate_entropy(code.get_bc().get_raw())))
+        return entropies
+    return archive.cached('method_entropies', compute)
+
+
+@register
+class MethodsDetector(Detector):
+    name = 'methods'
+    description = "entropy of each method's bytecode (needs androguard)"
+    default = False
+    requires = ('androguard',)
+
+    def scan(self, archive, findings):
+        entropies = method_entropies(archive)
+        findings.detail(self.name, 'methods', len(entropies))
+        for dex_name, method_name, method_entropy in entropies:
+            # Only anomalous methods get a row; an app has far too many to list them all
+            if self.profile.is_anomalous(None, method_entropy):
+                findings.add(f"method:{dex_name}:{method_name}", True, method_entropy)
+
+
+@register
+class StagNetDetector(Detector):
+    name = 'stagnet'
+    description = "StagNet prediction from certificate, manifest, DEX and method entropy flags (needs torch, androguard)"
+    default = False
+    requires = ('torch', 'androguard')
+
+    def __init__(self, profile=None):
+        super().__init__(profile)
+        self.model = None
+
+    def features(self, archive):
+        profile = self.profile
+        certificate = any(
+            profile.is_anomalous(entry.name, archive.entropy(entry.name)) for entry in archive.entries
+            if is_signature_block(entry.name)
+        )
+        manifest_xml = archive.manifest_xml
+        manifest = manifest_xml is not None and profile.is_anomalous(
+            archive_module.MANIFEST_NAME, calculate_entropy(manifest_xml))
+        dex = any(profile.is_anomalous(name, archive.entropy(name)) for name in archive.dex_names())
+        methods = any(profile.is_anomalous(None, entropy) for _, _, entropy in method_entropies(archive))
+        return [float(certificate), float(manifest), float(dex), float(methods)]
+
+    def scan(self, archive, findings):
+        import torch
+        import stagnet
+
+        if self.model is None:
+            # Built once per worker instead of once per APK
+            self.model = stagnet.StagNet()
+            self.model.eval()
+        features = self.features(archive)
+        with torch.no_grad():
+            prediction = self.model(torch.tensor(features, dtype=torch.float32).view(1, 1, 4)).item()
+        findings.detail(self.name, 'features', features)
+        findings.detail(self.name, 'prediction', prediction)
+        findings.add('stagnet:prediction', prediction > 0.5)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import mmap
+import struct
+import zlib
+
+import filetype
+import zip_layout
+from entropy import calculate_entropy_range
+
+SHT_NOBITS = 8
+SHF_EXECINSTR = 0x4
+PT_LOAD = 1
+PF_X = 0x1
+PF_W = 0x2
+
+PACKED_ENTROPY = 7.2
+
+# Sections a normal toolchain emits; anything else is reported as unusual
+KNOWN_SECTION_PREFIXES = (
+    '.text', '.rodata', '.data', '.bss', '.tdata', '.tbss', '.init', '.fini', '.preinit_array',
+    '.rel', '.rela', '.relr', '.dynsym', '.dynstr', '.dynamic', '.hash', '.gnu', '.got', '.plt',
+    '.note', '.interp', '.eh_frame', '.gcc_except_table', '.ARM', '.comment', '.symtab', '.strtab',
+    '.shstrtab', '.debug', '.zdebug', '.llvm', '.android', '.sdata', '.sbss', '.ctors', '.dtors',
+    '.jcr', '.tm_clone_table', '.fini_array', '.init_array', '.stapsdt', '__lcxx_override',
+)
+# Sections that are compressed by design, so high entropy means nothing
+COMPRESSED_SECTIONS = ('.gnu_debugdata', '.zdebug')
+
+_library_cache = {}
+
+
+class ElfError(Exception):
+    """Raised when an ELF header cannot be parsed."""
+
+
+def _formats(elf_class, endian):
+    prefix = '<' if endian == 1 else '>'
+    if elf_class == 2:
+        return prefix + 'HHIQQQIHHHHHH', prefix + 'IIQQQQIIQQ', prefix + 'IIQQQQQQ'
+    return prefix + 'HHIIIIIHHHHHH', prefix + 'IIIIIIIIII', prefix + 'IIIIIIII'
+
+
+def _section_name(buf, base, size, names_offset, names_size, name_index):
+    if names_offset is None or name_index >= names_size:
+        return ''
+    start = base + names_offset + name_index
+    end = buf.find(b'\x00', start, base + min(names_offset + names_size, size))
+    return bytes(buf[start:end if end >= 0 else start]).decode('ascii', errors='replace')
+
+
+def analyze_elf(buf, base=0, size=None):
+    """Per-section and per-segment entropy of the ELF image at buf[base:base + size]."""
+    size = len(buf) - base if size is None else size
+    if size < 52 or buf[base:base + 4] != b'\x7fELF':
+        raise ElfError("Not an ELF image")
+    elf_class, endian = buf[base + 4], buf[base + 5]
+    if elf_class not in (1, 2) or endian not in (1, 2):
+        raise ElfError("Unknown ELF class or byte order")
+    header_format, section_format, segment_format = _formats(elf_class, endian)
+    (_, _, _, _, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum, shstrndx) = struct.unpack_from(
+        header_format, buf, base + 16
+    )
+
+    result = {'size': size, 'sections': [], 'segments': [], 'flags': []}
+
+    for i in range(phnum):
+        offset = phoff + i * phentsize
+        if offset + struct.calcsize(segment_format) > size:
+            result['flags'].append('truncated_program_headers')
+            break
+        fields = struct.unpack_from(segment_format, buf, base + offset)
+        if elf_class == 2:
+            p_type, p_flags, p_offset, _, _, p_filesz = fields[:6]
+        else:
+            p_type, p_offset, _, _, p_filesz, _, p_flags = fields[:7]
+        if p_type != PT_LOAD:
+            continue
+        length = max(0, min(p_filesz, size - p_offset))
+        segment = {
+            'offset': p_offset,
+            'size': p_filesz,
+            'executable': bool(p_flags & PF_X),
+            'writable': bool(p_flags & PF_W),
+            'entropy': calculate_entropy_range(buf, base + p_offset, length) if p_offset < size else 0.0,
+        }
+        result['segments'].append(segment)
+        if segment['executable'] and segment['writable']:
+            result['flags'].append('writable_executable_segment')
+        if segment['executable'] and segment['entropy'] > PACKED_ENTROPY:
+            result['flags'].append('packed_executable_segment')
+
+    # Packers commonly wipe the section headers; the loader only needs the segments
+    if shnum == 0 or shoff == 0 or shoff + shnum * shentsize > size:
+        result['flags'].append('missing_section_headers')
+        return result
+
+    headers = [struct.unpack_from(section_format, buf, base + shoff + i * shentsize) for i in range(shnum)]
+    names_offset = names_size = None
+    if shstrndx < shnum:
+        names_offset, names_size = headers[shstrndx][4], headers[shstrndx][5]
+
+    for sh_name, sh_type, sh_flags, _, sh_offset, sh_size, *_ in headers:
+        name = _section_name(buf, base, size, names_offset, names_size or 0, sh_name)
+        section = {'name': name, 'type': sh_type, 'offset': sh_offset, 'size': sh_size, 'entropy': None, 'flags': []}
+        if sh_type != SHT_NOBITS and sh_size:
+            if sh_offset + sh_size > size:
+                section['flags'].append('out_of_bounds')
+            else:
+                section['entropy'] = calculate_entropy_range(buf, base + sh_offset, sh_size)
+                if section['entropy'] > PACKED_ENTROPY and not name.startswith(COMPRESSED_SECTIONS):
+                    section['flags'].append('packed')
+        if sh_flags & SHF_EXECINSTR and not name.startswith(('.text', '.init', '.fini', '.plt', '__lcxx_override')):
+            section['flags'].append('unusual_executable')
+        if name and not name.startswith(KNOWN_SECTION_PREFIXES):
+            section['flags'].append('unusual_name')
+        result['sections'].append(section)
+        result['flags'].extend(f"{flag}:{name}" for flag in section['flags'])
+    return result
+
+
+def content_hash(buf, offset, size, block_size=1024 * 1024):
+    """SHA-256 of buf[offset:offset + size], hashed in bounded blocks."""
+    digest = hashlib.sha256()
+    for start in range(offset, offset + size, block_size):
+        digest.update(buf[start:min(start + block_size, offset + size)])
+    return digest.hexdigest()
+
+
+def analyze_library(buf, offset, size):
+    """analyze_elf with results cached by content hash, since the same libraries recur across APKs."""
+    digest = content_hash(buf, offset, size)
+    if digest not in _library_cache:
+        report = analyze_elf(buf, offset, size)
+        report['sha256'] = digest
+        _library_cache[digest] = report
+    return _library_cache[digest]
+
+
+def _analyze_entry(buf, local_offset, compressed_size, method):
+    """Report for one zip entry of the mapped APK, or None if it is not an ELF image."""
+    data_offset, _ = zip_layout.local_record_span(buf, local_offset, compressed_size)
+    if method == 0:
+        # Stored libraries (extractNativeLibs=false) are analysed in place
+        if filetype.classify_bytes(buf[data_offset:data_offset + filetype.HEAD_SIZE]) != 'elf':
+            return None
+        return analyze_library(buf, data_offset, compressed_size)
+    if method == 8:
+        peek = buf[data_offset:data_offset + min(compressed_size, 4096)]
+        if filetype.classify_bytes(zlib.decompressobj(-15).decompress(peek, filetype.HEAD_SIZE)) != 'elf':
+            return None
+        data = zip_layout.read_entry(buf, local_offset, compressed_size, method)
+        return analyze_library(data, 0, len(data))
+    return None
+
+
+def analyze_entry(buf, local_offset, compressed_size, method):
+    """Report for one zip entry, None if it is not an ELF image, or a malformed_elf report."""
+    try:
+        return _analyze_entry(buf, local_offset, compressed_size, method)
+    except (ElfError, struct.error, zlib.error, zip_layout.ZipLayoutError) as e:
+        return {'error': str(e), 'flags': ['malformed_elf']}
+
+
+def analyze_data(data):
+    """Report for an entry's uncompressed data, None if it is not an ELF image, or a malformed_elf report."""
+    if filetype.classify_bytes(data[:filetype.HEAD_SIZE]) != 'elf':
+        return None
+    try:
+        return analyze_library(data, 0, len(data))
+    except (ElfError, struct.error) as e:
+        return {'error': str(e), 'flags': ['malformed_elf']}
+
+
+def analyze_apk_libraries(apk_path):
+    """Return {entry name: report} for every ELF entry of the APK, read from one mmap."""
+    reports = {}
+    with open(apk_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            cd_offset, cd_size, shift = zip_layout.find_central_directory(buf)
+            for name, local_offset, compressed_size, method in zip_layout.iter_central_directory(buf, cd_offset, cd_size):
+                report = analyze_entry(buf, local_offset + shift, compressed_size, method)
+                if report is not None:
+                    reports[name] = report
+    return reports
+
+
+def save_cache(path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(_library_cache, file)
+
+
+def load_cache(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        _library_cache.update(json.load(file))
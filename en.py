@@ -1,13 +1,15 @@
-import pandas as pd
 import os
 
-# Load CSV file
-df = pd.read_csv("smswares.csv")
+import csv_ingest
+
+# Load CSV file with the result schema applied while parsing
+df = csv_ingest.read_result_csv("smswares.csv")
 
 # Extract file extensions
-df["file_extension"] = df["file_resource"].apply(lambda x: os.path.splitext(x)[1].lower() if "." in os.path.basename(x) else "none")
+# (once per distinct file name, since the column is categorical)
+df["file_extension"] = df["file_resource"].map(lambda x: os.path.splitext(x)[1].lower() if "." in os.path.basename(x) else "none")
 
 # Save the modified CSV
-df.to_csv("entropy_data_with_extensions.csv", index=False)
+csv_ingest.to_result_csv(df, "entropy_data_with_extensions.csv")
 
 print(df.head())  # Preview results
@@ -0,0 +1,39 @@
+import hashlib
+
+import filetype
+
+# Only this many leading bytes are handed to chardet
+DEFAULT_SAMPLE_SIZE = 4096
+
+_encoding_cache = {}
+
+
+def is_known_binary(file_data):
+    """Return True if the data starts with the magic bytes of a binary format."""
+    return filetype.classify_bytes(file_data[:filetype.HEAD_SIZE]) in filetype.BINARY_TYPES
+
+
+def detect_encoding(file_data, sample_size=DEFAULT_SAMPLE_SIZE, content_hash=None):
+    """Guess the text encoding of a bounded prefix of the data, or None for binaries.
+
+    Guesses are cached by content_hash when the caller already has a digest of the data,
+    otherwise by a digest of the sample, so the rest of the entry is never hashed.
+    """
+    if not file_data or is_known_binary(file_data):
+        return None
+
+    sample = bytes(file_data[:sample_size])
+    key = content_hash if content_hash is not None else (sample_size, hashlib.sha256(sample).digest())
+    if key in _encoding_cache:
+        return _encoding_cache[key]
+
+    import chardet  # Only needed when the stage is enabled
+
+    encoding = chardet.detect(sample)['encoding']
+    _encoding_cache[key] = encoding
+    return encoding
+
+
+def clear_cache():
+    """Forget all cached encodings."""
+    _encoding_cache.clear()
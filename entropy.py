@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def byte_histogram(data):
+    """Counts of each byte value; accepts bytes, memoryview or mmap without copying."""
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+
+
+def calculate_entropy(data):
+    """Calculates the Shannon entropy (bits per byte) of the given data."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if len(data) == 0:
+        return 0.0
+    counts = byte_histogram(data)
+    prob = counts[counts > 0] / len(data)
+    return float(np.sum(prob * np.log2(1 / prob)))
+
+
+def calculate_entropy_range(buf, offset, size):
+    """Entropy of buf[offset:offset + size], read in place without slicing a copy."""
+    if size <= 0:
+        return 0.0
+    counts = np.bincount(np.frombuffer(buf, dtype=np.uint8, count=size, offset=offset), minlength=256)
+    prob = counts[counts > 0] / size
+    return float(np.sum(prob * np.log2(1 / prob)))
+
+
+def row_entropy(matrix):
+    """Shannon entropy of each row of a 2-D array, treating the row as a distribution over its columns.
+
+    Computed in float32 with whole-matrix operations; rows with negative values give NaN.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prob = matrix / matrix.sum(axis=1, keepdims=True, dtype=np.float32)
+        # Epsilon keeps log2(0) finite; zero probabilities contribute nothing
+        terms = prob * np.log2(prob + np.float32(np.finfo(np.float32).tiny))
+        return -terms.sum(axis=1, dtype=np.float32)
@@ -0,0 +1,95 @@
+import os
+
+# Bytes needed to tell every known format apart
+HEAD_SIZE = 16
+
+# (offset, magic, file type); first match wins
+MAGIC_TABLE = (
+    (0, b'dex\n', 'dex'),
+    (0, b'\x7fELF', 'elf'),
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'\xff\xd8\xff', 'jpeg'),
+    (0, b'GIF87a', 'gif'),
+    (0, b'GIF89a', 'gif'),
+    (8, b'WEBP', 'webp'),
+    (8, b'WAVE', 'wav'),
+    (0, b'OggS', 'ogg'),
+    (0, b'ID3', 'mp3'),
+    (4, b'ftyp', 'mp4'),
+    (0, b'\x03\x00\x08\x00', 'axml'),
+    (0, b'\x02\x00\x0c\x00', 'arsc'),
+    (0, b'Signature-Version', 'signature_file'),
+    (0, b'Manifest-Version', 'jar_manifest'),
+)
+
+BINARY_TYPES = frozenset((
+    'dex', 'elf', 'zip', 'png', 'jpeg', 'gif', 'webp', 'wav', 'ogg', 'mp3',
+    'mp4', 'axml', 'arsc', 'pkcs7',
+))
+IMAGE_TYPES = frozenset(('png', 'jpeg', 'gif', 'webp'))
+MEDIA_TYPES = frozenset(('mp3', 'mp4', 'ogg', 'wav'))
+CERTIFICATE_TYPES = frozenset(('pkcs7', 'signature_file'))
+TEXT_TYPES = frozenset(('xml', 'json', 'text', 'signature_file', 'jar_manifest'))
+
+# Types a file extension promises; anything else under that name is disguised
+EXTENSION_TYPES = {
+    '.png': IMAGE_TYPES,
+    '.jpg': IMAGE_TYPES,
+    '.jpeg': IMAGE_TYPES,
+    '.gif': IMAGE_TYPES,
+    '.webp': IMAGE_TYPES,
+    '.mp3': MEDIA_TYPES,
+    '.mp4': MEDIA_TYPES,
+    '.ogg': MEDIA_TYPES,
+    '.wav': MEDIA_TYPES,
+    '.json': frozenset(('json', 'text')),
+    '.txt': TEXT_TYPES,
+}
+
+_PRINTABLE = frozenset(b'\t\n\r' + bytes(range(0x20, 0x7f)))
+
+
+def classify_bytes(head):
+    """Return the content type of data given (at least) its first HEAD_SIZE bytes."""
+    head = bytes(head[:HEAD_SIZE])
+    if not head:
+        return 'empty'
+    for offset, magic, file_type in MAGIC_TABLE:
+        if head.startswith(magic, offset):
+            return file_type
+
+    # DER SEQUENCE with a long-form or indefinite length: PKCS#7 signature blocks
+    if head[0] == 0x30 and head[1:2] in (b'\x80', b'\x81', b'\x82', b'\x83'):
+        return 'pkcs7'
+
+    if all(byte in _PRINTABLE or byte >= 0x80 for byte in head):
+        stripped = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+        if stripped.startswith(b'<'):
+            return 'xml'
+        if stripped.startswith((b'{', b'[')):
+            return 'json'
+        return 'text'
+    return 'unknown'
+
+
+def classify_entry(zip_file, entry):
+    """Classify a zip entry (name or ZipInfo) by reading only its first bytes."""
+    with zip_file.open(entry) as f:
+        return classify_bytes(f.read(HEAD_SIZE))
+
+
+def iter_classified_entries(zip_file, file_types=None):
+    """Yield (ZipInfo, file type) for every entry, optionally only those of the given types."""
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        file_type = classify_entry(zip_file, info)
+        if file_types is None or file_type in file_types:
+            yield info, file_type
+
+
+def is_disguised(file_name, file_type):
+    """True when the content does not match what the file extension promises."""
+    expected = EXTENSION_TYPES.get(os.path.splitext(file_name)[1].lower())
+    return expected is not None and file_type not in expected
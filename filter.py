@@ -1,10 +1,19 @@
 import pandas as pd
 
-# Load the CSV file
-df = pd.read_csv("adwares.csv")
+import result_index
 
-# Filter rows where obfuscation_flag is "Yes"
-filtered_df = df[df["obfuscation_flag"] == "Yes"]
+csv_file = "adwares.csv"
+
+# Fold the CSV into the per-package index (a no-op once it has been indexed unchanged)
+with result_index.ResultIndex() as index:
+    index.ingest_csv(csv_file)
+
+    # Rows of this CSV where obfuscation_flag is "Yes"; the index also holds other scans' results
+    filtered_df = pd.DataFrame(
+        index.flagged_rows(source=index.csv_source(csv_file)),
+        columns=["package_name", "file_resource", "entropy"],
+    )
+    filtered_df.insert(2, "obfuscation_flag", "Yes")
 
 # Display the filtered rows
 print(filtered_df)
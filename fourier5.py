@@ -4,6 +4,8 @@ import os
 import time
 from concurrent.futures import ThreadPoolExecutor
 
+import dataset_split
+
 def apply_fourier_transform(image_path, output_image_path):
     """
     Apply 2D Fourier Transform to an image and save the result as a PNG.
@@ -26,8 +28,12 @@ def apply_fourier_transform(image_path, output_image_path):
     # Normalize to [0, 255]
     magnitude_spectrum = np.uint8(magnitude_spectrum / np.max(magnitude_spectrum) * 255)
     
-    # Save the magnitude spectrum as a new PNG file
-    cv2.imwrite(output_image_path, magnitude_spectrum)
+    # Save the magnitude spectrum as a new PNG file, carrying over the package the image was rendered from
+    package_name = dataset_split.recorded_package(image_path)
+    if package_name:
+        dataset_split.write_sample_png(magnitude_spectrum, output_image_path, package_name)
+    else:
+        cv2.imwrite(output_image_path, magnitude_spectrum)
     print(f"Fourier Transform applied and saved: {output_image_path}")
     
     # Delete the original image
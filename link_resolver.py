@@ -0,0 +1,224 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+from urllib.parse import quote_plus
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SEARCH_URL = "https://html.duckduckgo.com/html/?q={query}"
+QUERY_TEMPLATE = "apkpure.com {package_name}"
+RESULT_BASE = "https://duckduckgo.com"
+DOWNLOAD_SUFFIX = "/downloading"
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 2.0  # requests per second across all workers
+DEFAULT_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+REQUEST_TIMEOUT = 20
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Seconds a cached "no result" answer is trusted before the package is searched again
+NEGATIVE_TTL = 24 * 60 * 60
+
+
+class ResolveError(Exception):
+    """Raised when a query still fails after all retries."""
+
+
+class _FirstResultParser(HTMLParser):
+    """Collects the href of the first <a class="result__a"> on a DuckDuckGo HTML results page."""
+
+    def __init__(self):
+        super().__init__()
+        self.href = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.href is not None or tag != 'a':
+            return
+        attributes = dict(attrs)
+        if 'result__a' in (attributes.get('class') or '').split():
+            self.href = attributes.get('href')
+
+
+def first_result(html):
+    """Absolute URL of the first search result in the page, or None."""
+    parser = _FirstResultParser()
+    parser.feed(html)
+    href = parser.href
+    if href and href.startswith("/l/"):
+        href = RESULT_BASE + href
+    return href
+
+
+class RateLimiter:
+    """Token bucket shared by all worker threads."""
+
+    def __init__(self, rate, burst=1):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            # Idle time builds up at most `burst` tokens
+            self.next_time = max(self.next_time, now - self.interval * (self.burst - 1))
+            delay = self.next_time - now
+            self.next_time += self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LinkCache:
+    """Resolved URLs kept in an append-only JSON-lines file, so reruns skip finished queries.
+
+    Each answer is stored with the time it was found, so "no result" answers can expire.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.links = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    # Records written before times were kept count as old
+                    self.links[record['package']] = (record['url'], record.get('time', 0.0))
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, package_name):
+        return package_name in self.links
+
+    def get(self, package_name):
+        """(url or None, time it was found), or None when the package was never resolved."""
+        return self.links.get(package_name)
+
+    def put(self, package_name, url):
+        with self.lock:
+            found = time.time()
+            self.links[package_name] = (url, found)
+            self.file.write(json.dumps({'package': package_name, 'url': url, 'time': found}) + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Resolver:
+    """Resolves package names to APKPure download links with concurrent, rate-limited searches.
+
+    All workers share one pooled requests.Session. Failed requests and 429/5xx answers are
+    retried with exponential backoff (honouring Retry-After), and every answer is cached on
+    disk. Links are kept for good; "no result" answers only for negative_ttl seconds, since
+    APKPure may list the package later. search_url can point at a local server for testing.
+    """
+
+    def __init__(self, cache_path="resolved_links.jsonl", search_url=SEARCH_URL, workers=DEFAULT_WORKERS,
+                 rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, timeout=REQUEST_TIMEOUT, negative_ttl=NEGATIVE_TTL):
+        self.search_url = search_url
+        self.negative_ttl = negative_ttl
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.cache = LinkCache(cache_path)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = "Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/128.0"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
+
+    def _get(self, url):
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.text
+                if response.status_code not in RETRY_STATUSES:
+                    raise ResolveError(f"HTTP {response.status_code} for {url}")
+                retry_after = response.headers.get('Retry-After')
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = repr(e)
+            if attempt == self.retries:
+                break
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            time.sleep(delay)
+        raise ResolveError(f"{url}: {error} after {self.retries + 1} attempts")
+
+    def search(self, query):
+        """First result URL for a search query, or None."""
+        return first_result(self._get(self.search_url.format(query=quote_plus(query))))
+
+    def resolve(self, package_name, refresh=False):
+        """Download link for one package, or None when the search has no result.
+
+        A cached "no result" is answered without searching until it expires, or never when
+        refresh is set.
+        """
+        cached = self.cache.get(package_name)
+        if cached is not None:
+            url, found = cached
+            if url is not None or (not refresh and time.time() - found < self.negative_ttl):
+                return url
+        result = self.search(QUERY_TEMPLATE.format(package_name=package_name))
+        url = result + DOWNLOAD_SUFFIX if result else None
+        self.cache.put(package_name, url)
+        return url
+
+    def resolve_all(self, package_names, refresh=None):
+        """Yield (package name, url or None, error or None) as queries finish.
+
+        Names are drawn from the iterable only as workers free up, so it may be a lazy
+        source such as a queue being claimed from. refresh(package name), called in the
+        calling thread, says whether a cached "no result" is searched again.
+        """
+        package_names = iter(package_names)
+        with ThreadPoolExecutor(self.workers) as executor:
+            running = {}
+
+            def submit_next():
+                package_name = next(package_names, None)
+                if package_name is not None:
+                    again = refresh is not None and refresh(package_name)
+                    running[executor.submit(self.resolve, package_name, again)] = package_name
+                return package_name is not None
+
+            for _ in range(self.workers * 2):
+                if not submit_next():
+                    break
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    package_name = running.pop(future)
+                    try:
+                        yield package_name, future.result(), None
+                    except ResolveError as e:
+                        yield package_name, None, str(e)
+                    submit_next()
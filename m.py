@@ -1,18 +1,23 @@
-import hashlib
 import os
 import base64
 import subprocess
 import xml.etree.ElementTree as ET
 import math
-import chardet
 import csv
 from zipfile import ZipFile
-from androguard.core.bytecodes.apk import APK  # Import Androguard to extract the package name
+import apksig
+import axml
+import baseline
+import filetype
+import rules
 
 # CSV file setup
 csv_file = "obfuscation_analysis.csv"
 csv_columns = ['package_name', 'file_resource', 'obfuscation_flag', 'entropy']
 
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
+
 def write_to_csv(data):
     """Writes detection data to CSV."""
     with open(csv_file, mode='a', newline='', encoding='utf-8') as file:
@@ -20,13 +25,15 @@ def write_to_csv(data):
         writer.writerow(data)
 
 def extract_package_name(apk_path):
-    """Extracts the package name from the APK file using Androguard."""
-    apk = APK(apk_path)  # Load the APK file
-    package_name = apk.get_package()  # Extract the package name
-    return package_name
+    """Extracts the package name from the APK's binary manifest."""
+    with ZipFile(apk_path) as zip_file:
+        manifest = axml.parse(zip_file.read('AndroidManifest.xml'))  # Decode the manifest in-process
+    return axml.manifest_package(manifest)
 
 def detect_encoding(file_data):
     """Detect the encoding of the given file data."""
+    import chardet  # Only needed when encodings are detected
+
     result = chardet.detect(file_data)
     encoding = result['encoding']
     confidence = result['confidence']
@@ -51,16 +58,19 @@ def calculate_entropy(data):
 
 # 2. Certificate Obfuscation Detection and Steganography
 def get_certificate_fingerprint(apk_path):
-    with ZipFile(apk_path) as zip_file:
-        for file_name in zip_file.namelist():
-            if file_name.lower().endswith('cert') or file_name.lower().endswith('sf'):
-                cert_data = zip_file.read(file_name)
-                cert_hash = hashlib.sha256(cert_data).hexdigest()
-                cert_entropy = calculate_entropy(cert_data)
-                obfuscation_flag = "Yes" if cert_entropy > 7.5 else "No"
-                package_name = extract_package_name(apk_path)  # Extract package name
-                write_to_csv([package_name, file_name, obfuscation_flag, cert_entropy])  # Use package name in CSV
-                return cert_hash
+    try:
+        signers = apksig.get_signer_certificates(apk_path)
+        # Signatures are high-entropy by design; the anomaly is signers that key rotation does not explain
+        obfuscation_flag = "Yes" if apksig.schemes_disagree(signers) else "No"
+        package_name = extract_package_name(apk_path)  # Extract package name
+        for scheme, certificates in signers.items():
+            for cert in certificates:
+                # Signer rows carry no entropy measurement, so the cell stays empty
+                write_to_csv([package_name, f"{scheme}:{cert['sha256']}", obfuscation_flag, ''])
+        signer = apksig.primary_signer(signers)
+        return signer['sha256'] if signer else None
+    except Exception as e:
+        print(f"Error processing certificate: {e}")
     return None
 
 def detect_steganography_certificate_fingerprint(apk_path):
@@ -76,9 +86,8 @@ def extract_manifest(apk_path):
             if file_name.lower() == 'androidmanifest.xml':
                 manifest_data = zip_file.read(file_name)
                 try:
-                    manifest_data = manifest_data.decode('utf-8')  # Decode the byte data to string
-                    return manifest_data
-                except UnicodeDecodeError:
+                    return axml.decode_xml(manifest_data)  # Binary AXML to XML text
+                except (axml.AXMLError, UnicodeDecodeError):
                     return None
     return None
 
@@ -86,7 +95,7 @@ def detect_obfuscated_manifest(manifest_data, apk_path):
     if manifest_data is None:
         return False
     manifest_entropy = calculate_entropy(manifest_data.encode('utf-8'))
-    obfuscation_flag = "Yes" if manifest_entropy > 7.5 else "No"
+    obfuscation_flag = "Yes" if profile.is_anomalous("AndroidManifest.xml", manifest_entropy) else "No"
     package_name = extract_package_name(apk_path)  # Extract package name
     write_to_csv([package_name, 'AndroidManifest.xml', obfuscation_flag, manifest_entropy])  # Use package name in CSV
 
@@ -104,7 +113,7 @@ def detect_obfuscated_code(java_code_folder, apk_path):
                 with open(os.path.join(root, file), 'r') as f:
                     content = f.read()
                     file_entropy = calculate_entropy(content)
-                    obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                    obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                     package_name = extract_package_name(apk_path)  # Extract package name
                     write_to_csv([package_name, file, obfuscation_flag, file_entropy])  # Use package name in CSV
 
@@ -121,37 +130,34 @@ def detect_steganography_dex(apk_path):
 # 5. Media File Obfuscation with Steganography Detection
 def detect_media_obfuscation(apk_path):
     with ZipFile(apk_path) as zip_file:
-        for file_name in zip_file.namelist():
-            if file_name.lower().endswith(('.mp3', '.mp4', '.ogg')):
-                media_data = zip_file.read(file_name)
-                media_entropy = calculate_entropy(media_data)
-                obfuscation_flag = "Yes" if media_entropy > 7.5 else "No"
-                package_name = extract_package_name(apk_path)  # Extract package name
-                write_to_csv([package_name, file_name, obfuscation_flag, media_entropy])  # Use package name in CSV
+        for info, _ in filetype.iter_classified_entries(zip_file, filetype.MEDIA_TYPES):
+            file_name = info.filename
+            media_data = zip_file.read(info)
+            media_entropy = calculate_entropy(media_data)
+            obfuscation_flag = "Yes" if profile.is_anomalous(file_name, media_entropy) else "No"
+            package_name = extract_package_name(apk_path)  # Extract package name
+            write_to_csv([package_name, file_name, obfuscation_flag, media_entropy])  # Use package name in CSV
 
 def detect_steganography_media(apk_path):
     detect_media_obfuscation(apk_path)
 
 # 6. Permission Analysis and Steganography Detection
 def analyze_permissions(apk_path):
-    suspicious_permissions = [
-        'ACCESS_FINE_LOCATION', 'READ_SMS', 'WRITE_SMS', 'INTERNET', 
-        'ACCESS_COARSE_LOCATION', 'READ_CONTACTS', 'SEND_SMS', 'WRITE_EXTERNAL_STORAGE'
-    ]
+    permission_rules = rules.load_rules()  # Suspicious permissions come from rules.json
     manifest_data = extract_manifest(apk_path)
     if manifest_data is None:
         return False
     
     manifest_entropy = calculate_entropy(manifest_data.encode('utf-8'))
-    obfuscation_flag = "Yes" if manifest_entropy > 7.5 else "No"
+    obfuscation_flag = "Yes" if profile.is_anomalous("AndroidManifest.xml", manifest_entropy) else "No"
     package_name = extract_package_name(apk_path)  # Extract package name
     write_to_csv([package_name, 'permissions', obfuscation_flag, manifest_entropy])  # Use package name in CSV
 
     tree = ET.ElementTree(ET.fromstring(manifest_data))
     root = tree.getroot()
     for elem in root.iter('uses-permission'):
-        permission_name = elem.attrib.get('android:name')
-        if permission_name and any(perm in permission_name for perm in suspicious_permissions):
+        permission_name = elem.attrib.get(axml.ANDROID_NAME)
+        if permission_name and permission_rules.suspicious_permission(permission_name):
             print(f"Suspicious permission found: {permission_name}")
             write_to_csv([package_name, permission_name, 'Yes', 0])  # 0 entropy for permissions
 
@@ -161,7 +167,7 @@ def extract_file_hashes(apk_path):
         for file_name in zip_file.namelist():
             file_data = zip_file.read(file_name)
             file_entropy = calculate_entropy(file_data)
-            obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+            obfuscation_flag = "Yes" if profile.is_anomalous(file_name, file_entropy) else "No"
             package_name = extract_package_name(apk_path)  # Extract package name
             write_to_csv([package_name, file_name, obfuscation_flag, file_entropy])  # Use package name in CSV
 
@@ -173,7 +179,7 @@ def analyze_apk_files(apk_path):
         for file_name in zip_file.namelist():
             file_data = zip_file.read(file_name)
             file_entropy = calculate_entropy(file_data)
-            obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+            obfuscation_flag = "Yes" if profile.is_anomalous(file_name, file_entropy) else "No"
             write_to_csv([package_name, file_name, obfuscation_flag, file_entropy])  # Use package name in CSV
 
 # 9. Smali Code Obfuscation Detection
@@ -187,7 +193,7 @@ def detect_smali_obfuscation(apk_path):
                 with open(os.path.join(root, file), 'r') as f:
                     content = f.read()
                     file_entropy = calculate_entropy(content)
-                    obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                    obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                     package_name = extract_package_name(apk_path)  # Extract package name
                     write_to_csv([package_name, file, obfuscation_flag, file_entropy])  # Use package name in CSV
 
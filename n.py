@@ -1,14 +1,16 @@
-import hashlib
 import os
 import base64
 import subprocess
 import xml.etree.ElementTree as ET
 import math
-import csv
 from zipfile import ZipFile
-from androguard.core.bytecodes.apk import APK
-from multiprocessing import Pool, cpu_count, get_context
-from concurrent.futures import ThreadPoolExecutor
+import apksig
+import axml
+import baseline
+import result_index
+import scan_journal
+import worker_context
+from multiprocessing import cpu_count
 
 # Directories
 apk_directory = "app"
@@ -17,26 +19,27 @@ csv_file = "obfuscation_analysis.csv"
 
 csv_columns = ['package_name', 'file_resource', 'obfuscation_flag', 'entropy']
 
-# ThreadPool Executor for I/O operations
-thread_pool = ThreadPoolExecutor(max_workers=5)
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
 
+# Digests committed by earlier runs, set in each worker by init_worker
+done_digests = frozenset()
 
-def write_to_csv(data):
-    """Writes detection data to CSV using a separate thread."""
-    thread_pool.submit(_write_to_csv, data)
+# Rows of the APK this worker is analyzing; the main process commits them through the journal
+pending_rows = []
 
 
-def _write_to_csv(data):
-    with open(csv_file, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(data)
+def write_to_csv(data):
+    """Buffers detection data until the APK's results are committed."""
+    pending_rows.append(data)
 
 
 def extract_package_name(apk_path):
-    """Extracts the package name from the APK file using Androguard."""
+    """Extracts the package name from the APK's binary manifest."""
     try:
-        apk = APK(apk_path)
-        return apk.get_package()
+        with ZipFile(apk_path) as zip_file:
+            manifest = axml.parse(zip_file.read('AndroidManifest.xml'))
+        return axml.manifest_package(manifest)
     except Exception as e:
         print(f"Error extracting package name: {e}")
         return "Unknown"
@@ -57,15 +60,16 @@ def calculate_entropy(data):
 
 def get_certificate_fingerprint(apk_path):
     try:
-        with ZipFile(apk_path) as zip_file:
-            for file_name in zip_file.namelist():
-                if file_name.lower().endswith(('cert', 'sf')):
-                    cert_data = zip_file.read(file_name)
-                    cert_entropy = calculate_entropy(cert_data)
-                    obfuscation_flag = "Yes" if cert_entropy > 7.5 else "No"
-                    package_name = extract_package_name(apk_path)
-                    write_to_csv([package_name, file_name, obfuscation_flag, cert_entropy])
-                    return hashlib.sha256(cert_data).hexdigest()
+        signers = apksig.get_signer_certificates(apk_path)
+        # Signatures are high-entropy by design; the anomaly is signers that key rotation does not explain
+        obfuscation_flag = "Yes" if apksig.schemes_disagree(signers) else "No"
+        package_name = extract_package_name(apk_path)
+        for scheme, certificates in signers.items():
+            for cert in certificates:
+                # Signer rows carry no entropy measurement, so the cell stays empty
+                write_to_csv([package_name, f"{scheme}:{cert['sha256']}", obfuscation_flag, ''])
+        signer = apksig.primary_signer(signers)
+        return signer['sha256'] if signer else None
     except Exception as e:
         print(f"Error processing certificate: {e}")
     return None
@@ -76,7 +80,7 @@ def extract_manifest(apk_path):
         with ZipFile(apk_path) as zip_file:
             for file_name in zip_file.namelist():
                 if file_name.lower() == 'androidmanifest.xml':
-                    return zip_file.read(file_name).decode(errors='ignore')
+                    return axml.decode_xml(zip_file.read(file_name))
     except Exception as e:
         print(f"Error extracting manifest: {e}")
     return None
@@ -86,7 +90,7 @@ def detect_obfuscated_manifest(apk_path):
     manifest_data = extract_manifest(apk_path)
     if manifest_data:
         manifest_entropy = calculate_entropy(manifest_data)
-        obfuscation_flag = "Yes" if manifest_entropy > 7.5 else "No"
+        obfuscation_flag = "Yes" if profile.is_anomalous("AndroidManifest.xml", manifest_entropy) else "No"
         package_name = extract_package_name(apk_path)
         write_to_csv([package_name, 'AndroidManifest.xml', obfuscation_flag, manifest_entropy])
 
@@ -106,7 +110,7 @@ def detect_smali_obfuscation(apk_path):
                 with open(os.path.join(root, file), 'r', errors='ignore') as f:
                     content = f.read()
                     file_entropy = calculate_entropy(content)
-                    obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                    obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                     package_name = extract_package_name(apk_path)
                     write_to_csv([package_name, file, obfuscation_flag, file_entropy])
 
@@ -121,7 +125,7 @@ def analyze_java_code(apk_path):
                     with open(os.path.join(root, file), 'r', errors='ignore') as f:
                         content = f.read()
                         file_entropy = calculate_entropy(content)
-                        obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                        obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                         package_name = extract_package_name(apk_path)
                         write_to_csv([package_name, file, obfuscation_flag, file_entropy])
     except subprocess.CalledProcessError as e:
@@ -129,7 +133,12 @@ def analyze_java_code(apk_path):
 
 
 def analyze_apk(apk_path):
-    """Process each APK in parallel."""
+    """Process each APK in parallel and return (apk_path, digest, rows), or None if already done."""
+    digest = scan_journal.file_digest(apk_path)
+    if digest in done_digests:
+        print(f"Skipping {apk_path}: identical APK already analyzed")
+        return None
+    pending_rows.clear()
     print(f"Processing: {apk_path}")
     package_name = extract_package_name(apk_path)
     print(f"Package Name: {package_name}")
@@ -140,6 +149,12 @@ def analyze_apk(apk_path):
     analyze_java_code(apk_path)
 
     print(f"Completed {apk_path}")
+    return apk_path, digest, list(pending_rows)
+
+
+def init_worker(digests):
+    global done_digests
+    done_digests = digests
 
 
 def cleanup():
@@ -150,26 +165,26 @@ def cleanup():
 
 
 def main():
-    """Main function to run parallel APK analysis."""
-    with open(csv_file, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(csv_columns)
-
+    """Main function to run parallel APK analysis, resuming after the last committed APK."""
     if not os.path.exists(apk_directory):
         print(f"APK directory '{apk_directory}' not found.")
         return
 
-    apk_files = [os.path.join(apk_directory, f) for f in os.listdir(apk_directory) if f.endswith('.apk')]
-
-    if not apk_files:
-        print("No APKs found for analysis.")
-        return
-
-    # Use multiprocessing with spawn mode for macOS compatibility
-    num_workers = min(10, cpu_count())  # Use up to 10 workers or available CPU cores
-    ctx = get_context("spawn")  # macOS compatibility
-    with ctx.Pool(num_workers) as pool:
-        pool.map(analyze_apk, apk_files)
+    with result_index.ResultIndex() as index, scan_journal.ScanJournal(csv_file, csv_columns, index=index) as journal:
+        apk_files = [os.path.join(apk_directory, f) for f in os.listdir(apk_directory) if f.endswith('.apk')]
+        apk_files = [apk_file for apk_file in apk_files if not journal.is_done(apk_file)]
+
+        if not apk_files:
+            print("No APKs left for analysis.")
+            return
+
+        num_workers = min(10, cpu_count())  # Use up to 10 workers or available CPU cores
+        # Workers fork from a server that has already imported this script and loaded the profile
+        ctx = worker_context.worker_context(['__main__'])
+        with ctx.Pool(num_workers, initializer=init_worker, initargs=(frozenset(journal.digests),)) as pool:
+            for result in pool.imap_unordered(analyze_apk, apk_files):
+                if result is not None:
+                    journal.commit(*result)
 
     cleanup()
 
@@ -1,13 +1,14 @@
-import hashlib
 import os
 import base64
 import subprocess
 import xml.etree.ElementTree as ET
 import math
-import chardet
-import csv
 from zipfile import ZipFile
-from androguard.core.bytecodes.apk import APK  # Import Androguard to extract the package name
+import apksig
+import axml
+import baseline
+import result_index
+import scan_journal
 
 # Directory containing APKs
 apk_directory = "apks"
@@ -16,17 +17,22 @@ csv_file = "obfuscation_analysis.csv"
 
 csv_columns = ['package_name', 'file_resource', 'obfuscation_flag', 'entropy']
 
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
+
+# Rows of the APK being analyzed; committed together through the journal
+pending_rows = []
+
 def write_to_csv(data):
-    """Writes detection data to CSV."""
-    with open(csv_file, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(data)
+    """Buffers detection data until the APK's results are committed."""
+    pending_rows.append(data)
 
 def extract_package_name(apk_path):
-    """Extracts the package name from the APK file using Androguard."""
+    """Extracts the package name from the APK's binary manifest."""
     try:
-        apk = APK(apk_path)
-        return apk.get_package()
+        with ZipFile(apk_path) as zip_file:
+            manifest = axml.parse(zip_file.read('AndroidManifest.xml'))
+        return axml.manifest_package(manifest)
     except Exception as e:
         print(f"Error extracting package name: {e}")
         return "Unknown"
@@ -43,15 +49,16 @@ def calculate_entropy(data):
 
 def get_certificate_fingerprint(apk_path):
     try:
-        with ZipFile(apk_path) as zip_file:
-            for file_name in zip_file.namelist():
-                if file_name.lower().endswith('cert') or file_name.lower().endswith('sf'):
-                    cert_data = zip_file.read(file_name)
-                    cert_entropy = calculate_entropy(cert_data)
-                    obfuscation_flag = "Yes" if cert_entropy > 7.5 else "No"
-                    package_name = extract_package_name(apk_path)
-                    write_to_csv([package_name, file_name, obfuscation_flag, cert_entropy])
-                    return hashlib.sha256(cert_data).hexdigest()
+        signers = apksig.get_signer_certificates(apk_path)
+        # Signatures are high-entropy by design; the anomaly is signers that key rotation does not explain
+        obfuscation_flag = "Yes" if apksig.schemes_disagree(signers) else "No"
+        package_name = extract_package_name(apk_path)
+        for scheme, certificates in signers.items():
+            for cert in certificates:
+                # Signer rows carry no entropy measurement, so the cell stays empty
+                write_to_csv([package_name, f"{scheme}:{cert['sha256']}", obfuscation_flag, ''])
+        signer = apksig.primary_signer(signers)
+        return signer['sha256'] if signer else None
     except Exception as e:
         print(f"Error processing certificate: {e}")
     return None
@@ -61,7 +68,7 @@ def extract_manifest(apk_path):
         with ZipFile(apk_path) as zip_file:
             for file_name in zip_file.namelist():
                 if file_name.lower() == 'androidmanifest.xml':
-                    return zip_file.read(file_name).decode(errors='ignore')
+                    return axml.decode_xml(zip_file.read(file_name))
     except Exception as e:
         print(f"Error extracting manifest: {e}")
     return None
@@ -70,7 +77,7 @@ def detect_obfuscated_manifest(apk_path):
     manifest_data = extract_manifest(apk_path)
     if manifest_data:
         manifest_entropy = calculate_entropy(manifest_data)
-        obfuscation_flag = "Yes" if manifest_entropy > 7.5 else "No"
+        obfuscation_flag = "Yes" if profile.is_anomalous("AndroidManifest.xml", manifest_entropy) else "No"
         package_name = extract_package_name(apk_path)
         write_to_csv([package_name, 'AndroidManifest.xml', obfuscation_flag, manifest_entropy])
 
@@ -88,7 +95,7 @@ def detect_smali_obfuscation(apk_path):
                 with open(os.path.join(root, file), 'r', errors='ignore') as f:
                     content = f.read()
                     file_entropy = calculate_entropy(content)
-                    obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                    obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                     package_name = extract_package_name(apk_path)
                     write_to_csv([package_name, file, obfuscation_flag, file_entropy])
 
@@ -102,13 +109,20 @@ def analyze_java_code(apk_path):
                     with open(os.path.join(root, file), 'r', errors='ignore') as f:
                         content = f.read()
                         file_entropy = calculate_entropy(content)
-                        obfuscation_flag = "Yes" if file_entropy > 7.5 else "No"
+                        obfuscation_flag = "Yes" if profile.is_anomalous(file, file_entropy) else "No"
                         package_name = extract_package_name(apk_path)
                         write_to_csv([package_name, file, obfuscation_flag, file_entropy])
     except subprocess.CalledProcessError as e:
         print(f"Error analyzing Java code with JADX: {e}")
 
-def analyze_apk(apk_path):
+def analyze_apk(apk_path, journal):
+    digest = scan_journal.file_digest(apk_path)
+    if journal.is_done(apk_path, digest):
+        # Already committed by an earlier run that crashed before deleting it
+        os.remove(apk_path)
+        print(f"Deleted {apk_path}, results were already committed.")
+        return
+    pending_rows.clear()
     print(f"Processing: {apk_path}")
     package_name = extract_package_name(apk_path)
     print(f"Package Name: {package_name}")
@@ -117,7 +131,8 @@ def analyze_apk(apk_path):
     detect_smali_obfuscation(apk_path)
     analyze_java_code(apk_path)
     cleanup()
-    os.remove(apk_path)  # Remove the APK file after processing
+    # The APK is only removed once its rows and journal entry are on disk
+    journal.commit(apk_path, digest, pending_rows, delete_input=True)
     print(f"Deleted {apk_path} after processing.")
 
 def cleanup():
@@ -127,13 +142,11 @@ def cleanup():
     print("Cleaned up generated files.")
 
 if __name__ == '__main__':
-    with open(csv_file, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(csv_columns)
-    
     if not os.path.exists(apk_directory):
         print(f"APK directory '{apk_directory}' not found.")
     else:
-        for apk_file in os.listdir(apk_directory):
-            if apk_file.endswith('.apk'):
-                analyze_apk(os.path.join(apk_directory, apk_file))
+        # Resumes after the last committed APK instead of truncating the CSV
+        with result_index.ResultIndex() as index, scan_journal.ScanJournal(csv_file, csv_columns, index=index) as journal:
+            for apk_file in os.listdir(apk_directory):
+                if apk_file.endswith('.apk'):
+                    analyze_apk(os.path.join(apk_directory, apk_file), journal)
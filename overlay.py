@@ -0,0 +1,76 @@
+import mmap
+
+import zip_layout
+from entropy import calculate_entropy_range
+
+# Regions smaller than this are alignment slack, not payloads
+MIN_REGION_SIZE = 16
+ENTROPY_THRESHOLD = 7.5
+
+
+def _region(buf, kind, offset, size):
+    return {
+        'kind': kind,
+        'offset': offset,
+        'size': size,
+        'entropy': calculate_entropy_range(buf, offset, size),
+    }
+
+
+def find_overlays(buf):
+    """Return every byte range of a zip/APK buffer that no zip structure accounts for."""
+    eocd_offset, _, _, _, comment_size = zip_layout.find_eocd(buf)
+    # Data prepended to the archive shifts every recorded offset
+    cd_offset, cd_size, shift = zip_layout.find_central_directory(buf)
+
+    covered = [(cd_offset, cd_offset + cd_size), (eocd_offset, eocd_offset + zip_layout.EOCD_SIZE)]
+    regions = []
+
+    signing_block = zip_layout.find_signing_block(buf, cd_offset)
+    if signing_block is not None:
+        block_offset, block_size = signing_block
+        covered.append((block_offset, block_offset + block_size))
+        for pair_id, value_offset, value_size in zip_layout.iter_signing_block_pairs(buf, block_offset, block_size):
+            name = zip_layout.SIGNING_BLOCK_IDS.get(pair_id)
+            if name is None:
+                regions.append(_region(buf, f'signing_block_pair_{pair_id:#010x}', value_offset, value_size))
+            elif name == 'verity_padding' and buf[value_offset:value_offset + value_size].strip(b'\x00'):
+                # Padding must be all zeros; anything else is smuggled data
+                regions.append(_region(buf, 'signing_block_padding', value_offset, value_size))
+
+    for _, local_offset, compressed_size, _ in zip_layout.iter_central_directory(buf, cd_offset, cd_size):
+        _, end = zip_layout.local_record_span(buf, local_offset + shift, compressed_size)
+        covered.append((local_offset + shift, end))
+
+    if comment_size:
+        comment_offset = eocd_offset + zip_layout.EOCD_SIZE
+        covered.append((comment_offset, comment_offset + comment_size))
+        regions.append(_region(buf, 'eocd_comment', comment_offset, comment_size))
+
+    # Whatever lies between the covered ranges is overlay data
+    position = 0
+    for start, end in sorted(covered):
+        if start - position >= MIN_REGION_SIZE:
+            regions.append(_region(buf, 'prefix' if position == 0 else 'gap', position, start - position))
+        position = max(position, end)
+    if len(buf) - position >= MIN_REGION_SIZE:
+        regions.append(_region(buf, 'trailing', position, len(buf) - position))
+    return regions
+
+
+def scan_apk_overlays(apk_path):
+    """Map the APK once and return its overlay regions."""
+    with open(apk_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return find_overlays(buf)
+
+
+def is_suspicious(region):
+    """Data before or after the archive always counts; internal zero padding and plain comments don't."""
+    if region['kind'] in ('prefix', 'trailing'):
+        return True
+    if region['entropy'] == 0.0:
+        return False
+    if region['kind'] == 'eocd_comment':
+        return region['entropy'] > ENTROPY_THRESHOLD
+    return True
@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_QUEUE_PATH = "package_queue.db"
+# Seconds a released package waits before it is handed out again
+RETRY_DELAY = 600
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+SKIPPED = 'skipped'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    reason TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS packages_status ON packages (status);
+"""
+
+
+class PackageQueue:
+    """Durable work queue of package names backed by SQLite.
+
+    Claiming and completing a package touch one row, so progress costs a few hundred bytes of
+    WAL per package instead of a rewrite of the whole list. Several processes (one per device,
+    or the APKPure resolver) can consume the same queue; claims are made in an immediate
+    transaction so no package is handed out twice.
+
+    Packages that failed for a transient reason are released rather than skipped: they stay
+    pending, but are only claimed again once retry_delay seconds have passed, so a run does
+    not spin on a package that keeps failing and the next run picks it up.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, retry_delay=RETRY_DELAY):
+        self.path = path
+        self.retry_delay = retry_delay
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, package_names):
+        """Queue package names that are not in the store yet; return how many were added."""
+        with self.connection:
+            self.connection.execute("BEGIN")
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO packages (name, updated_at) VALUES (?, ?)",
+                ((name, time.time()) for name in package_names),
+            )
+            return self.connection.total_changes - before
+
+    def import_json(self, filename="package_names.json"):
+        """Queue the packages of a package_names.json list (plain list or {"packages": [...]})."""
+        with open(filename, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return self.add(data if isinstance(data, list) else data.get("packages", []))
+
+    def claim(self, owner):
+        """Mark the next pending package as claimed by owner and return its name, or None when drained."""
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            # reason is only set on a pending package by release()
+            row = self.connection.execute(
+                "SELECT name FROM packages WHERE status = ? AND (reason IS NULL OR updated_at <= ?) LIMIT 1",
+                (PENDING, time.time() - self.retry_delay),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE packages SET status = ?, owner = ?, attempts = attempts + 1, updated_at = ? WHERE name = ?",
+                (CLAIMED, owner, time.time(), row[0]),
+            )
+            return row[0]
+
+    def _set_status(self, name, status, reason=None):
+        self.connection.execute(
+            "UPDATE packages SET status = ?, reason = ?, updated_at = ? WHERE name = ?",
+            (status, reason, time.time(), name),
+        )
+
+    def complete(self, name):
+        self._set_status(name, DONE)
+
+    def skip(self, name, reason):
+        """Take a package out of the queue for good (system app, paid, unavailable)."""
+        self._set_status(name, SKIPPED, reason)
+
+    def release(self, name, reason='retry'):
+        """Return a claimed package to the queue after a transient error, to be retried after retry_delay."""
+        self._set_status(name, PENDING, reason)
+
+    def reason(self, name):
+        """Why the package was last skipped or released, or None."""
+        row = self.connection.execute("SELECT reason FROM packages WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def requeue_stale(self, max_age):
+        """Return packages claimed more than max_age seconds ago (by a consumer that crashed) to the queue."""
+        cursor = self.connection.execute(
+            "UPDATE packages SET status = ?, owner = NULL WHERE status = ? AND updated_at < ?",
+            (PENDING, CLAIMED, time.time() - max_age),
+        )
+        return cursor.rowcount
+
+    def retry_skipped(self, reason=None):
+        """Queue skipped packages again, optionally only those skipped for one reason."""
+        if reason is None:
+            cursor = self.connection.execute(
+                "UPDATE packages SET status = ?, reason = NULL WHERE status = ?", (PENDING, SKIPPED)
+            )
+        else:
+            cursor = self.connection.execute(
+                "UPDATE packages SET status = ?, reason = NULL WHERE status = ? AND reason = ?",
+                (PENDING, SKIPPED, reason),
+            )
+        return cursor.rowcount
+
+    def counts(self):
+        """Number of packages per status."""
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM packages GROUP BY status"))
+
+    def pending(self):
+        return [name for (name,) in self.connection.execute("SELECT name FROM packages WHERE status = ?", (PENDING,))]
+
+    def export_json(self, filename="package_names.json"):
+        """Write the packages still to do in the package_names.json format, for tools that read it."""
+        temporary = filename + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"packages": self.pending()}, file, indent=4)
+        os.replace(temporary, filename)
+
+
+def open_queue(path=DEFAULT_QUEUE_PATH, seed="package_names.json"):
+    """Open the queue store, seeding it from the JSON list on first use."""
+    queue = PackageQueue(path)
+    if not queue.counts() and os.path.exists(seed):
+        added = queue.import_json(seed)
+        print(f"Queued {added} packages from {seed}")
+    return queue
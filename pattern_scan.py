@@ -0,0 +1,84 @@
+import re
+from itertools import islice
+
+import numpy as np
+
+import rules
+
+# Offsets kept per pattern; counts are always exact
+DEFAULT_MAX_OFFSETS = 16
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_scanners = {}
+
+
+class PatternScanner:
+    """Counts byte patterns in a buffer without turning it into a string.
+
+    Each pattern is counted on its own at every offset it occurs, overlaps included.
+    """
+
+    def __init__(self, patterns, max_offsets=DEFAULT_MAX_OFFSETS):
+        self.patterns = [p.encode('utf-8') if isinstance(p, str) else bytes(p) for p in patterns]
+        self.max_offsets = max_offsets
+        # Single bytes are counted together with one histogram pass
+        self.single_bytes = [p for p in self.patterns if len(p) == 1]
+        self.single_regexes = {p: re.compile(re.escape(p)) for p in self.single_bytes}
+        # Longer patterns are searched one by one, so a pattern inside another (DexClassLoader in
+        # InMemoryDexClassLoader) is still counted for both
+        multi = [p for p in self.patterns if len(p) > 1]
+        self.multi_regexes = {p: re.compile(re.escape(p)) for p in multi}
+        self.overlap = max((len(p) for p in multi), default=1) - 1
+
+    def _empty_result(self):
+        return {p: {'count': 0, 'offsets': []} for p in self.patterns}
+
+    def _scan_into(self, result, buffer, base, skip_before=0):
+        """Add matches in buffer to result; matches ending at or before skip_before were already counted."""
+        if self.single_bytes:
+            counts = np.bincount(np.frombuffer(buffer, dtype=np.uint8)[skip_before:], minlength=256)
+            for p in self.single_bytes:
+                entry = result[p]
+                entry['count'] += int(counts[p[0]])
+                room = self.max_offsets - len(entry['offsets'])
+                if room > 0:
+                    matches = self.single_regexes[p].finditer(buffer, skip_before)
+                    entry['offsets'].extend(base + m.start() for m in islice(matches, room))
+        for p, regex in self.multi_regexes.items():
+            entry = result[p]
+            # Restart one byte past each match so overlapping occurrences count too
+            m = regex.search(buffer, max(0, skip_before - len(p) + 1))
+            while m is not None:
+                entry['count'] += 1
+                if len(entry['offsets']) < self.max_offsets:
+                    entry['offsets'].append(base + m.start())
+                m = regex.search(buffer, m.start() + 1)
+
+    def scan(self, buffer):
+        """Scan a bytes-like object (bytes, memoryview, mmap) in place."""
+        result = self._empty_result()
+        self._scan_into(result, buffer, 0)
+        return result
+
+    def scan_stream(self, stream, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Scan a file-like object chunk by chunk so memory stays bounded for huge entries."""
+        result = self._empty_result()
+        tail = b''
+        base = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            window = tail + chunk if tail else chunk
+            self._scan_into(result, window, base - len(tail), skip_before=len(tail))
+            tail = window[-self.overlap:] if self.overlap else b''
+            base += len(chunk)
+        return result
+
+
+def load_scanner(path=None):
+    """Scanner for the byte patterns configured in the rules file, built once per process."""
+    if path not in _scanners:
+        rule_set = rules.load_rules(path)
+        _scanners[path] = PatternScanner(rule_set.byte_patterns)
+    return _scanners[path]
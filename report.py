@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")  # Reports are written to files; no display is needed or opened
+import numpy as np
+from matplotlib.figure import Figure
+from scipy.stats import norm
+
+import stream_stats
+
+DEFAULT_OUTPUT_DIR = "reports"
+DPI = 150
+
+
+def _mean_lines(ax, stats):
+    mean, std = stats.mean, stats.std
+    ax.axvline(mean, color="red", linestyle="dashed", linewidth=2, label=f"Mean = {mean:.2f}")
+    ax.axvline(mean + std, color="green", linestyle="dashed", linewidth=2, label=f"Mean + 1σ = {mean + std:.2f}")
+    ax.axvline(mean - std, color="green", linestyle="dashed", linewidth=2, label=f"Mean - 1σ = {mean - std:.2f}")
+
+
+def _gaussian(ax, stats, style='r-'):
+    xmin, xmax = ax.get_xlim()
+    x_values = np.linspace(xmin, xmax, 100)
+    ax.plot(x_values, norm.pdf(x_values, stats.mean, stats.std), style, linewidth=2,
+            label=f"Gaussian Fit (μ={stats.mean:.2f}, σ={stats.std:.2f})")
+
+
+def plot_extension_histograms(ax, grouped):
+    """Histogram per file extension from the precomputed bins, with the overall Gaussian fit."""
+    for ext in sorted(grouped.groups):
+        histogram = grouped.groups[ext].histogram
+        ax.stairs(histogram.density(), histogram.edges, fill=True, alpha=0.5, label=f"{str(ext).upper()} Files")
+    _gaussian(ax, grouped.overall.stats)
+    _mean_lines(ax, grouped.overall.stats)
+    ax.set_xlabel("Entropy")
+    ax.set_ylabel("Density")
+    ax.set_title("Entropy Distribution with Gaussian Fit")
+    ax.legend()
+
+
+def plot_boxplot(ax, grouped):
+    """Boxplot per file extension, drawn from t-digest quartiles."""
+    extensions = sorted(grouped.groups)
+    boxes = ax.bxp([grouped.groups[ext].box_stats(ext) for ext in extensions], showfliers=False, patch_artist=True)
+    colors = matplotlib.colormaps["Set3"].colors
+    for i, box in enumerate(boxes["boxes"]):
+        box.set_facecolor(colors[i % len(colors)])
+    ax.set_title("Boxplot of Entropy by File Extension")
+    ax.set_xlabel("File Extension")
+    ax.set_ylabel("Entropy")
+
+
+def plot_distribution(ax, summary, title="Entropy Distribution with KDE", gaussian=False):
+    """Overall histogram with its smoothed density curve, mean/σ lines and optionally a Gaussian fit."""
+    histogram = summary.histogram
+    ax.stairs(histogram.density(), histogram.edges, fill=True, color="blue", alpha=0.4)
+    ax.plot(histogram.centers, histogram.smoothed_density(), color="blue")
+    _mean_lines(ax, summary.stats)
+    if gaussian:
+        _gaussian(ax, summary.stats, style='k')
+    ax.set_title(title)
+    ax.set_xlabel("Entropy")
+    ax.set_ylabel("Density")
+    ax.legend()
+
+
+def save_figure(plot, path, *args, dpi=DPI, **kwargs):
+    """Draw plot(ax, *args, **kwargs) on a new figure, write it to path and free it.
+
+    Figures are created without pyplot, so nothing is registered with a GUI backend and
+    each one is rendered exactly once.
+    """
+    figure = Figure(figsize=(12, 6))
+    plot(figure.subplots(), *args, **kwargs)
+    figure.savefig(path, format="png", dpi=dpi)
+    return path
+
+
+def summary_statistics(grouped):
+    """Plain-data statistics of a GroupedSummary, overall and per extension."""
+
+    def describe(summary):
+        stats = summary.stats
+        q1, median, q3 = summary.digest.quantile([0.25, 0.5, 0.75])
+        return {
+            'count': stats.count, 'mean': stats.mean, 'std': stats.std,
+            'skewness': stats.skewness, 'kurtosis': stats.kurtosis,
+            'min': stats.min, 'q1': float(q1), 'median': float(median), 'q3': float(q3), 'max': stats.max,
+        }
+
+    return {
+        'overall': describe(grouped.overall),
+        'extensions': {str(ext): describe(grouped.groups[ext]) for ext in sorted(grouped.groups)},
+    }
+
+
+def write_report(grouped, output_dir):
+    """Write the entropy figures and a statistics JSON of one corpus into output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [
+        save_figure(plot_extension_histograms, os.path.join(output_dir, "entropy_distribution_gaussian.png"), grouped),
+        save_figure(plot_boxplot, os.path.join(output_dir, "entropy_boxplot.png"), grouped),
+        save_figure(plot_distribution, os.path.join(output_dir, "entropy_kde.png"), grouped.overall),
+    ]
+    statistics_path = os.path.join(output_dir, "entropy_statistics.json")
+    with open(statistics_path, 'w', encoding='utf-8') as file:
+        json.dump(summary_statistics(grouped), file, indent=2)
+    return paths + [statistics_path]
+
+
+def corpus_report(csv_paths, output_dir, workers=1):
+    """Summarise a corpus of result CSVs per file extension and write its report."""
+    grouped = stream_stats.summarize_csvs(csv_paths, value_column="entropy",
+                                          group_func=stream_stats.resource_extension, workers=workers)
+    if not grouped.overall.stats.count:
+        print(f"No entropy values found for {output_dir}. Skipping.")
+        return []
+    return write_report(grouped, output_dir)
+
+
+def generate_reports(corpora, output_dir=DEFAULT_OUTPUT_DIR, workers=None):
+    """Write one report per corpus ({name: [csv paths]}) under output_dir/name, corpora in parallel."""
+    workers = workers or min(len(corpora), os.cpu_count() or 1) or 1
+    names = list(corpora)
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(corpus_report, [corpora[name] for name in names],
+                               [os.path.join(output_dir, name) for name in names])
+        return dict(zip(names, results))
+
+
+def find_corpora(paths):
+    """Corpus per argument: a directory is one corpus of its CSVs, a CSV file is a corpus on its own."""
+    corpora = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        if os.path.isdir(path):
+            corpora[name] = sorted(
+                os.path.join(path, file_name) for file_name in os.listdir(path) if file_name.endswith('.csv')
+            )
+        else:
+            corpora[name] = [path]
+    return corpora
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write entropy reports for result CSV corpora without a display.")
+    parser.add_argument('corpora', nargs='+', help="CSV files or directories of CSV files, one report each")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    args = parser.parse_args()
+    for name, paths in generate_reports(find_corpora(args.corpora), args.output, args.workers).items():
+        print(f"{name}: {len(paths)} files written")
+
+
+# Corpora are reported in worker processes, which re-import this module
+if __name__ == "__main__":
+    main()
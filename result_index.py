@@ -0,0 +1,261 @@
+import os
+import sqlite3
+
+DEFAULT_INDEX_PATH = "results_index.db"
+# Entropy above which the analyzers flag an entry (see the 7.5 thresholds in n.py and obs_stag.py)
+HIGH_ENTROPY_THRESHOLD = 7.5
+INGEST_CHUNK_SIZE = 100_000
+# Entropies are parsed as float32; rounding drops the noise (7.800000190734863) it adds
+ENTROPY_DECIMALS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    package TEXT NOT NULL,
+    file_resource TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    flagged INTEGER NOT NULL,
+    entropy REAL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS results_package ON results (package);
+CREATE INDEX IF NOT EXISTS results_extension_entropy ON results (extension, entropy);
+CREATE INDEX IF NOT EXISTS results_flagged ON results (flagged) WHERE flagged = 1;
+
+CREATE TABLE IF NOT EXISTS package_summary (
+    package TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL,
+    flagged INTEGER NOT NULL,
+    high_entropy INTEGER NOT NULL,
+    max_entropy REAL
+);
+CREATE INDEX IF NOT EXISTS package_summary_max_entropy ON package_summary (max_entropy);
+
+CREATE TABLE IF NOT EXISTS extension_summary (
+    package TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    flagged INTEGER NOT NULL,
+    high_entropy INTEGER NOT NULL,
+    max_entropy REAL,
+    PRIMARY KEY (package, extension)
+);
+CREATE INDEX IF NOT EXISTS extension_summary_ranking ON extension_summary (extension, max_entropy);
+
+-- Scans and CSV files already folded in, so replaying them is a no-op; version is the
+-- size and mtime a CSV had when it was indexed
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    version TEXT
+);
+"""
+
+# Indexes on columns added after the first release, created once _migrate has added them
+LATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS results_source ON results (source);
+"""
+
+REBUILD_SUMMARY = """
+INSERT INTO {table} ({keys}, entries, flagged, high_entropy, max_entropy)
+SELECT {keys}, COUNT(*), SUM(flagged), COALESCE(SUM(entropy > ?), 0), MAX(entropy)
+FROM results WHERE package = ? GROUP BY {keys}
+"""
+
+UPSERT_SUMMARY = """
+INSERT INTO {table} ({keys}, entries, flagged, high_entropy, max_entropy) VALUES ({placeholders}, ?, ?, ?, ?)
+ON CONFLICT ({keys}) DO UPDATE SET
+    entries = entries + excluded.entries,
+    flagged = flagged + excluded.flagged,
+    high_entropy = high_entropy + excluded.high_entropy,
+    max_entropy = MAX(COALESCE(max_entropy, excluded.max_entropy), COALESCE(excluded.max_entropy, max_entropy))
+"""
+
+
+def extension_of(file_resource):
+    """Extension of a result's file name, as pd1.py groups them ('none' without a dot)."""
+    return file_resource.rsplit('.', 1)[-1] if '.' in file_resource else 'none'
+
+
+def _flag(value):
+    # 'Yes' from the analyzers, True/numpy.bool_ from CSVs parsed with the 'boolean' dtype
+    return 1 if str(value) in ('Yes', 'True') else 0
+
+
+def _entropy(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else round(value, ENTROPY_DECIMALS)  # NaN
+
+
+def _fold(totals, key, flagged, entropy, threshold):
+    entries, flags, high, maximum = totals.get(key, (0, 0, 0, None))
+    if entropy is not None and (maximum is None or entropy > maximum):
+        maximum = entropy
+    totals[key] = (entries + 1, flags + flagged, high + (entropy is not None and entropy > threshold), maximum)
+
+
+class ResultIndex:
+    """SQLite store of scan results with per-package and per-package-extension summary rows.
+
+    Summaries are upserted in the same transaction as the rows they cover, so ranking and
+    filtering queries read a few indexed rows instead of scanning every result.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=HIGH_ENTROPY_THRESHOLD):
+        self.threshold = threshold
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self.connection.executescript(LATE_INDEXES)
+
+    def _migrate(self):
+        """Add the columns that index files from before per-source rows lack."""
+        for table, column in (('results', 'source'), ('sources', 'version')):
+            columns = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def has_source(self, source):
+        return self.connection.execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone() is not None
+
+    @staticmethod
+    def csv_source(path):
+        """Source name under which ingest_csv indexes a CSV file."""
+        return f"csv:{os.path.abspath(path)}"
+
+    def add_rows(self, rows, source=None):
+        """Add [package_name, file_resource, obfuscation_flag, entropy] rows and update the summaries.
+
+        With a source (an APK digest or CSV identity) the batch is applied at most once.
+        Returns False when the source was already indexed.
+        """
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if source is not None:
+                if self.has_source(source):
+                    return False
+                self.connection.execute("INSERT INTO sources (source) VALUES (?)", (source,))
+            self._add_batch(rows, source)
+        return True
+
+    def ingest_csv(self, path, chunk_size=INGEST_CHUNK_SIZE):
+        """Fold a result CSV into the index, chunk by chunk, in a single transaction.
+
+        An unchanged file is a no-op. When its size or mtime changed (e.g. rows were appended),
+        the rows indexed from it earlier are replaced, so they are never counted twice.
+        Returns False when the file was already indexed as it is.
+        """
+        import csv_ingest  # pandas is only needed to backfill from CSVs, not for scans
+
+        stat = os.stat(path)
+        source = self.csv_source(path)
+        version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        columns = ['package_name', 'file_resource', 'obfuscation_flag', 'entropy']
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            row = self.connection.execute("SELECT version FROM sources WHERE source = ?", (source,)).fetchone()
+            if row is not None and row[0] == version:
+                return False
+            if row is not None:
+                self._remove_source(source)
+            self.connection.execute(
+                "INSERT INTO sources (source, version) VALUES (?, ?) "
+                "ON CONFLICT (source) DO UPDATE SET version = excluded.version",
+                (source, version),
+            )
+            for chunk in csv_ingest.iter_results([path], chunk_size, usecols=columns):
+                self._add_batch(chunk[columns].itertuples(index=False, name=None), source)
+        return True
+
+    def _remove_source(self, source):
+        """Delete a source's rows and recompute the summaries of the packages they belonged to."""
+        packages = [
+            package for (package,) in
+            self.connection.execute("SELECT DISTINCT package FROM results WHERE source = ?", (source,))
+        ]
+        self.connection.execute("DELETE FROM results WHERE source = ?", (source,))
+        for package in packages:
+            self.connection.execute("DELETE FROM package_summary WHERE package = ?", (package,))
+            self.connection.execute("DELETE FROM extension_summary WHERE package = ?", (package,))
+            self.connection.execute(
+                REBUILD_SUMMARY.format(table="package_summary", keys="package"), (self.threshold, package)
+            )
+            self.connection.execute(
+                REBUILD_SUMMARY.format(table="extension_summary", keys="package, extension"), (self.threshold, package)
+            )
+
+    def _add_batch(self, rows, source):
+        records = []
+        packages = {}
+        extensions = {}
+        for package, file_resource, flag, entropy in rows:
+            package, file_resource = str(package), str(file_resource)
+            extension = extension_of(file_resource)
+            flagged, entropy = _flag(flag), _entropy(entropy)
+            records.append((package, file_resource, extension, flagged, entropy, source))
+            _fold(packages, (package,), flagged, entropy, self.threshold)
+            _fold(extensions, (package, extension), flagged, entropy, self.threshold)
+        self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)", records)
+        self.connection.executemany(
+            UPSERT_SUMMARY.format(table="package_summary", keys="package", placeholders="?"),
+            (key + totals for key, totals in packages.items()),
+        )
+        self.connection.executemany(
+            UPSERT_SUMMARY.format(table="extension_summary", keys="package, extension", placeholders="?, ?"),
+            (key + totals for key, totals in extensions.items()),
+        )
+
+    # Queries
+    def flagged_rows(self, package=None, source=None):
+        """(package, file_resource, entropy) of every flagged entry, optionally of one package or source."""
+        query = "SELECT package, file_resource, entropy FROM results WHERE flagged = 1"
+        parameters = []
+        if package is not None:
+            query += " AND package = ?"
+            parameters.append(package)
+        if source is not None:
+            query += " AND source = ?"
+            parameters.append(source)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def packages_with_high_entropy(self, extension, threshold=None):
+        """Packages with an entry of the given extension above the threshold, highest first."""
+        threshold = self.threshold if threshold is None else threshold
+        return self.connection.execute(
+            "SELECT package, max_entropy FROM extension_summary WHERE extension = ? AND max_entropy > ? "
+            "ORDER BY max_entropy DESC",
+            (extension, threshold),
+        ).fetchall()
+
+    def top_packages(self, by='high_entropy', limit=50):
+        """Packages ranked by a summary column (entries, flagged, high_entropy or max_entropy)."""
+        if by not in ('entries', 'flagged', 'high_entropy', 'max_entropy'):
+            raise ValueError(f"Unknown ranking column {by}")
+        return self.connection.execute(
+            f"SELECT package, entries, flagged, high_entropy, max_entropy FROM package_summary "
+            f"ORDER BY {by} DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def package_summary(self, package):
+        """Summary row of one package plus its per-extension rows."""
+        overall = self.connection.execute(
+            "SELECT entries, flagged, high_entropy, max_entropy FROM package_summary WHERE package = ?", (package,)
+        ).fetchone()
+        per_extension = self.connection.execute(
+            "SELECT extension, entries, flagged, high_entropy, max_entropy FROM extension_summary WHERE package = ?",
+            (package,),
+        ).fetchall()
+        return overall, per_extension
@@ -0,0 +1,66 @@
+import json
+import re
+from importlib import resources
+
+# Bundled rules, installed as package data of stegaguard_data
+DEFAULT_RULES_PACKAGE = 'stegaguard_data'
+DEFAULT_RULES_RESOURCE = 'rules.json'
+
+_rule_sets = {}
+
+
+class RuleSet:
+    """Suspicious-permission and obfuscated-name rules compiled into single regexes."""
+
+    def __init__(self, config):
+        self.permission_pattern = _alternation(config.get('suspicious_permissions', []))
+        self.name_substring_pattern = _alternation(config.get('suspicious_name_substrings', []))
+        # One Java identifier segment of at most N characters, as ProGuard/R8 emit (a, b, aa, a0, ...)
+        max_length = int(config.get('short_identifier_length', 2))
+        self.short_segment_pattern = re.compile(rf'[A-Za-z_][A-Za-z0-9_]{{0,{max_length - 1}}}')
+        self.segment_pattern = re.compile(r'[^.$]+')
+        self.obfuscated_score = float(config.get('obfuscated_name_score', 0.5))
+        self.byte_patterns = [p.encode('utf-8') for p in config.get('byte_patterns', [])]
+
+    def suspicious_permission(self, permission_name):
+        """The configured permission the name contains, or None."""
+        match = self.permission_pattern.search(permission_name) if self.permission_pattern else None
+        return match.group(0) if match else None
+
+    def name_score(self, name):
+        """Share of a dotted name's segments that look machine-generated, with the class name counted twice."""
+        segments = self.segment_pattern.findall(name)
+        if len(segments) > 1:
+            segments = segments[1:]  # top-level domains (io, me, de) are legitimately short
+        if not segments:
+            return 0.0
+        short = [bool(self.short_segment_pattern.fullmatch(segment)) for segment in segments]
+        return (sum(short) + short[-1]) / (len(segments) + 1)
+
+    def is_obfuscated_name(self, name):
+        if self.name_substring_pattern and self.name_substring_pattern.search(name):
+            return True
+        return self.name_score(name) >= self.obfuscated_score
+
+    def score_components(self, components):
+        """Return (tag, name, score, obfuscated) for each (tag, name) pair."""
+        return [(tag, name, self.name_score(name), self.is_obfuscated_name(name)) for tag, name in components]
+
+
+def _alternation(literals):
+    if not literals:
+        return None
+    # Longest first so overlapping literals report the most specific match
+    return re.compile('|'.join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True)))
+
+
+def load_rules(path=None):
+    """Load and compile a rules file (the bundled rules.json by default) once per process."""
+    if path not in _rule_sets:
+        if path is None:
+            text = resources.files(DEFAULT_RULES_PACKAGE).joinpath(DEFAULT_RULES_RESOURCE).read_text(encoding='utf-8')
+        else:
+            with open(path, 'r', encoding='utf-8') as file:
+                text = file.read()
+        _rule_sets[path] = RuleSet(json.loads(text))
+    return _rule_sets[path]
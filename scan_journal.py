@@ -0,0 +1,124 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in bounded blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _append_durably(file, data):
+    file.write(data)
+    file.flush()
+    os.fsync(file.fileno())
+
+
+class ScanJournal:
+    """Write-ahead journal that makes a corpus scan resumable.
+
+    Rows of one APK are appended to the CSV in a single write and fsynced, then a journal
+    line records the APK's digest and the CSV offset after its rows. On restart the CSV is
+    cut back to the last journalled offset, which drops rows of an APK that crashed half-way,
+    and journalled APKs are skipped. Inputs are only deleted after their journal line is on disk.
+
+    With an index (a result_index.ResultIndex) each APK's rows are indexed before they are
+    appended. Indexing is keyed by digest, so an APK rescanned after a crash is not counted twice.
+    """
+
+    def __init__(self, csv_path, csv_columns, journal_path=None, index=None):
+        self.csv_path = csv_path
+        self.csv_columns = csv_columns
+        self.journal_path = journal_path or csv_path + '.journal'
+        self.index = index
+        self.digests = set()
+        self.stat_keys = set()
+        self.csv_offset = None
+        self._csv = None
+        self._journal = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        valid_size = self._load_journal()
+        if self.csv_offset is None or not os.path.exists(self.csv_path):
+            # Nothing committed yet: start the CSV and journal afresh
+            self.digests.clear()
+            self.stat_keys.clear()
+            valid_size = 0
+            with open(self.csv_path, 'w', newline='', encoding='utf-8') as file:
+                csv.writer(file).writerow(self.csv_columns)
+                file.flush()
+                os.fsync(file.fileno())
+            self.csv_offset = os.path.getsize(self.csv_path)
+        self._csv = open(self.csv_path, 'r+b')
+        self._csv.truncate(self.csv_offset)
+        self._csv.seek(self.csv_offset)
+        self._journal = open(self.journal_path, 'a+b')
+        # A torn last line from a crash mid-append is discarded
+        self._journal.truncate(valid_size)
+
+    def _load_journal(self):
+        """Read committed records; return the byte length of the journal's valid prefix."""
+        valid_size = 0
+        if not os.path.exists(self.journal_path):
+            return valid_size
+        with open(self.journal_path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.digests.add(record['digest'])
+                self.stat_keys.add(tuple(record['stat']))
+                self.csv_offset = record['csv_offset']
+                valid_size += len(line)
+        return valid_size
+
+    def close(self):
+        for file in (self._csv, self._journal):
+            if file is not None:
+                file.close()
+        self._csv = self._journal = None
+
+    def is_done(self, apk_path, digest=None):
+        """True when the APK (same path, size and mtime, or same content) is already committed."""
+        if _stat_key(apk_path) in self.stat_keys:
+            return True
+        return digest is not None and digest in self.digests
+
+    def commit(self, apk_path, digest, rows, delete_input=False):
+        """Durably append an APK's rows, journal it, and only then optionally delete the input."""
+        if self.index is not None:
+            self.index.add_rows(rows, source=f"apk:{digest}")
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        stat_key = _stat_key(apk_path)
+        _append_durably(self._csv, buffer.getvalue().encode('utf-8'))
+        self.csv_offset = self._csv.tell()
+        record = {'digest': digest, 'stat': list(stat_key), 'csv_offset': self.csv_offset, 'rows': len(rows)}
+        _append_durably(self._journal, (json.dumps(record) + '\n').encode('utf-8'))
+        self.digests.add(digest)
+        self.stat_keys.add(stat_key)
+        if delete_input:
+            os.remove(apk_path)
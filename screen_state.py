@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import io
+import re
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+UNAVAILABLE = 'unavailable'
+PAID = 'paid'
+
+UNAVAILABLE_PATTERN = re.compile(
+    r"not available in your country|isn’t available in your country|in your country|is not compatible"
+    r"|This phone is'n compatible this app|compatible this app|This phone isn|this phone isn",
+    re.IGNORECASE,
+)
+PAID_PATTERN = re.compile(r"BDT\s\d{1,3}(?:,\d{3})?")
+
+# Part of the Play Store details page holding the price, Install button and availability notice,
+# as (left, top, right, bottom) fractions of the screen; the status bar and screenshots are left out
+OCR_REGION = (0.0, 0.08, 1.0, 0.55)
+CACHE_SIZE = 256
+
+
+def classify_text(text):
+    """Screen state named by the page text: UNAVAILABLE, PAID or None."""
+    if UNAVAILABLE_PATTERN.search(text):
+        return UNAVAILABLE
+    if PAID_PATTERN.search(text):
+        return PAID
+    return None
+
+
+def ui_dump_text(xml_output):
+    """Visible text of a `uiautomator dump` hierarchy, one node per line."""
+    start = xml_output.find(b'<?xml')
+    end = xml_output.rfind(b'>')
+    if start < 0 or end < start:
+        return None
+    try:
+        root = ET.fromstring(xml_output[start:end + 1])
+    except ET.ParseError:
+        return None
+    texts = []
+    for node in root.iter('node'):
+        for attribute in ('text', 'content-desc'):
+            value = node.get(attribute)
+            if value:
+                texts.append(value)
+    return '\n'.join(texts)
+
+
+class ScreenChecker:
+    """Works out whether the Play Store page shows a paid or unavailable app.
+
+    The accessibility tree from uiautomator is used when it has text, since reading it is exact
+    and needs no OCR. Otherwise only OCR_REGION of the screenshot is run through Tesseract, and
+    the result is cached by the hash of that region's pixels so a repeated screen costs no OCR.
+    """
+
+    def __init__(self, region=OCR_REGION, cache_size=CACHE_SIZE):
+        self.region = region
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Devices are checked from several worker threads at once
+        self._lock = threading.Lock()
+
+    def _crop(self, png):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(png)).convert('L')
+        width, height = image.size
+        left, top, right, bottom = self.region
+        return image.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+
+    def check_png(self, png):
+        """State of a screenshot, OCRing only the region of interest."""
+        import pytesseract
+
+        region = self._crop(png)
+        key = hashlib.sha1(region.tobytes()).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        state = classify_text(pytesseract.image_to_string(region))
+        with self._lock:
+            self._cache[key] = state
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return state
+
+    def check(self, ui_xml, capture_png):
+        """State from the UI dump when it has text, else from the screenshot capture_png() returns."""
+        text = ui_dump_text(ui_xml) if ui_xml else None
+        if text:
+            return classify_text(text)
+        return self.check_png(capture_png())
+
+
+def _adb(serial, adb):
+    return [adb] + (['-s', serial] if serial else [])
+
+
+def capture_png(serial=None, adb='adb'):
+    """Screenshot PNG bytes streamed over stdout; nothing is written to /sdcard or the local disk."""
+    return subprocess.run(_adb(serial, adb) + ['exec-out', 'screencap', '-p'], check=True, capture_output=True).stdout
+
+
+def dump_ui(serial=None, adb='adb'):
+    """uiautomator hierarchy XML streamed over stdout, or b'' when the dump fails (e.g. a video plays)."""
+    result = subprocess.run(
+        _adb(serial, adb) + ['exec-out', 'uiautomator', 'dump', '/dev/tty'], capture_output=True
+    )
+    return result.stdout if result.returncode == 0 else b''
+
+
+_checker = ScreenChecker()
+
+
+def check_device(serial=None, adb='adb'):
+    """Capture the current screen once and return its state (UNAVAILABLE, PAID or None)."""
+    return _checker.check(dump_ui(serial, adb), lambda: capture_png(serial, adb))
+
+
+async def check_device_async(serial=None, adb='adb'):
+    """check_device for asyncio callers; the adb calls and OCR run in a worker thread."""
+    return await asyncio.to_thread(check_device, serial, adb)
@@ -2,9 +2,10 @@ import math
 import hashlib
 import torch
 import torch.nn as nn
-from androguard.core.bytecodes.apk import APK
-from androguard.misc import AnalyzeAPK
-from lxml.etree import tostring
+import baseline
+
+# Per-file-type entropy thresholds from the benign baseline, loaded once per process
+profile = baseline.load_profile()
 
 # Utility: Calculate Entropy
 def calculate_entropy(data):
@@ -32,7 +33,7 @@ def analyze_certificates(apk):
             cert_hash = hashlib.sha256(cert_bytes).hexdigest()
             cert_entropy = calculate_entropy(cert_bytes)
             print(f"Certificate Hash: {cert_hash}, Entropy: {cert_entropy}")
-            if cert_entropy > 7.5:
+            if profile.is_anomalous("CERT.RSA", cert_entropy):
                 return 1  # Obfuscation or steganography detected in certificate
         return 0
     except Exception as e:
@@ -45,9 +46,11 @@ def analyze_manifest(apk):
     try:
         manifest_axml = apk.get_android_manifest_axml()
         if manifest_axml is not None:
+            from lxml.etree import tostring
+
             manifest_str = tostring(manifest_axml, encoding="utf-8").decode("utf-8")
             manifest_entropy = calculate_entropy(manifest_str)
-            if manifest_entropy > 7.5:
+            if profile.is_anomalous("AndroidManifest.xml", manifest_entropy):
                 return 1  # Obfuscation or steganography detected in manifest
         return 0
     except Exception as e:
@@ -64,7 +67,7 @@ def analyze_dex(apk, dvm):
             return 0
         for dex in dex_files:
             dex_entropy = calculate_entropy(dex)
-            if dex_entropy > 7.5:
+            if profile.is_anomalous("classes.dex", dex_entropy):
                 return 1  # Obfuscation or steganography detected in DEX files
         return 0
     except Exception as e:
@@ -83,7 +86,7 @@ def analyze_methods(dvm):
             if code:
                 bytecode = code.get_bc().get_raw()
                 method_entropy = calculate_entropy(bytecode)
-                if method_entropy > 7.5:
+                if profile.is_anomalous(None, method_entropy):
                     return 1  # Obfuscation detected in method
         return 0
     except Exception as e:
@@ -111,6 +114,9 @@ class StagNet(nn.Module):
 # Main function to analyze APK and use StagNet for prediction
 
 def analyze_apk_and_predict(apk_path):
+    # androguard is only imported by the standalone analysis; the StagNet model needs torch alone
+    from androguard.misc import AnalyzeAPK
+
     print(f"Analyzing APK: {apk_path}")
     try:
         apk, dvm, analysis = AnalyzeAPK(apk_path)
@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import cpu_count
+
+import archive
+import baseline
+import detectors
+import result_index
+import scan_journal
+import worker_context
+import zip_layout
+
+CSV_COLUMNS = ['package_name', 'file_resource', 'obfuscation_flag', 'entropy']
+DEFAULT_OUTPUT = "scan_results.csv"
+
+# Detector instances of this worker, created once by init_worker
+_detectors = []
+
+
+def init_worker(names, profile_path):
+    global _detectors
+    _detectors = detectors.create_detectors(names, baseline.load_profile(profile_path))
+
+
+def scan_apk(apk_path):
+    """Scan one APK with the worker's detectors; return (path, digest, rows, details, errors)."""
+    try:
+        with archive.Archive(apk_path) as apk:
+            findings = detectors.scan_archive(apk, _detectors)
+            return apk_path, apk.digest, findings.rows, findings.details, findings.errors
+    except (OSError, ValueError, zip_layout.ZipLayoutError) as e:
+        # ValueError: an empty file cannot be mapped
+        return apk_path, None, [], {}, [str(e)]
+
+
+def find_apks(paths):
+    """APK files among paths; directories are searched recursively."""
+    apks = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                apks.extend(os.path.join(root, file) for file in sorted(files) if file.lower().endswith('.apk'))
+        else:
+            apks.append(path)
+    return apks
+
+
+def _parse_detectors(value):
+    if value == 'all':
+        return list(detectors.DETECTORS)
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='stegaguard',
+        description="Scan APKs for obfuscation and steganography with the selected detectors, "
+                    "reading each APK once and writing all results to one CSV.")
+    parser.add_argument('paths', nargs='*', help="APK files or directories of APKs")
+    parser.add_argument('-d', '--detectors', type=_parse_detectors, default=None,
+                        help="comma-separated detector names or 'all' (default: every default detector)")
+    parser.add_argument('-l', '--list', action='store_true', help="list the available detectors and exit")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help="result CSV, resumed if it exists")
+    parser.add_argument('--details', help="also append per-APK details and errors to this JSON-lines file")
+    parser.add_argument('--index', default=result_index.DEFAULT_INDEX_PATH, help="per-package result index")
+    parser.add_argument('--profile', default=baseline.DEFAULT_PROFILE_PATH, help="benign baseline profile")
+    parser.add_argument('-j', '--workers', type=int, default=min(10, cpu_count()))
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, cls in detectors.DETECTORS.items():
+            print(f"{name:12} {'default ' if cls.default else 'optional'}  {cls.description}")
+        return
+    if not args.paths:
+        parser.error("no APK files or directories given")
+    names = args.detectors or detectors.default_detectors()
+    try:
+        detectors.create_detectors(names)
+    except ValueError as e:
+        parser.error(str(e))
+
+    details = open(args.details, 'a', encoding='utf-8') if args.details else None
+    try:
+        with result_index.ResultIndex(args.index) as index, \
+                scan_journal.ScanJournal(args.output, CSV_COLUMNS, index=index) as journal:
+            apk_paths = [path for path in find_apks(args.paths) if not journal.is_done(path)]
+            if not apk_paths:
+                print("No APKs left for analysis.")
+                return
+            print(f"Scanning {len(apk_paths)} APKs with: {', '.join(names)}")
+            initargs = (names, args.profile)
+            if args.workers <= 1:
+                init_worker(*initargs)
+                results = map(scan_apk, apk_paths)
+                pool = None
+            else:
+                # Workers fork from a server that has imported the detectors and their heavy dependencies once.
+                # They are not daemonic, so detectors can run helper processes (the image detector's ImagePool).
+                preload = ['stegaguard'] + [module for name in names for module in detectors.DETECTORS[name].requires]
+                context = worker_context.worker_context(preload)
+                pool = ProcessPoolExecutor(min(args.workers, len(apk_paths)), mp_context=context,
+                                           initializer=init_worker, initargs=initargs)
+                futures = [pool.submit(scan_apk, apk_path) for apk_path in apk_paths]
+                results = (future.result() for future in as_completed(futures))
+            try:
+                for apk_path, digest, rows, apk_details, errors in results:
+                    for error in errors:
+                        print(f"{apk_path}: {error}")
+                    if digest is None:
+                        continue
+                    journal.commit(apk_path, digest, rows)
+                    if details is not None:
+                        details.write(json.dumps({'apk': apk_path, 'sha256': digest, 'details': apk_details,
+                                                  'errors': errors}, default=str) + '\n')
+                    flagged = sum(row[2] == "Yes" for row in rows)
+                    print(f"{apk_path}: {len(rows)} results, {flagged} flagged")
+            finally:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+    finally:
+        if details is not None:
+            details.close()
+
+
+if __name__ == '__main__':
+    main()
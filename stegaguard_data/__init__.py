@@ -0,0 +1 @@
+"""Data files shipped with the scanners (rules.json), read through importlib.resources."""
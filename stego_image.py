@@ -0,0 +1,285 @@
+import atexit
+import io
+import multiprocessing
+import struct
+from zipfile import ZipFile
+
+import numpy as np
+
+import filetype
+
+# Images larger than this are only checked for trailing data, not decoded
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+# Pixel statistics use at most this many pixels (top rows of larger images)
+MAX_PIXELS = 2_000_000
+# Below this many pixels the LSB statistics are too noisy to report
+MIN_PIXELS = 64 * 64
+# Seconds to wait for one image before giving up on it
+IMAGE_TIMEOUT = 30
+
+CHI_SQUARE_THRESHOLD = 0.95  # p-value of an LSB-equalised histogram
+RS_THRESHOLD = 0.15          # estimated fraction of pixels carrying a payload
+# Smooth, noisy images equalise pairs of values on their own, so a high chi-square p-value
+# only counts when RS estimates at least this rate in the same channel
+RS_CONFIRM_THRESHOLD = 0.1
+
+# Fridrich RS mask applied to groups of four horizontally adjacent pixels
+RS_MASK = np.array([0, 1, 1, 0])
+
+
+# 1. Data appended after the end-of-image marker
+def png_end_offset(data):
+    """Offset just past the IEND chunk, or None if the chunk list is broken."""
+    offset = 8
+    while offset + 8 <= len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, offset)
+        offset += 12 + length
+        if chunk_type == b'IEND':
+            return offset if offset <= len(data) else None
+    return None
+
+
+def jpeg_end_offset(data):
+    """Offset just past the EOI marker, or None if the marker stream is broken."""
+    offset = 2
+    size = len(data)
+    while offset + 4 <= size:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xD9:
+            return offset + 2
+        if marker == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        (length,) = struct.unpack_from('>H', data, offset + 2)
+        offset += 2 + length
+        if marker == 0xDA:
+            # Skip entropy-coded data: 0xFF00 is a stuffed byte, 0xFFD0-D7 are restarts
+            while True:
+                offset = data.find(b'\xff', offset)
+                if offset < 0 or offset + 1 >= size:
+                    return None
+                following = data[offset + 1]
+                if following == 0x00 or 0xD0 <= following <= 0xD7:
+                    offset += 2
+                    continue
+                break
+    return None
+
+
+def trailing_data_size(data, file_type):
+    """Number of bytes after the image's end marker (0 if none or unknown)."""
+    if file_type == 'png':
+        end = png_end_offset(data)
+    elif file_type == 'jpeg':
+        end = jpeg_end_offset(data)
+    else:
+        return 0
+    return 0 if end is None else len(data) - end
+
+
+# 2. LSB-plane statistics, vectorised over all pixels of a channel
+def chi_square_lsb(channel):
+    """Westfeld-Pfitzmann chi-square attack; p close to 1 means equalised pairs of values.
+
+    Natural images with smooth histograms also score close to 1, so on its own a high p is
+    not evidence of a payload.
+    """
+    from scipy.stats import chi2
+
+    histogram = np.bincount(channel.ravel(), minlength=256).astype(np.float64)
+    even, odd = histogram[0::2], histogram[1::2]
+    expected = (even + odd) / 2
+    used = expected > 0
+    if used.sum() < 2:
+        return 0.0
+    statistic = np.sum((even[used] - expected[used]) ** 2 / expected[used])
+    return float(chi2.sf(statistic, used.sum() - 1))
+
+
+def _flip(groups, mask):
+    """Apply F1 where the mask is 1 and F-1 where it is -1."""
+    positive = groups ^ 1
+    negative = ((groups + 1) ^ 1) - 1
+    return np.where(mask == 1, positive, np.where(mask == -1, negative, groups))
+
+
+def _regular_singular(groups, mask):
+    smoothness = np.abs(np.diff(groups, axis=1)).sum(axis=1)
+    flipped = np.abs(np.diff(_flip(groups, mask), axis=1)).sum(axis=1)
+    return np.mean(flipped > smoothness), np.mean(flipped < smoothness)
+
+
+def rs_estimate(channel):
+    """Fridrich RS analysis; returns the estimated embedding rate in [0, 1]."""
+    width = channel.shape[1] - channel.shape[1] % 4
+    if width == 0:
+        return 0.0
+    groups = channel[:, :width].astype(np.int16).reshape(-1, 4)
+
+    r_m, s_m = _regular_singular(groups, RS_MASK)
+    r_neg, s_neg = _regular_singular(groups, -RS_MASK)
+    flipped = groups ^ 1
+    r_m1, s_m1 = _regular_singular(flipped, RS_MASK)
+    r_neg1, s_neg1 = _regular_singular(flipped, -RS_MASK)
+
+    d0, d1 = r_m - s_m, r_m1 - s_m1
+    d_neg0, d_neg1 = r_neg - s_neg, r_neg1 - s_neg1
+    a = 2 * (d1 + d0)
+    b = d_neg0 - d_neg1 - d1 - 3 * d0
+    c = d0 - d_neg0
+    if a == 0:
+        if b == 0:
+            return 0.0
+        z = -c / b
+    else:
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            return 0.0
+        roots = ((-b + np.sqrt(discriminant)) / (2 * a), (-b - np.sqrt(discriminant)) / (2 * a))
+        z = min(roots, key=abs)
+    if z == 0.5:
+        return 1.0
+    return float(min(max(z / (z - 0.5), 0.0), 1.0))
+
+
+def decode_pixels(data, max_pixels=MAX_PIXELS):
+    """Decode an image into an (rows, cols, channels) uint8 array, capped at max_pixels."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        rows = max(1, min(height, max_pixels // max(width, 1)))
+        if rows < height:
+            image = image.crop((0, 0, width, rows))
+        # Palette images carry payloads in their indices, so keep them as one channel
+        if image.mode not in ('P', 'L', 'RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        pixels = np.asarray(image)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    return pixels[:, :, :3]
+
+
+# 3. Per-image analysis
+def analyze_image(file_name, data, file_type, max_bytes=MAX_IMAGE_BYTES, max_pixels=MAX_PIXELS):
+    """Run the detectors for one image and return a result dict."""
+    result = {
+        'file': file_name,
+        'format': file_type,
+        'size': len(data),
+        'trailing_bytes': trailing_data_size(data, file_type),
+        'chi_square_p': None,
+        'rs_rate': None,
+    }
+    payload = False
+    # JPEG payloads live in the DCT coefficients, so its decoded pixel LSBs say nothing
+    if file_type == 'png' and len(data) <= max_bytes:
+        try:
+            pixels = decode_pixels(data, max_pixels)
+        except Exception as e:
+            result['error'] = str(e)
+            pixels = None
+        if pixels is not None and pixels.shape[0] * pixels.shape[1] >= MIN_PIXELS:
+            scores = [
+                (chi_square_lsb(pixels[:, :, i]), rs_estimate(pixels[:, :, i])) for i in range(pixels.shape[2])
+            ]
+            result['chi_square_p'] = max(p for p, _ in scores)
+            result['rs_rate'] = max(rate for _, rate in scores)
+            payload = any(
+                rate > RS_THRESHOLD or (p > CHI_SQUARE_THRESHOLD and rate > RS_CONFIRM_THRESHOLD)
+                for p, rate in scores
+            )
+
+    result['flag'] = result['trailing_bytes'] > 0 or payload
+    return result
+
+
+def _error_result(file_name, file_type, error):
+    return {'file': file_name, 'format': file_type, 'flag': False, 'error': error}
+
+
+def _analyze_packed(args):
+    return analyze_image(*args)
+
+
+class ImagePool:
+    """Process pool reused by every analyze_images call of a run.
+
+    An image still running after timeout seconds gets a timeout result and the pool is
+    terminated, which kills the stuck worker; images that had not finished are resubmitted
+    to a fresh pool.
+    """
+
+    def __init__(self, workers=None, timeout=IMAGE_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def analyze(self, jobs):
+        """Results of analyze_image for (file_name, data, file_type) jobs, in job order."""
+        results = [None] * len(jobs)
+        pending = list(range(len(jobs)))
+        while pending:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.workers)
+            submitted = [(i, self._pool.apply_async(_analyze_packed, (jobs[i],))) for i in pending]
+            pending = []
+            for position, (i, async_result) in enumerate(submitted):
+                try:
+                    results[i] = async_result.get(self.timeout)
+                except multiprocessing.TimeoutError:
+                    results[i] = _error_result(jobs[i][0], jobs[i][2], 'timeout')
+                    unfinished = submitted[position + 1:]
+                    # Keep what already finished, then kill the stuck worker with the pool
+                    for j, other in unfinished:
+                        if other.ready():
+                            results[j] = self._collect(jobs[j], other)
+                        else:
+                            pending.append(j)
+                    self.close()
+                    break
+                except Exception as e:
+                    results[i] = _error_result(jobs[i][0], jobs[i][2], str(e))
+        return results
+
+    @staticmethod
+    def _collect(job, async_result):
+        try:
+            return async_result.get(0)
+        except Exception as e:
+            return _error_result(job[0], job[2], str(e))
+
+
+_shared_pool = None
+
+
+def shared_pool():
+    """The ImagePool of this process, created on first use and terminated at exit."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ImagePool()
+        atexit.register(_shared_pool.close)
+    return _shared_pool
+
+
+def analyze_images(apk_path, pool=None):
+    """Analyze every PNG/JPEG entry of the APK in a process pool and return the results."""
+    with ZipFile(apk_path) as zip_file:
+        jobs = [
+            (info.filename, zip_file.read(info), file_type)
+            for info, file_type in filetype.iter_classified_entries(zip_file, ('png', 'jpeg'))
+        ]
+    if not jobs:
+        return []
+    return (pool or shared_pool()).analyze(jobs)
@@ -0,0 +1,331 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import csv_ingest
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_BINS = 64
+DEFAULT_COMPRESSION = 100
+
+# Byte entropy is measured in bits, so it always lies in [0, 8]
+ENTROPY_RANGE = (0.0, 8.0)
+
+
+class RunningStats:
+    """Count, mean and central moments up to the fourth, updated in batches and mergeable.
+
+    Batches are folded in with the pairwise formulas of Chan et al. / Pébay, so the result
+    matches a single pass over all values (np.var, scipy.stats.skew/kurtosis with bias=True).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        deviations = values - batch.mean
+        squared = deviations * deviations
+        batch.m2 = float(squared.sum())
+        batch.m3 = float((squared * deviations).sum())
+        batch.m4 = float((squared * squared).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        m3 = (self.m3 + other.m3 + delta * delta_n * delta_n * n_a * n_b * (n_a - n_b)
+              + 3 * delta_n * (n_a * other.m2 - n_b * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6 * delta_n * delta_n * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+              + 4 * delta_n * (n_a * other.m3 - n_b * self.m3))
+        self.count = n
+        self.mean += delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Population variance, as np.var computes it."""
+        return self.m2 / self.count if self.count else float('nan')
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    @property
+    def skewness(self):
+        if not self.count or not self.m2:
+            return float('nan')
+        return self.count ** 0.5 * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self):
+        """Excess (Fisher) kurtosis."""
+        if not self.count or not self.m2:
+            return float('nan')
+        return self.count * self.m4 / (self.m2 * self.m2) - 3.0
+
+
+class Histogram:
+    """Fixed-bin histogram over [low, high]; values outside are counted as under/overflow."""
+
+    def __init__(self, low, high, bins=DEFAULT_BINS):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histograms have different bins")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def density(self):
+        """Counts normalised like plt.hist(..., density=True)."""
+        total = self.total
+        if not total:
+            return np.zeros(len(self.counts))
+        return self.counts / (total * np.diff(self.edges))
+
+    def smoothed_density(self, bandwidth_bins=1.5):
+        """Density smoothed with a Gaussian kernel, a bounded-memory stand-in for a KDE curve."""
+        radius = max(1, int(3 * bandwidth_bins))
+        offsets = np.arange(-radius, radius + 1)
+        kernel = np.exp(-0.5 * (offsets / bandwidth_bins) ** 2)
+        kernel /= kernel.sum()
+        # Renormalise at the edges so the range bounds do not pull the curve down
+        coverage = np.convolve(np.ones(len(self.counts)), kernel, mode='same')
+        return np.convolve(self.density(), kernel, mode='same') / coverage
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+
+class TDigest:
+    """Merging t-digest (Dunning) for approximate quantiles in bounded memory."""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values, weights=None):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        keep = ~np.isnan(values)
+        values = values[keep]
+        if not len(values):
+            return
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)[keep]
+        self._buffer.append((values, weights))
+        self._buffered += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if self._buffered >= self.compression * 20:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        if len(other.means):
+            self.update(other.means, other.weights)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [values for values, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # k1 scale function at each centroid's midpoint: small centroids near the tails, large in the middle
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / np.pi * np.arcsin(2 * q_mid - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        merged_weights = np.bincount(cluster, weights=weights)
+        merged_sums = np.bincount(cluster, weights=means * weights)
+        used = merged_weights > 0
+        self.weights = merged_weights[used]
+        self.means = merged_sums[used] / self.weights
+
+    @property
+    def count(self):
+        self._compress()
+        return float(self.weights.sum())
+
+    def quantile(self, q):
+        """Approximate q-quantile (q in [0, 1], scalar or array)."""
+        self._compress()
+        if not len(self.means):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float('nan')
+        total = self.weights.sum()
+        positions = np.concatenate(([0.0], np.cumsum(self.weights) - self.weights / 2, [total]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(np.asarray(q) * total, positions, values)
+
+
+class Summary:
+    """Running moments, a fixed-bin histogram and a t-digest for one group of values."""
+
+    def __init__(self, low, high, bins=DEFAULT_BINS, compression=DEFAULT_COMPRESSION):
+        self.stats = RunningStats()
+        self.histogram = Histogram(low, high, bins)
+        self.digest = TDigest(compression)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.stats.update(values)
+        self.histogram.update(values)
+        self.digest.update(values)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+        self.digest.merge(other.digest)
+
+    def box_stats(self, label):
+        """Tukey box statistics from the digest, in the form Axes.bxp takes."""
+        q1, median, q3 = self.digest.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {
+            'label': label,
+            'q1': q1,
+            'med': median,
+            'q3': q3,
+            'whislo': max(self.stats.min, q1 - 1.5 * iqr),
+            'whishi': min(self.stats.max, q3 + 1.5 * iqr),
+            'fliers': [],
+        }
+
+
+class GroupedSummary:
+    """A Summary per group (file extension, malware family, ...) plus one over all values."""
+
+    def __init__(self, low, high, bins=DEFAULT_BINS, compression=DEFAULT_COMPRESSION):
+        self.options = (low, high, bins, compression)
+        self.overall = Summary(*self.options)
+        self.groups = {}
+
+    def group(self, key):
+        if key not in self.groups:
+            self.groups[key] = Summary(*self.options)
+        return self.groups[key]
+
+    def update(self, keys, values):
+        keys = np.asarray(keys)
+        values = np.asarray(values, dtype=np.float64)
+        self.overall.update(values)
+        if not len(keys):
+            return
+        uniques, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(uniques)))[:-1]
+        for key, group_values in zip(uniques.tolist(), np.split(values[order], bounds)):
+            self.group(key).update(group_values)
+
+    def merge(self, other):
+        self.overall.merge(other.overall)
+        for key, summary in other.groups.items():
+            self.group(key).merge(summary)
+
+
+def file_extension(file_resources):
+    """Vectorised `name.split('.')[-1] if '.' in name else 'none'` over a Series of file names."""
+    names = file_resources.astype(str)
+    extensions = names.str.rsplit('.', n=1).str[-1]
+    return extensions.where(names.str.contains('.', regex=False), 'none')
+
+
+def resource_extension(chunk):
+    """Group key for result CSVs: the extension of the file_resource column."""
+    return file_extension(chunk['file_resource'])
+
+
+def _summarize_file(file_name, value_column, group_column, group_func, value_range, bins, chunk_size):
+    summary = GroupedSummary(value_range[0], value_range[1], bins)
+    usecols = None if group_func else [c for c in (value_column, group_column) if c]
+    for chunk in csv_ingest.iter_results([file_name], chunk_size, usecols=usecols):
+        values = pd.to_numeric(chunk[value_column], errors='coerce').to_numpy(dtype=np.float64)
+        if group_func is not None:
+            keys = group_func(chunk).to_numpy()
+        elif group_column:
+            keys = chunk[group_column].astype(str).to_numpy()
+        else:
+            keys = np.empty(0)
+        # Rows without a value (signer rows leave the entropy cell empty) do not open a group
+        measured = ~np.isnan(values)
+        values = values[measured]
+        if len(keys):
+            keys = keys[measured]
+        summary.update(keys, values)
+    return summary
+
+
+def summarize_csvs(file_names, value_column='entropy', group_column=None, group_func=None,
+                   value_range=ENTROPY_RANGE, bins=DEFAULT_BINS, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Read each CSV once, in chunks, into a GroupedSummary; memory does not grow with the corpus.
+
+    Groups come from group_func(chunk) when given, else from group_column, else everything is
+    one group. Rows whose value is missing or not a number are skipped. Files are summarised
+    in parallel processes and the summaries merged, so group_func must be a module-level
+    function. Missing files are reported and skipped.
+    """
+    workers = workers or min(len(file_names), os.cpu_count() or 1) or 1
+    arguments = (value_column, group_column, group_func, value_range, bins, chunk_size)
+    summary = GroupedSummary(value_range[0], value_range[1], bins)
+    if workers == 1:
+        parts = (_summarize_file(file_name, *arguments) for file_name in file_names)
+        for part in parts:
+            summary.merge(part)
+        return summary
+    with ProcessPoolExecutor(workers) as executor:
+        for part in executor.map(_summarize_file, file_names, *[[argument] * len(file_names) for argument in arguments]):
+            summary.merge(part)
+    return summary
@@ -0,0 +1,45 @@
+import http.server
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import fake_adb
+
+
+@pytest.fixture
+def fake_device(tmp_path, monkeypatch):
+    """The fake adb (see fake_adb.py): .adb is the executable, .state its device state directory."""
+    state = tmp_path / 'device'
+    adb = fake_adb.install(str(state))
+    monkeypatch.setenv('FAKE_ADB_STATE', str(state))
+    return SimpleNamespace(adb=adb, state=state)
+
+
+@pytest.fixture
+def http_server():
+    """Start a local HTTP server; call it with a handler(path) -> (status, body) and get its base URL."""
+    servers = []
+
+    def start(respond):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body.encode())))
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
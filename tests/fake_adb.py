@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Stand-in for adb with one fake device, for running the harvester without hardware.
+
+Run as `adb` it answers `devices`, `pull` and `shell`; the shell is a real sh whose PATH starts
+with links to this script named pm, dumpsys, am and input, which act on a state directory
+(FAKE_ADB_STATE):
+
+    installed/<package>   installed packages; `input tap` installs the package last opened with `am start`
+    system                system packages, one per line
+    crash                 packages whose `am start` kills the shell session
+    pull_fail             packages whose `adb pull` fails
+"""
+import os
+import signal
+import sys
+
+SERIAL = 'FAKE0001'
+STORE_FOCUS = 'mCurrentFocus=Window{1 u0 com.android.vending/com.google.android.finsky.activities.MainActivity}'
+
+
+def state(*parts):
+    return os.path.join(os.environ['FAKE_ADB_STATE'], *parts)
+
+
+def listed(name, package):
+    try:
+        with open(state(name), encoding='utf-8') as file:
+            return package in file.read().split()
+    except FileNotFoundError:
+        return False
+
+
+def package_of(remote_path):
+    # /data/app/<package>/base.apk
+    return remote_path.split('/')[3]
+
+
+def adb(args):
+    if args[:1] == ['-s']:
+        args = args[2:]
+    if args == ['devices']:
+        print(f"List of devices attached\n{SERIAL}\tdevice\n")
+    elif args[0] == 'pull':
+        remote_path, destination = args[1], args[2]
+        if listed('pull_fail', package_of(remote_path)):
+            print(f"adb: error: failed to copy '{remote_path}'", file=sys.stderr)
+            return 1
+        with open(destination, 'wb') as file:
+            file.write(b'PK\x05\x06' + bytes(18))
+    elif args == ['shell']:
+        env = dict(os.environ, PATH=state('bin') + os.pathsep + os.environ['PATH'])
+        os.execvpe('sh', ['sh'], env)
+    else:
+        print(f"fake adb: unsupported command {args}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def pm(args):
+    package = args[-1]
+    if args[0] == 'path':
+        if not os.path.exists(state('installed', package)):
+            return 1
+        print(f"package:/data/app/{package}/base.apk")
+    elif args[0] == 'uninstall':
+        if os.path.exists(state('installed', package)):
+            os.remove(state('installed', package))
+        print("Success")
+    return 0
+
+
+def dumpsys(args):
+    if args == ['window']:
+        print(STORE_FOCUS)
+    elif args[0] == 'package' and listed('system', args[1]):
+        print("    pkgFlags=[ SYSTEM HAS_CODE ALLOW_CLEAR_USER_DATA ]")
+    return 0
+
+
+def am(args):
+    package = args[-1].split('id=', 1)[1]
+    if listed('crash', package):
+        os.kill(os.getppid(), signal.SIGKILL)
+        return 1
+    with open(state('opened'), 'w', encoding='utf-8') as file:
+        file.write(package)
+    return 0
+
+
+def input_tap(args):
+    with open(state('opened'), encoding='utf-8') as file:
+        package = file.read()
+    open(state('installed', package), 'w').close()
+    return 0
+
+
+TOOLS = {'pm': pm, 'dumpsys': dumpsys, 'am': am, 'input': input_tap}
+
+
+def install(state_dir):
+    """Create a state directory with the device tools linked to this script; return the adb path."""
+    script = os.path.abspath(__file__)
+    os.makedirs(os.path.join(state_dir, 'installed'), exist_ok=True)
+    os.makedirs(os.path.join(state_dir, 'bin'), exist_ok=True)
+    for tool in TOOLS:
+        os.symlink(script, os.path.join(state_dir, 'bin', tool))
+    os.chmod(script, 0o755)
+    return script
+
+
+if __name__ == '__main__':
+    tool = TOOLS.get(os.path.basename(sys.argv[0]), adb)
+    sys.exit(tool(sys.argv[1:]))
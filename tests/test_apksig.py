@@ -0,0 +1,51 @@
+import struct
+
+import apksig
+
+
+def lp(*items):
+    data = b''.join(items)
+    return struct.pack('<I', len(data)) + data
+
+
+def signer(digest, lineage=()):
+    info = {'sha256': digest}
+    if lineage:
+        info['lineage'] = list(lineage)
+    return info
+
+
+def v3_block(cert, lineage_certs):
+    nodes = b''.join(lp(lp(lp(c), struct.pack('<I', 0x103)), struct.pack('<II', 0, 0x103), lp(b'sig'))
+                     for c in lineage_certs)
+    lineage = struct.pack('<I', 1) + nodes
+    attribute = lp(struct.pack('<I', apksig.PROOF_OF_ROTATION_ATTR_ID), lineage)
+    signed_data = lp(lp()) + lp(lp(cert)) + struct.pack('<II', 28, 0x7FFFFFFF) + lp(attribute)
+    signer_data = lp(signed_data) + struct.pack('<II', 28, 0x7FFFFFFF) + lp() + lp(b'key')
+    return lp(lp(signer_data))
+
+
+def test_scheme_signers_reads_v3_lineage():
+    block = v3_block(b'new-cert', [b'old-cert', b'new-cert'])
+    [(certificates, lineage)] = apksig.scheme_signers(block, 0, len(block), v3=True)
+    assert certificates == [b'new-cert']
+    assert lineage == [b'old-cert', b'new-cert']
+    assert apksig.scheme_certificates(block, 0, len(block)) == [b'new-cert']
+
+
+def test_same_signer_everywhere_agrees():
+    assert not apksig.schemes_disagree({'v1': [signer('a')], 'v2': [signer('a')], 'v3': [signer('a')]})
+
+
+def test_v1_and_v2_must_match():
+    assert apksig.schemes_disagree({'v1': [signer('a')], 'v2': [signer('b')]})
+
+
+def test_rotated_v3_signer_with_lineage_agrees():
+    signers = {'v1': [signer('old')], 'v2': [signer('old')], 'v3': [signer('new', ['old', 'new'])]}
+    assert not apksig.schemes_disagree(signers)
+
+
+def test_v3_signer_without_lineage_disagrees():
+    assert apksig.schemes_disagree({'v2': [signer('old')], 'v3': [signer('new')]})
+    assert apksig.schemes_disagree({'v2': [signer('old')], 'v3': [signer('new', ['other', 'new'])]})
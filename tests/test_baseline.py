@@ -0,0 +1,25 @@
+import baseline
+
+SIGNER = 'v1:' + 'ab' * 32
+
+
+def test_extensions_differing_in_case_merge(tmp_path):
+    csv_path = tmp_path / 'benign.csv'
+    rows = [f"com.a,res/{i}.{'PNG' if i % 2 else 'png'},No,{5 + i % 3}\n" for i in range(60)]
+    rows.append(f"com.a,{SIGNER},No,\n")
+    csv_path.write_text("package_name,file_resource,obfuscation_flag,entropy\n" + ''.join(rows))
+
+    profile = baseline.build_profile([str(csv_path)], str(tmp_path / 'profile.json'))
+
+    assert set(profile['extensions']) == {'png'}
+    assert profile['extensions']['png']['count'] == 60
+    assert profile['overall']['count'] == 60
+
+
+def test_lookup_uses_lower_cased_extension():
+    group = {'count': 100, 'mean': 5.0, 'std': 0.5, 'quantiles': {}}
+    profile = baseline.BaselineProfile({'extensions': {'png': group}})
+    assert profile.threshold('res/A.PNG') == 6.5
+    assert profile.is_anomalous('res/a.png', 6.6)
+    assert not profile.is_anomalous('res/a.png', 6.4)
+    assert profile.threshold('classes.dex') == baseline.DEFAULT_THRESHOLD
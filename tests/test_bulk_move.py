@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import bulk_move
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+@pytest.mark.parametrize('dest', ['.', 'out', 'a/b'])
+def test_destination_inside_source_is_refused(tmp_path, dest):
+    write(tmp_path / 'a' / 'b' / 'x.png', b'x')
+    with pytest.raises(ValueError):
+        bulk_move.move_files(str(tmp_path), str(tmp_path / dest))
+    assert (tmp_path / 'a' / 'b' / 'x.png').read_bytes() == b'x'
+
+
+def test_source_inside_destination_is_allowed(tmp_path):
+    write(tmp_path / 'incoming' / 'x.png', b'x')
+    counts = bulk_move.move_files(str(tmp_path / 'incoming'), str(tmp_path))
+    assert counts == {'move': 1, 'duplicate': 0}
+    assert (tmp_path / 'x.png').read_bytes() == b'x'
+
+
+def test_hard_linked_duplicate_is_not_removed(tmp_path):
+    write(tmp_path / 'src' / 'x.png', b'same')
+    (tmp_path / 'dest').mkdir()
+    os.link(tmp_path / 'src' / 'x.png', tmp_path / 'dest' / 'x.png')
+    assert bulk_move.plan_moves(str(tmp_path / 'src'), str(tmp_path / 'dest')) == []
+
+
+def test_duplicates_and_collisions(tmp_path):
+    write(tmp_path / 'src' / 'a' / 'x.png', b'one')
+    write(tmp_path / 'src' / 'b' / 'x.png', b'two')
+    write(tmp_path / 'src' / 'c' / 'y.png', b'one')
+    write(tmp_path / 'src' / 'c' / 'skip.txt', b'one')
+
+    counts = bulk_move.move_files(str(tmp_path / 'src'), str(tmp_path / 'dest'), suffixes=('.PNG',))
+
+    assert counts == {'move': 2, 'duplicate': 1}
+    names = sorted(name for name in os.listdir(tmp_path / 'dest') if name != bulk_move.JOURNAL_NAME)
+    assert names[0] == 'x.png' and names[1].startswith('x_') and len(names) == 2
+    assert (tmp_path / 'src' / 'c' / 'skip.txt').exists()
+
+
+def test_interrupted_run_resumes_from_the_journal(tmp_path, monkeypatch):
+    for name in ('a', 'b', 'c'):
+        write(tmp_path / 'src' / f'{name}.png', name.encode())
+    dest = tmp_path / 'dest'
+    real_rename = os.rename
+
+    def interrupted_rename(source, destination):
+        if source.endswith('b.png'):
+            raise KeyboardInterrupt
+        real_rename(source, destination)
+
+    monkeypatch.setattr(bulk_move.os, 'rename', interrupted_rename)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_move.move_files(str(tmp_path / 'src'), str(dest))
+    monkeypatch.setattr(bulk_move.os, 'rename', real_rename)
+
+    journal = str(dest / bulk_move.JOURNAL_NAME)
+    pending = bulk_move.read_journal(journal)
+    assert [os.path.basename(source) for source, _, _ in pending] == ['b.png', 'c.png']
+    # b.png was published by a cross-device copy that stopped before removing its source
+    (dest / 'b.png').write_bytes(b'b')
+    (dest / 'c.png.partial').write_bytes(b'stale')
+
+    def no_planning(*args, **kwargs):
+        raise AssertionError("a resumed run plans again")
+
+    monkeypatch.setattr(bulk_move, 'plan_moves', no_planning)
+    counts = bulk_move.move_files(str(tmp_path / 'src'), str(dest))
+
+    assert counts == {'move': 2, 'duplicate': 0}
+    assert sorted(os.listdir(dest)) == ['a.png', 'b.png', 'c.png']
+    assert os.listdir(tmp_path / 'src') == []
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import csv_ingest
+
+
+def test_read_results_fills_one_frame_in_path_order(tmp_path, capsys):
+    first = tmp_path / 'first.csv'
+    first.write_text(
+        'package_name,file_resource,obfuscation_flag,entropy\n'
+        'com.a,res/a.png,Yes,1.5\n'
+        'com.b,res/b.png,No,2.5\n'
+        'com.a,res/c.png,,3.5\n'
+    )
+    second = tmp_path / 'second.csv'
+    # A quoted line break makes the row estimate high, leaving a gap that must be closed
+    second.write_text(
+        'package_name,file_resource,obfuscation_flag,entropy\n'
+        'com.c,"res/multi\nline.png",No,4.5\n'
+        'com.a,res/d.png,Yes,5.5\n'
+    )
+    paths = [str(second), str(tmp_path / 'missing.csv'), str(first)]
+
+    frame = csv_ingest.read_results(paths, workers=2, chunksize=2)
+
+    assert 'missing.csv not found' in capsys.readouterr().out
+    assert frame['package_name'].tolist() == ['com.c', 'com.a', 'com.a', 'com.b', 'com.a']
+    assert frame['file_resource'].tolist()[0] == 'res/multi\nline.png'
+    assert sorted(frame['package_name'].cat.categories) == ['com.a', 'com.b', 'com.c']
+    assert frame['obfuscation_flag'].tolist() == [False, True, True, False, pd.NA]
+    assert frame['entropy'].dtype == np.float32
+    assert frame['entropy'].tolist() == [4.5, 5.5, 1.5, 2.5, 3.5]
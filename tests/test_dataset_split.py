@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+import dataset_split
+
+
+def make_samples(directory, names, package=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        pixels = np.zeros((4, 4), dtype=np.uint8)
+        if package:
+            dataset_split.write_sample_png(pixels, str(directory / name), package)
+        else:
+            (directory / name).write_bytes(b'sample ' + name.encode())
+
+
+def test_recorded_package_groups_any_split_name(tmp_path):
+    names = ['com.app_dex1.png', 'com.app_feature_camera_dex1.png', 'com.app_base.dm_dex2_fourier.png']
+    make_samples(tmp_path, names, package='com.app')
+    assert {dataset_split.package_key(str(tmp_path / name)) for name in names} == {'com.app'}
+
+
+def test_legacy_names_fall_back_to_known_suffixes(tmp_path):
+    make_samples(tmp_path, ['com.app_config.arm64_v8a_dex1.png', 'com.app_dex2.png', 'other.bin'])
+    assert dataset_split.package_key(str(tmp_path / 'com.app_config.arm64_v8a_dex1.png')) == 'com.app'
+    assert dataset_split.package_key(str(tmp_path / 'com.app_dex2.png')) == 'com.app'
+    assert dataset_split.package_key(str(tmp_path / 'other.bin')) == 'other'
+
+
+def test_split_keeps_packages_together_and_is_stable(tmp_path):
+    source = tmp_path / 'malware'
+    for i in range(20):
+        make_samples(source, [f'com.p{i}_dex1.png', f'com.p{i}_feature_x_dex1.png'], package=f'com.p{i}')
+    dataset = tmp_path / 'dataset'
+
+    counts = dataset_split.split_dataset({'malware': str(source)}, str(dataset), train_ratio=0.5, seed='s')
+    assert sum(counts.values()) == 40
+    for i in range(20):
+        places = {split for split in ('train', 'test')
+                  for name in (f'com.p{i}_dex1.png', f'com.p{i}_feature_x_dex1.png')
+                  if (dataset / split / 'malware' / name).exists()}
+        assert len(places) == 1
+    assert dataset_split.split_dataset({'malware': str(source)}, str(dataset), train_ratio=0.5, seed='s') == counts
+
+
+def test_copies_from_the_old_layout_are_removed(tmp_path):
+    source = tmp_path / 'benign'
+    make_samples(source, ['com.a_dex1.png', 'com.b_dex1.png'])
+    dataset = tmp_path / 'dataset'
+    # The old dafne.py copied every sample into both sets' directories over time
+    for split in ('train', 'test'):
+        make_samples(dataset / split / 'benign', ['com.a_dex1.png', 'com.b_dex1.png', 'notes.txt'])
+
+    dataset_split.split_dataset({'benign': str(source)}, str(dataset))
+
+    for name in ('com.a_dex1.png', 'com.b_dex1.png'):
+        present = [split for split in ('train', 'test') if (dataset / split / 'benign' / name).exists()]
+        assert len(present) == 1
+        assert os.path.samefile(dataset / present[0] / 'benign' / name, source / name)
+    assert (dataset / 'train' / 'benign' / 'notes.txt').exists()
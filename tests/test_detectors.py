@@ -0,0 +1,76 @@
+import io
+import struct
+import zipfile
+
+import archive
+import baseline
+import containers
+import detectors
+
+# A 64-bit little-endian ELF header without program or section headers
+ELF = b'\x7fELF\x02\x01\x01' + bytes(9) + struct.pack('<HHIQQQIHHHHHH', 3, 183, 1, 0, 0, 0, 0, 64, 56, 0, 64, 0, 0)
+
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for name, data, compression in entries:
+            zip_file.writestr(name, data, compress_type=compression)
+    return buffer.getvalue()
+
+
+def _scan(path, names):
+    with archive.Archive(str(path)) as apk:
+        return detectors.scan_archive(apk, detectors.create_detectors(names, baseline.BaselineProfile(None)))
+
+
+def test_native_and_nested_read_the_shared_mapping(tmp_path, monkeypatch):
+    inner = _zip([('AndroidManifest.xml', b'', zipfile.ZIP_STORED)])
+    path = tmp_path / 'outer.apk'
+    path.write_bytes(_zip([
+        ('AndroidManifest.xml', b'', zipfile.ZIP_STORED),
+        ('lib/arm64-v8a/libstored.so', ELF, zipfile.ZIP_STORED),
+        ('assets/data.bin', ELF + bytes(4096), zipfile.ZIP_DEFLATED),
+        ('assets/readme.txt', b'text', zipfile.ZIP_DEFLATED),
+        ('assets/inner.apk', inner, zipfile.ZIP_STORED),
+    ]))
+    opened = []
+    real_init = zipfile.ZipFile.__init__
+
+    def recording_init(self, file, *args, **kwargs):
+        opened.append(file)
+        real_init(self, file, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, '__init__', recording_init)
+
+    findings = _scan(path, ['native', 'nested'])
+
+    assert findings.resources['lib/arm64-v8a/libstored.so'][0]
+    assert findings.resources['assets/data.bin'][0]
+    assert 'assets/readme.txt' not in findings.resources
+    assert findings.resources[f'nested:{path}!/assets/inner.apk'][0]
+    assert findings.details['native']['assets/data.bin'] == ['missing_section_headers']
+    # The outer APK is parsed from the archive's mapping, never reopened by name
+    assert str(path) not in opened
+
+
+def test_nested_reports_an_unreadable_inner_archive(tmp_path):
+    path = tmp_path / 'outer.apk'
+    path.write_bytes(_zip([
+        ('AndroidManifest.xml', b'', zipfile.ZIP_STORED),
+        ('assets/broken.apk', b'PK\x03\x04 not a zip', zipfile.ZIP_STORED),
+    ]))
+    findings = _scan(path, ['nested'])
+    assert findings.resources['nested:assets/broken.apk'][0]
+    assert 'nested' in findings.details
+
+
+def test_buffer_file_reads_and_seeks_without_copying():
+    data = bytes(range(10))
+    with containers.BufferFile(data) as file:
+        assert file.read(3) == b'\x00\x01\x02'
+        assert file.seek(-2, io.SEEK_END) == 8
+        assert file.read() == b'\x08\x09'
+        file.seek(1, io.SEEK_CUR)
+        assert file.tell() == 11
+        assert file.read(1) == b''
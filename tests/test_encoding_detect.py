@@ -0,0 +1,26 @@
+import sys
+import types
+
+import encoding_detect
+
+
+def test_guesses_are_cached_by_the_sampled_prefix(monkeypatch):
+    samples = []
+    chardet = types.SimpleNamespace(detect=lambda sample: samples.append(sample) or {'encoding': 'ascii'})
+    monkeypatch.setitem(sys.modules, 'chardet', chardet)
+    encoding_detect.clear_cache()
+
+    prefix = b'plain text ' * 400
+    assert encoding_detect.detect_encoding(prefix + b'tail one') == 'ascii'
+    assert encoding_detect.detect_encoding(prefix + b'another tail') == 'ascii'
+    assert samples == [prefix[:encoding_detect.DEFAULT_SAMPLE_SIZE]]
+
+    assert encoding_detect.detect_encoding(b'short', content_hash='digest') == 'ascii'
+    assert encoding_detect.detect_encoding(b'short', content_hash='digest') == 'ascii'
+    assert len(samples) == 2
+    encoding_detect.clear_cache()
+
+
+def test_binaries_are_not_guessed():
+    assert encoding_detect.detect_encoding(b'\x89PNG\r\n\x1a\n' + bytes(32)) is None
+    assert encoding_detect.detect_encoding(b'') is None
@@ -0,0 +1,84 @@
+import package_queue
+import KUNPU_APK_DOWNLOADER
+import KunpuTheCat
+import link_resolver
+
+
+def test_harvest_records_done_skipped_and_retry(fake_device, tmp_path):
+    (fake_device.state / 'system').write_text('com.system\n')
+    (fake_device.state / 'crash').write_text('com.crash\n')
+    (fake_device.state / 'pull_fail').write_text('com.pullfail\n')
+    backup = tmp_path / 'apks'
+    backup.mkdir()
+
+    with package_queue.PackageQueue(str(tmp_path / 'queue.db')) as queue:
+        queue.add(['com.good', 'com.system', 'com.crash', 'com.pullfail'])
+        KUNPU_APK_DOWNLOADER.harvest_queue(queue, str(backup), adb=fake_device.adb, screen_check=None)
+        statuses = dict(queue.connection.execute("SELECT name, status FROM packages"))
+
+        assert statuses == {
+            'com.good': package_queue.DONE,
+            'com.system': package_queue.SKIPPED,
+            'com.crash': package_queue.PENDING,
+            'com.pullfail': package_queue.PENDING,
+        }
+        assert (backup / 'com.good-base.apk').exists()
+        # Released packages wait out the retry delay before they are handed out again
+        assert queue.claim('again') is None
+        queue.retry_delay = 0
+        assert queue.claim('again') in ('com.crash', 'com.pullfail')
+
+
+def search_page(path, listed=('com.found',)):
+    for name in listed:
+        if name in path:
+            return 200, f'<a class="result__a" href="https://apkpure.com/app/{name}">Found</a>'
+    if 'com.broken' in path:
+        return 503, 'unavailable'
+    return 200, '<html><body>No results.</body></html>'
+
+
+def test_resolve_queue_releases_unresolved_packages(http_server, tmp_path):
+    listed = ['com.found']
+    searches = []
+    base_url = http_server(lambda path: searches.append(path) or search_page(path, listed))
+    links_path = tmp_path / 'links.txt'
+    with package_queue.PackageQueue(str(tmp_path / 'queue.db')) as queue, \
+            link_resolver.Resolver(str(tmp_path / 'cache.jsonl'), search_url=base_url + '/html/?q={query}',
+                                   workers=2, rate=0, retries=0) as resolver:
+        queue.add(['com.found', 'com.missing', 'com.broken'])
+        KunpuTheCat.resolve_queue(queue, resolver, str(links_path))
+        rows = {name: (status, reason) for name, status, reason
+                in queue.connection.execute("SELECT name, status, reason FROM packages")}
+
+        assert rows == {
+            'com.found': (package_queue.DONE, None),
+            'com.missing': (package_queue.PENDING, 'no search result'),
+            'com.broken': (package_queue.PENDING, 'search failed'),
+        }
+        assert links_path.read_text() == "com.found\thttps://apkpure.com/app/com.found/downloading\n"
+
+        # Once released packages are handed out again, the cached "no result" does not answer for them
+        listed.append('com.missing')
+        queue.retry_delay = 0
+        KunpuTheCat.resolve_queue(queue, resolver, str(links_path))
+        assert queue.counts()[package_queue.DONE] == 2
+        assert sum('com.missing' in path for path in searches) == 2
+
+
+def test_negative_answers_expire(http_server, tmp_path):
+    searches = []
+    base_url = http_server(lambda path: searches.append(path) or search_page(path))
+    options = dict(search_url=base_url + '/html/?q={query}', workers=1, rate=0, retries=0)
+    cache_path = str(tmp_path / 'cache.jsonl')
+    with link_resolver.Resolver(cache_path, **options) as resolver:
+        assert resolver.resolve('com.missing') is None
+        assert resolver.resolve('com.found').endswith('/com.found/downloading')
+        assert resolver.resolve('com.missing') is None
+        assert len(searches) == 2
+
+    # Reloaded from disk: links are kept for good, "no result" only until it expires
+    with link_resolver.Resolver(cache_path, negative_ttl=0, **options) as resolver:
+        assert resolver.resolve('com.found').endswith('/com.found/downloading')
+        assert resolver.resolve('com.missing') is None
+        assert len(searches) == 3
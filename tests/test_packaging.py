@@ -0,0 +1,31 @@
+import ast
+import os
+
+import pytest
+
+tomllib = pytest.importorskip('tomllib')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _imported_modules(module):
+    with open(os.path.join(ROOT, f"{module}.py"), 'r', encoding='utf-8') as file:
+        tree = ast.parse(file.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module.split('.')[0]
+
+
+def test_installed_modules_only_import_installed_modules():
+    with open(os.path.join(ROOT, 'pyproject.toml'), 'rb') as file:
+        installed = set(tomllib.load(file)['tool']['setuptools']['py-modules'])
+    local = {name[:-3] for name in os.listdir(ROOT) if name.endswith('.py')}
+    missing = {
+        (module, imported)
+        for module in installed
+        for imported in _imported_modules(module)
+        if imported in local and imported not in installed
+    }
+    assert not missing
@@ -0,0 +1,23 @@
+import io
+
+import pattern_scan
+
+
+def test_nested_patterns_are_counted_independently():
+    scanner = pattern_scan.PatternScanner(['DexClassLoader', 'InMemoryDexClassLoader'])
+    result = scanner.scan(b'xxInMemoryDexClassLoader yy DexClassLoader')
+    assert result[b'DexClassLoader']['count'] == 2
+    assert result[b'DexClassLoader']['offsets'] == [10, 28]
+    assert result[b'InMemoryDexClassLoader']['count'] == 1
+
+
+def test_overlapping_occurrences_and_single_bytes():
+    result = pattern_scan.PatternScanner(['aa', 'b']).scan(memoryview(b'aaab'))
+    assert result[b'aa'] == {'count': 2, 'offsets': [0, 1]}
+    assert result[b'b'] == {'count': 1, 'offsets': [3]}
+
+
+def test_stream_matches_whole_buffer_across_chunk_boundaries():
+    data = b'..aaaa..DexClassLoader..InMemoryDexClassLoader..b' * 50
+    scanner = pattern_scan.PatternScanner(['aa', 'b', 'DexClassLoader', 'InMemoryDexClassLoader'])
+    assert scanner.scan_stream(io.BytesIO(data), chunk_size=7) == scanner.scan(data)
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import result_index
+
+HEADER = "package_name,file_resource,obfuscation_flag,entropy\n"
+
+
+@pytest.fixture
+def index(tmp_path):
+    with result_index.ResultIndex(str(tmp_path / 'index.db')) as index:
+        yield index
+
+
+def write_csv(path, rows, mode='w'):
+    with open(path, mode, encoding='utf-8') as file:
+        if mode == 'w':
+            file.write(HEADER)
+        file.writelines(f"{','.join(map(str, row))}\n" for row in rows)
+
+
+def test_ingested_yes_rows_come_back_flagged(index, tmp_path):
+    path = tmp_path / 'adwares.csv'
+    write_csv(path, [('com.a', 'classes.dex', 'Yes', 7.8), ('com.a', 'a.png', 'No', 3.5)])
+
+    assert index.ingest_csv(str(path))
+    assert index.flagged_rows(source=index.csv_source(str(path))) == [('com.a', 'classes.dex', 7.8)]
+    assert index.package_summary('com.a')[0] == (2, 1, 1, 7.8)
+
+
+def test_flag_values():
+    assert [result_index._flag(value) for value in ('Yes', True, 'True', 'No', False, None)] == [1, 1, 1, 0, 0, 0]
+
+
+def test_reingesting_a_grown_csv_replaces_its_rows(index, tmp_path):
+    path = tmp_path / 'adwares.csv'
+    write_csv(path, [('com.a', 'classes.dex', 'Yes', 7.9)])
+    index.ingest_csv(str(path))
+    assert not index.ingest_csv(str(path))
+
+    write_csv(path, [('com.a', 'b.so', 'Yes', 6.0)], mode='a')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert index.ingest_csv(str(path))
+
+    assert sorted(index.flagged_rows(package='com.a')) == [('com.a', 'b.so', 6.0), ('com.a', 'classes.dex', 7.9)]
+    assert index.package_summary('com.a')[0] == (2, 2, 1, 7.9)
+    assert sorted(index.package_summary('com.a')[1]) == [('dex', 1, 1, 1, 7.9), ('so', 1, 1, 0, 6.0)]
+
+
+def test_flagged_rows_of_one_source(index, tmp_path):
+    path = tmp_path / 'adwares.csv'
+    write_csv(path, [('com.csv', 'classes.dex', 'Yes', 7.8)])
+    index.ingest_csv(str(path))
+    index.add_rows([['com.scan', 'lib.so', 'Yes', 7.7]], source='apk:0123')
+
+    assert index.flagged_rows(source=index.csv_source(str(path))) == [('com.csv', 'classes.dex', 7.8)]
+    assert len(index.flagged_rows()) == 2
+    assert not index.add_rows([['com.scan', 'lib.so', 'Yes', 7.7]], source='apk:0123')
@@ -0,0 +1,17 @@
+import json
+
+import rules
+
+
+def test_bundled_rules_load_from_package_data():
+    rule_set = rules.load_rules()
+    assert rule_set.byte_patterns
+    assert rule_set is rules.load_rules()
+
+
+def test_rules_file_path(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'suspicious_permissions': ['SEND_SMS'], 'byte_patterns': ['dex']}))
+    rule_set = rules.load_rules(str(path))
+    assert rule_set.suspicious_permission('android.permission.SEND_SMS') == 'SEND_SMS'
+    assert rule_set.byte_patterns == [b'dex']
@@ -0,0 +1,112 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image
+from scipy.ndimage import gaussian_filter
+
+import baseline
+import detectors
+import stego_image
+
+
+def png_bytes(pixels=None):
+    if pixels is None:
+        pixels = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def smooth_image(seed=0, size=256):
+    """Low-frequency shapes with a little sensor noise; its histogram is smooth enough to fool chi-square."""
+    rng = np.random.default_rng(seed)
+    shapes = gaussian_filter(rng.normal(0, 1, (size, size)), 8)
+    shapes = (shapes - shapes.min()) / (shapes.max() - shapes.min()) * 200 + 20
+    return np.clip(shapes + rng.normal(0, 1.5, (size, size)), 0, 255).astype(np.uint8)
+
+
+def embed_lsb(channel, rate, seed=1):
+    """Overwrite the LSB of a random `rate` fraction of the pixels with random bits."""
+    rng = np.random.default_rng(seed)
+    flat = channel.ravel().copy()
+    chosen = rng.random(flat.size) < rate
+    flat[chosen] = (flat[chosen] & 0xFE) | rng.integers(0, 2, chosen.sum(), dtype=np.uint8)
+    return flat.reshape(channel.shape)
+
+
+def test_trailing_data_after_iend():
+    data = png_bytes()
+    assert stego_image.trailing_data_size(data, 'png') == 0
+    assert stego_image.trailing_data_size(data + b'payload', 'png') == 7
+
+
+def test_analyze_image_flags_appended_data():
+    result = stego_image.analyze_image('res/a.png', png_bytes() + b'payload', 'png')
+    assert result['flag']
+    assert result['trailing_bytes'] == 7
+
+
+def test_statistics_of_a_clean_image():
+    channel = smooth_image()
+    # The smooth histogram alone equalises pairs of values, without any payload
+    assert stego_image.chi_square_lsb(channel) > stego_image.CHI_SQUARE_THRESHOLD
+    assert stego_image.rs_estimate(channel) < stego_image.RS_CONFIRM_THRESHOLD
+    assert not stego_image.analyze_image('res/clean.png', png_bytes(channel), 'png')['flag']
+
+
+def test_statistics_of_an_lsb_payload():
+    channel = embed_lsb(smooth_image(), 0.5)
+    assert stego_image.chi_square_lsb(channel) > stego_image.CHI_SQUARE_THRESHOLD
+    assert abs(stego_image.rs_estimate(channel) - 0.5) < 0.1
+    result = stego_image.analyze_image('res/payload.png', png_bytes(channel), 'png')
+    assert result['flag']
+    assert result['rs_rate'] > stego_image.RS_THRESHOLD
+
+
+def test_rs_estimate_follows_the_embedding_rate():
+    clean = smooth_image(seed=2)
+    rates = [stego_image.rs_estimate(embed_lsb(clean, rate)) for rate in (0.0, 0.2, 0.4)]
+    assert rates == sorted(rates)
+    assert abs(rates[1] - 0.2) < 0.1
+
+
+def _sleep_on_hang(file_name, data, file_type):
+    if file_name == 'hang.png':
+        time.sleep(30)
+    return stego_image._error_result(file_name, file_type, None)
+
+
+def test_image_pool_kills_a_hung_image(monkeypatch):
+    # The pool forks after the patch, so its workers run the stand-in
+    monkeypatch.setattr(stego_image, 'analyze_image', _sleep_on_hang)
+    pool = stego_image.ImagePool(workers=1, timeout=0.5)
+    try:
+        start = time.monotonic()
+        results = pool.analyze([('hang.png', b'', 'png'), ('ok.png', b'', 'png')])
+        assert time.monotonic() - start < 10
+        assert results[0]['error'] == 'timeout'
+        assert results[1] == {'file': 'ok.png', 'format': 'png', 'flag': False, 'error': None}
+    finally:
+        pool.close()
+
+
+def test_image_detector_goes_through_the_pool(monkeypatch):
+    monkeypatch.setattr(stego_image, 'analyze_image', _sleep_on_hang)
+    detector = detectors.create_detectors(['image'], baseline.BaselineProfile(None))[0]
+    detector.pool = stego_image.ImagePool(workers=1, timeout=0.5)
+
+    class FakeArchive:
+        def file_type(self, name):
+            return 'png'
+
+        def entropy(self, name):
+            return 1.0
+
+    findings = detectors.Findings('app')
+    try:
+        detector.entry(FakeArchive(), 'hang.png', b'', findings)
+    finally:
+        detector.pool.close()
+    assert findings.details['image']['hang.png']['error'] == 'timeout'
+    assert findings.resources['hang.png'] == (False, 1.0)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import stream_stats
+
+
+def test_running_stats_batches_match_one_pass():
+    values = np.random.default_rng(0).gamma(2.0, 1.5, 10_000)
+    whole = stream_stats.RunningStats()
+    for batch in np.array_split(values, 7):
+        part = stream_stats.RunningStats()
+        part.update(batch)
+        whole.merge(part)
+    assert whole.count == len(values)
+    assert whole.mean == pytest.approx(values.mean())
+    assert whole.variance == pytest.approx(np.var(values))
+    assert whole.skewness == pytest.approx(stats.skew(values))
+    assert whole.kurtosis == pytest.approx(stats.kurtosis(values))
+    assert (whole.min, whole.max) == (values.min(), values.max())
+
+
+def test_running_stats_ignore_nan():
+    running = stream_stats.RunningStats()
+    running.update([1.0, np.nan, 3.0])
+    assert running.count == 2
+    assert running.mean == 2.0
+
+
+def test_tdigest_quantiles_are_close():
+    values = np.random.default_rng(1).uniform(0, 8, 50_000)
+    digest = stream_stats.TDigest()
+    for batch in np.array_split(values, 5):
+        part = stream_stats.TDigest()
+        part.update(batch)
+        digest.merge(part)
+    quantiles = [0.01, 0.25, 0.5, 0.75, 0.99]
+    assert digest.count == len(values)
+    assert digest.quantile(quantiles) == pytest.approx(np.quantile(values, quantiles), abs=0.05)
+
+
+def test_summarize_csvs_groups_by_extension(tmp_path):
+    path = tmp_path / 'results.csv'
+    path.write_text(
+        "package_name,file_resource,hidden_content,entropy\n"
+        "a,res/x.png,No,7.0\n"
+        "a,res/y.png,No,7.5\n"
+        "a,classes.dex,No,6.0\n"
+        "a,LICENSE,No,4.0\n"
+    )
+    summary = stream_stats.summarize_csvs([str(path)], group_func=stream_stats.resource_extension, workers=1)
+    assert summary.overall.stats.count == 4
+    assert summary.groups['png'].stats.mean == pytest.approx(7.25)
+    assert summary.groups['dex'].stats.count == 1
+    assert summary.groups['none'].stats.count == 1
@@ -0,0 +1,80 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+import overlay
+import zip_layout
+
+
+def _apk(entries=(('AndroidManifest.xml', b'manifest'), ('classes.dex', b'dex\n035' + bytes(64))), comment=b''):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, data in entries:
+            zip_file.writestr(name, data)
+        zip_file.comment = comment
+    return buffer.getvalue()
+
+
+def _entries(buf):
+    cd_offset, cd_size, shift = zip_layout.find_central_directory(buf)
+    return [
+        (name, zip_layout.read_entry(buf, local_offset + shift, compressed_size, method))
+        for name, local_offset, compressed_size, method in zip_layout.iter_central_directory(buf, cd_offset, cd_size)
+    ]
+
+
+def test_entries_read_back():
+    assert _entries(_apk()) == [('AndroidManifest.xml', b'manifest'), ('classes.dex', b'dex\n035' + bytes(64))]
+
+
+def test_prepended_data_shifts_offsets():
+    prefix = bytes(range(256)) * 4
+    buf = prefix + _apk()
+    assert zip_layout.find_central_directory(buf)[2] == len(prefix)
+    assert _entries(buf) == _entries(_apk())
+    regions = overlay.find_overlays(buf)
+    assert [(region['kind'], region['offset'], region['size']) for region in regions] == [('prefix', 0, len(prefix))]
+    assert regions[0]['entropy'] == pytest.approx(8.0)
+    assert overlay.is_suspicious(regions[0])
+
+
+def test_appended_data_is_trailing():
+    apk = _apk()
+    buf = apk + b'payload' * 10
+    assert zip_layout.find_eocd(buf)[0] == len(apk) - zip_layout.EOCD_SIZE
+    regions = overlay.find_overlays(buf)
+    assert [(region['kind'], region['offset']) for region in regions] == [('trailing', len(apk))]
+
+
+def test_clean_archive_and_plain_comment():
+    assert overlay.find_overlays(_apk()) == []
+    regions = overlay.find_overlays(_apk(comment=b'built by a release script'))
+    assert [region['kind'] for region in regions] == ['eocd_comment']
+    assert not overlay.is_suspicious(regions[0])
+
+
+def test_signing_block_pairs():
+    apk = _apk()
+    cd_offset, cd_size, _ = zip_layout.find_central_directory(apk)
+    unknown = struct.pack('<QI', 4 + 32, 0x12345678) + bytes(range(32))
+    v2 = struct.pack('<QI', 4 + 8, zip_layout.V2_BLOCK_ID) + bytes(8)
+    pairs = v2 + unknown
+    block_size = len(pairs) + 8 + 16
+    block = struct.pack('<Q', block_size) + pairs + struct.pack('<Q', block_size) + zip_layout.SIGNING_BLOCK_MAGIC
+    # The signing block sits between the last entry and the central directory, which moves along
+    eocd = bytearray(apk[cd_offset + cd_size:])
+    struct.pack_into('<I', eocd, 16, cd_offset + len(block))
+    buf = apk[:cd_offset] + block + apk[cd_offset:cd_offset + cd_size] + bytes(eocd)
+
+    new_cd_offset = cd_offset + len(block)
+    assert zip_layout.find_signing_block(buf, new_cd_offset) == (cd_offset, len(block))
+    ids = [pair_id for pair_id, _, _ in zip_layout.iter_signing_block_pairs(buf, cd_offset, len(block))]
+    assert ids == [zip_layout.V2_BLOCK_ID, 0x12345678]
+    assert [region['kind'] for region in overlay.find_overlays(buf)] == ['signing_block_pair_0x12345678']
+
+
+def test_missing_eocd():
+    with pytest.raises(zip_layout.ZipLayoutError):
+        zip_layout.find_eocd(b'not a zip' * 10)
@@ -0,0 +1,16 @@
+import multiprocessing
+
+
+def worker_context(preload=()):
+    """Multiprocessing context for scan workers.
+
+    Where available this is a forkserver that imports the preload modules once; every worker
+    is forked from it with those modules (and whatever state they set up at import, such as a
+    loaded baseline profile) already in memory, instead of re-importing them as spawn does.
+    '__main__' preloads the running script. Elsewhere (Windows) it falls back to spawn.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(list(preload))
+        return context
+    return multiprocessing.get_context('spawn')
@@ -2,18 +2,19 @@ import zipfile
 import os
 import numpy as np
 import cv2
-from androguard.core.bytecodes.apk import APK
+
+import containers
+import dataset_split
 
 def get_package_name(apk_path):
     """
-    Extract the package name from the APK or XPK.
+    Extract the package name from the APK or XPK (the base APK's, for split bundles).
     """
-    try:
-        apk = APK(apk_path)
-        return apk.get_package()
-    except Exception as e:
-        print(f"Error extracting package name from {apk_path}: {e}")
-        return None
+    for member in containers.iter_apks(apk_path):
+        if member.package and member.is_base:
+            return member.package
+    print(f"Error extracting package name from {apk_path}: no base APK found")
+    return None
 
 def extract_apk(apk_path, output_dir):
     """
@@ -38,13 +39,20 @@ def extract_apk(apk_path, output_dir):
         print(f"Error: '{apk_path}' is not a valid ZIP file. Skipping it.")
         return []
 
-def visualize_dex_as_bitmap(dex_path, output_image_path):
+def visualize_dex_as_bitmap(dex_path, output_image_path, package_name=None):
     """
     Visualize the binary content of the DEX file as a bitmap.
     """
     with open(dex_path, 'rb') as file:
         dex_data = file.read()
 
+    visualize_dex_bytes(dex_data, output_image_path, package_name)
+
+def visualize_dex_bytes(dex_data, output_image_path, package_name=None):
+    """
+    Visualize DEX bytes read straight from an archive as a bitmap.
+    The package name, when known, is recorded in the PNG for dataset_split.
+    """
     byte_data = np.frombuffer(dex_data, dtype=np.uint8)
     size = len(byte_data)
     side_length = int(np.ceil(np.sqrt(size)))
@@ -52,47 +60,40 @@ def visualize_dex_as_bitmap(dex_path, output_image_path):
     byte_data = np.pad(byte_data, (0, side_length**2 - size), 'constant')
     byte_data = np.reshape(byte_data, (side_length, side_length))
 
-    cv2.imwrite(output_image_path, byte_data)
+    if package_name:
+        dataset_split.write_sample_png(byte_data, output_image_path, package_name)
+    else:
+        cv2.imwrite(output_image_path, byte_data)
     print(f"Saved: {output_image_path}")
 
 def process_apks_in_folder(apk_folder, output_folder):
     """
-    Process all APK/XPKs, extract DEX, visualize as bitmap, and rename using package name or APK name.
-    Avoid processing the same APK/XPK multiple times.
+    Process all APK/XAPK/APKS/APKM bundles, including APKs nested in assets, and visualize every DEX as a bitmap.
+    Split APKs of one package are written to the same folder; DEX files are read in memory, never extracted.
     """
-    apk_files = [f for f in os.listdir(apk_folder) if f.endswith('.apk') or f.endswith('.xpk') or not os.path.splitext(f)[1]]
-    processed_files = set()  # Track processed APK/XPK files to avoid duplicates
-
-    for apk_file in apk_files:
-        # Treat files without extensions as .apk
-        if not os.path.splitext(apk_file)[1]:
-            apk_file = apk_file + '.apk'
-        
-        apk_path = os.path.join(apk_folder, apk_file)
-        
-        # Check if the APK/XPK file has been processed already
-        if apk_file in processed_files:
-            print(f"Skipping already processed file: {apk_file}")
-            continue
+    errors = []
 
+    for apk_path in containers.find_archives(apk_folder):
         print(f"Processing APK/XPK: {apk_path}")
-
-        # Get package name or use APK filename if package name is missing
-        package_name = get_package_name(apk_path)
-        if not package_name:
-            package_name = os.path.splitext(apk_file)[0]
-            print(f"Using APK/XPK file name '{package_name}' as package name.")
-
-        output_dir = os.path.join(output_folder, package_name)
-        dex_files = extract_apk(apk_path, output_dir)
-
-        for i, dex_file in enumerate(dex_files, start=1):
-            dex_path = os.path.join(output_dir, dex_file)
-            image_output_path = os.path.join(output_dir, f"{package_name}_dex{i}.png")
-            visualize_dex_as_bitmap(dex_path, image_output_path)
-
-        # Mark this APK/XPK as processed
-        processed_files.add(apk_file)
+        for member in containers.iter_apks(apk_path, errors):
+            # Use package name or APK filename if package name is missing
+            package_name = member.package or os.path.splitext(os.path.basename(apk_path))[0]
+            output_dir = os.path.join(output_folder, package_name)
+            os.makedirs(output_dir, exist_ok=True)
+
+            if member.in_apk:
+                suffix = '_nested_' + os.path.splitext(os.path.basename(member.chain[-1]))[0]
+            elif member.split:
+                suffix = '_' + member.split
+            else:
+                suffix = ''
+            dex_files = [name for name in member.zip_file.namelist() if name.endswith('.dex')]
+            for i, dex_file in enumerate(dex_files, start=1):
+                image_output_path = os.path.join(output_dir, f"{package_name}{suffix}_dex{i}.png")
+                visualize_dex_bytes(member.zip_file.read(dex_file), image_output_path, package_name)
+
+    for chain, reason in errors:
+        print(f"Skipped {'!/'.join(chain)}: {reason}")
 
 if __name__ == "__main__":
     apk_folder = '/Volumes/Shared/rabbyx/Adware'  # Update with your folder path
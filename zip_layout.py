@@ -0,0 +1,125 @@
+import struct
+import zlib
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+LOCAL_SIGNATURE = b'PK\x03\x04'
+DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+SIGNING_BLOCK_MAGIC = b'APK Sig Block 42'
+
+EOCD_SIZE = 22
+MAX_COMMENT_SIZE = 0xFFFF
+
+# Known ID-value pairs of the APK Signing Block
+V2_BLOCK_ID = 0x7109871A
+V3_BLOCK_ID = 0xF05368C0
+V31_BLOCK_ID = 0x1B93AD61
+SIGNING_BLOCK_IDS = {
+    V2_BLOCK_ID: 'v2_signature',
+    V3_BLOCK_ID: 'v3_signature',
+    V31_BLOCK_ID: 'v3.1_signature',
+    0x6DFF800D: 'source_stamp',
+    0x2146444E: 'play_dependency_metadata',
+    0x42726577: 'verity_padding',
+}
+
+
+class ZipLayoutError(Exception):
+    """Raised when the zip structures of an archive cannot be parsed."""
+
+
+def find_eocd(buf):
+    """Return (offset, cd_offset, cd_size, entry_count, comment_size) of the end-of-central-directory record."""
+    size = len(buf)
+    start = max(0, size - EOCD_SIZE - MAX_COMMENT_SIZE)
+    fallback = None
+    offset = buf.rfind(EOCD_SIGNATURE, start)
+    while offset >= 0:
+        if offset + EOCD_SIZE <= size:
+            entry_count, cd_size, cd_offset, comment_size = struct.unpack_from('<HIIH', buf, offset + 10)
+            record = offset, cd_offset, cd_size, entry_count, comment_size
+            # A clean EOCD's comment runs exactly to the end of the file
+            if offset + EOCD_SIZE + comment_size == size:
+                return record
+            # Otherwise something was appended after it
+            if fallback is None and offset + EOCD_SIZE + comment_size < size and cd_offset + cd_size <= offset:
+                fallback = record
+        offset = buf.rfind(EOCD_SIGNATURE, start, offset)
+    if fallback is not None:
+        return fallback
+    raise ZipLayoutError("End of central directory not found")
+
+
+def find_central_directory(buf):
+    """Return (cd_offset, cd_size, shift) with the offset corrected for any data prepended to the archive."""
+    eocd_offset, cd_offset, cd_size, _, _ = find_eocd(buf)
+    shift = eocd_offset - cd_size - cd_offset
+    if shift < 0:
+        raise ZipLayoutError("Central directory overlaps end of central directory")
+    return cd_offset + shift, cd_size, shift
+
+
+def find_signing_block(buf, cd_offset):
+    """Return (offset, size) of the APK Signing Block before the central directory, or None."""
+    if cd_offset < 32 or buf[cd_offset - 16:cd_offset] != SIGNING_BLOCK_MAGIC:
+        return None
+    (block_size,) = struct.unpack_from('<Q', buf, cd_offset - 24)
+    offset = cd_offset - block_size - 8
+    if offset < 0:
+        raise ZipLayoutError("APK Signing Block size out of range")
+    (leading_size,) = struct.unpack_from('<Q', buf, offset)
+    if leading_size != block_size:
+        raise ZipLayoutError("APK Signing Block size fields disagree")
+    return offset, block_size + 8
+
+
+def iter_signing_block_pairs(buf, block_offset, block_size):
+    """Yield (pair id, value offset, value size) for every ID-value pair of the signing block."""
+    offset = block_offset + 8
+    end = block_offset + block_size - 24
+    while offset + 12 <= end:
+        pair_size, pair_id = struct.unpack_from('<QI', buf, offset)
+        if pair_size < 4 or offset + 8 + pair_size > end:
+            raise ZipLayoutError(f"Malformed signing block pair at {offset}")
+        yield pair_id, offset + 12, pair_size - 4
+        offset += 8 + pair_size
+
+
+def iter_central_directory(buf, cd_offset, cd_size):
+    """Yield (name, local header offset, compressed size, method) for each central directory record."""
+    offset = cd_offset
+    end = cd_offset + cd_size
+    while offset + 46 <= end:
+        if buf[offset:offset + 4] != CENTRAL_SIGNATURE:
+            raise ZipLayoutError(f"Bad central directory record at {offset}")
+        (method,) = struct.unpack_from('<H', buf, offset + 10)
+        (compressed_size,) = struct.unpack_from('<I', buf, offset + 20)
+        name_size, extra_size, comment_size = struct.unpack_from('<HHH', buf, offset + 28)
+        (local_offset,) = struct.unpack_from('<I', buf, offset + 42)
+        name = bytes(buf[offset + 46:offset + 46 + name_size]).decode('utf-8', errors='replace')
+        yield name, local_offset, compressed_size, method
+        offset += 46 + name_size + extra_size + comment_size
+
+
+def local_record_span(buf, local_offset, compressed_size):
+    """Return (data offset, record end) of a local file record, including any data descriptor."""
+    if buf[local_offset:local_offset + 4] != LOCAL_SIGNATURE:
+        raise ZipLayoutError(f"Bad local file header at {local_offset}")
+    (flags,) = struct.unpack_from('<H', buf, local_offset + 6)
+    name_size, extra_size = struct.unpack_from('<HH', buf, local_offset + 26)
+    data_offset = local_offset + 30 + name_size + extra_size
+    end = data_offset + compressed_size
+    if flags & 0x08:
+        end += 16 if buf[end:end + 4] == DESCRIPTOR_SIGNATURE else 12
+    return data_offset, end
+
+
+def read_entry(buf, local_offset, compressed_size, method):
+    """Return the uncompressed data of a stored or deflated entry."""
+    data_offset, _ = local_record_span(buf, local_offset, compressed_size)
+    data = buf[data_offset:data_offset + compressed_size]
+    if method == 0:
+        return data
+    if method == 8:
+        return zlib.decompress(data, -15)
+    raise ZipLayoutError(f"Unsupported compression method {method}")